@@ -13,18 +13,18 @@ def create_trend_scout_agent():
         
         YOUR WORKFLOW:
         1. Search TikTok with PRODUCT-FOCUSED hashtags like #tiktokmakemebuyit, #amazonfinds, #musthaves
-        2. For EACH video found, USE ProductExtractor tool to identify the ACTUAL PRODUCT
+        2. USE ProductExtractor ONCE with videos=[{title, description, hashtags}, ...] (all videos found) to identify the ACTUAL PRODUCTS
         3. Return 5 DIFFERENT real products (not video titles!)
         
         CRITICAL:
         - You extract PRODUCTS from videos, not video titles
         - "DIY Home Hacks" is a VIDEO → extract "LED Strip Lights" as PRODUCT
-        - Use ProductExtractor for every TikTok result
+        - Pass every TikTok result to ProductExtractor in a single videos call
         - Focus on lightweight products under 5kg
         
         TOOL USAGE:
         - TikTok Scraper: Search with hashtags
-        - Product Extractor: Extract product from video title/description
+        - Product Extractor: Extract products from video titles/descriptions (batch via videos)
         
         Example:
         TikTok Video: "DIY Room Makeover with these LED lights! 🔥"
@@ -2,6 +2,8 @@ from crewai import Agent
 from utils.llm import get_ollama_llm
 from tools.aliexpress_scraper import AliExpressScraperTool
 from tools.amazon_scraper import AmazonScraperTool
+from tools.supplier_aggregator import SupplierAggregatorTool
+from tools.cj_dropshipping import CJShippingCalculator
 
 
 def create_aliexpress_scraper_agent():
@@ -13,8 +15,10 @@ def create_aliexpress_scraper_agent():
         You evaluate suppliers based on price, ratings, order volume, shipping times, 
         and product quality. You identify the most reliable suppliers with the best 
         value proposition for dropshipping. You prioritize suppliers with high ratings 
-        (4.5+), many orders, and reasonable shipping times.""",
-        tools=[AliExpressScraperTool()],
+        (4.5+), many orders, and reasonable shipping times.
+        Prefer the Supplier Aggregator: it compares AliExpress, CJ Dropshipping and
+        Amazon offers in one call and returns them already ranked.""",
+        tools=[SupplierAggregatorTool(), AliExpressScraperTool()],
         llm=get_ollama_llm(),
         verbose=True,
         allow_delegation=False
@@ -60,11 +64,13 @@ def create_pricing_strategist_agent():
         4. Determine optimal retail price (competitive but with 30%+ margin)
         5. Calculate profit margin percentage
         6. Calculate profit amount per unit
-        7. Consider geographic pricing variations if applicable
+        7. Price each geography: when the supplier is CJ Dropshipping, call the CJ Shipping
+           Cost Calculator with its product_id (platform_product_id) and cost_price to get
+           recommended_geography_pricing (freight to each market included)
         
         Return detailed pricing strategy with actual calculated numbers for each product.
         """,
-        tools=[],
+        tools=[CJShippingCalculator()],
         llm=get_ollama_llm(),
         verbose=True,
         allow_delegation=False
@@ -1,6 +1,7 @@
 from crewai import Agent
 from utils.llm import get_ollama_llm
 from tools.google_trends import GoogleTrendsTool
+from tools.engagement_growth import EngagementGrowthTool
 from tools.duplicate_checker_tool import DuplicateCheckerTool
 
 
@@ -29,7 +30,7 @@ def create_trend_validator_agent():
         and social media engagement metrics. You distinguish between viral fads and 
         sustainable trends. You identify the trend direction and predict longevity.
         Your goal is to avoid products that will die out in 2 months.""",
-        tools=[GoogleTrendsTool()],
+        tools=[GoogleTrendsTool(), EngagementGrowthTool()],
         llm=get_ollama_llm(),
         verbose=True,
         allow_delegation=False
@@ -44,7 +45,8 @@ def create_duplicate_checker_agent():
         backstory="""You are meticulous about avoiding duplicate work. You compare 
         new product candidates against our existing database to detect duplicates 
         based on product names, images, and specifications. You use fuzzy matching 
-        to catch similar products with slightly different names.""",
+        to catch similar products with slightly different names, and you check the
+        whole candidate list in a single tool call.""",
         tools=[DuplicateCheckerTool()],
         llm=get_ollama_llm(),
         verbose=True,
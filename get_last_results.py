@@ -56,38 +56,25 @@ if json_files:
             print(f"Erreur lecture JSON: {e}")
         print("-" * 80)
 
-# 3. Chercher dans la base de données
+# 3. Chercher dans la base de données (table workflow_runs)
 db_path = output_dir / "products.db"
 if db_path.exists():
-    import sqlite3
+    from utils.database import ProductDatabase
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT name, created_at, data 
-            FROM products 
-            ORDER BY created_at DESC 
-            LIMIT 1
-        """)
-        row = cursor.fetchone()
-        if row:
-            name, created, data_json = row
+        run = ProductDatabase(str(db_path)).get_workflow_run()
+        if run:
+            data = run["payload"]
             print(f"\n[DERNIER ENREGISTREMENT BASE DE DONNEES]")
-            print(f"Nom: {name}")
-            print(f"Cree le: {created}")
+            print(f"Nom: {run['label']}")
+            print(f"Cree le: {run['run_at']}")
             print("-" * 80)
-            try:
-                data = json.loads(data_json)
-                if "raw_results" in data:
-                    print(data["raw_results"][:1000])
-                    if len(data["raw_results"]) > 1000:
-                        print(f"\n... (tronque, {len(data['raw_results'])} caracteres au total)")
-                else:
-                    print(json.dumps(data, indent=2, ensure_ascii=False)[:1000])
-            except:
-                print(data_json[:500])
+            if "raw_results" in data:
+                print(data["raw_results"][:1000])
+                if len(data["raw_results"]) > 1000:
+                    print(f"\n... (tronque, {len(data['raw_results'])} caracteres au total)")
+            else:
+                print(json.dumps(data, indent=2, ensure_ascii=False)[:1000])
             print("-" * 80)
-        conn.close()
     except Exception as e:
         print(f"\n[ERREUR] Impossible de lire la base de donnees: {e}")
 
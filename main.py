@@ -70,8 +70,11 @@ from tasks.marketing_tasks import (
     create_facebook_ads_campaign_task
 )
 from tasks.reporting_tasks import create_final_report_task
-from utils.database import ProductDatabase
+from utils.database import ProductDatabase, run_product_ids
 from utils.config import settings
+from utils.circuit_breaker import circuit_metrics
+from utils.deadline import deadline
+from utils.http_client import latency_metrics
 from models.product_models import WinningProduct
 import json
 from datetime import datetime
@@ -202,8 +205,6 @@ def create_workflow_crew():
 def save_results_to_database(results: Dict[str, Any], db: ProductDatabase):
     """Save workflow results to database and files"""
     from datetime import datetime
-    import sqlite3
-    from uuid import uuid4
     
     print(f"\nSaving results to database and files...")
     
@@ -228,6 +229,8 @@ def save_results_to_database(results: Dict[str, Any], db: ProductDatabase):
             "final_output_available": bool(result_dict.get("final_output"))
         },
         "final_output": result_dict.get("final_output", ""),
+        "upstream_health": circuit_metrics(),
+        "upstream_latency": latency_metrics(),
         "task_results": {}
     }
     
@@ -268,27 +271,15 @@ def save_results_to_database(results: Dict[str, Any], db: ProductDatabase):
         f.write(result_text)
     print(f"  -> Last results saved: {last_file}")
     
-    # 4. Sauvegarder dans la base de données
+    # 4. Sauvegarder dans la base de données (table workflow_runs, résultat compressé), avec les
+    #    produits enregistrés ou retrouvés par la vérification de doublons pendant le run
     try:
-        conn = sqlite3.connect(db.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO products (id, name, category, data, overall_score, is_approved, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            str(uuid4()),
-            f"Workflow Run - {timestamp}",
-            "other",
-            json.dumps(json_data, default=str),
-            0.0,
-            1 if "approved" in result_text.lower() else 0,
-            datetime.now().isoformat()
-        ))
-        
-        conn.commit()
-        conn.close()
-        print(f"  -> Database saved: {db.db_path}")
+        run_id = db.save_workflow_run(
+            json_data,
+            is_approved="approved" in result_text.lower(),
+            product_ids=run_product_ids()
+        )
+        print(f"  -> Database saved: {db.db_path} (workflow run {run_id})")
     except Exception as e:
         print(f"  -> Error saving to database: {e}")
     
@@ -296,6 +287,14 @@ def save_results_to_database(results: Dict[str, Any], db: ProductDatabase):
     print(f"Database: {db.db_path}")
     print(f"\n[INFO] Total tasks processed: {result_dict.get('total_tasks', 0)}")
     print(f"[INFO] Tasks with output: {result_dict.get('tasks_with_output', 0)}")
+    
+    for host, health in json_data["upstream_health"].items():
+        print(f"[UPSTREAM] {host}: {health['state']} - {health['total_failures']} failures, "
+              f"{health['short_circuited']} calls short-circuited")
+    
+    for host, latency in json_data["upstream_latency"].items():
+        print(f"[LATENCY] {host}: p50 {latency['p50_seconds']}s, p95 {latency['p95_seconds']}s, "
+              f"{latency['hedged']} hedged ({latency['hedge_wins']} won by the hedge)")
 
 
 def main():
@@ -317,7 +316,9 @@ def main():
     print("=" * 70)
     
     try:
-        results = crew.kickoff()
+        # Échéance propagée jusqu'aux appels HTTP des outils (timeouts bornés au temps restant)
+        with deadline(settings.RUN_DEADLINE_SECONDS):
+            results = crew.kickoff()
         
         print("\n" + "=" * 70)
         print("Workflow completed successfully!")
@@ -0,0 +1,105 @@
+"""
+Compare le classifieur de catégories local au LLM: exactitude et latence par produit.
+
+Corpus: fixtures/v1/tiktok/titles.jsonl (titres annotés d'un produit du lexique, dont la
+catégorie sert d'étiquette), ou --corpus un JSONL {"text", "category"}.
+Le LLM n'est interrogé que sur --llm titres (un appel par titre, comme l'ancien chemin).
+
+Usage:
+    python scripts/bench_category_classifier.py [--llm 20] [--model PATH]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models.product_models import ProductCategory  # noqa: E402
+from utils.category_classifier import CategoryClassifier, accuracy, coerce_category  # noqa: E402
+from utils.config import settings  # noqa: E402
+from utils.product_lexicon import PRODUCT_LEXICON  # noqa: E402
+
+
+LLM_PROMPT = """Classify this product into exactly one category among: {categories}.
+Product: "{text}"
+Answer with the category only."""
+
+
+def load_corpus(path: Path) -> List[Tuple[str, ProductCategory]]:
+    corpus = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        if row.get("category"):
+            corpus.append((row["text"], coerce_category(row["category"])))
+        elif row.get("expected") in PRODUCT_LEXICON:
+            corpus.append((row["text"], PRODUCT_LEXICON[row["expected"]][0]))
+    return corpus
+
+
+def bench_classifier(classifier: CategoryClassifier, texts: List[str], rounds: int = 5) -> Tuple[List[ProductCategory], float]:
+    """Prédictions + meilleure latence par produit (µs) en mode lot"""
+    predicted, best = classifier.predict(texts), float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        classifier.predict(texts)
+        best = min(best, (time.perf_counter() - started) / len(texts))
+    return predicted, best * 1e6
+
+
+def bench_llm(texts: List[str]) -> Tuple[List[ProductCategory], float]:
+    from utils.llm import get_ollama_llm  # Import tardif: inutile sans --llm
+
+    llm = get_ollama_llm()
+    categories = ", ".join(category.value for category in ProductCategory)
+    predicted, started = [], time.perf_counter()
+    for text in texts:
+        answer = llm.call(LLM_PROMPT.format(categories=categories, text=text))
+        predicted.append(coerce_category(answer.strip().splitlines()[0] if answer.strip() else ""))
+    return predicted, (time.perf_counter() - started) / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark category classifier vs LLM")
+    parser.add_argument("--corpus", default=str(ROOT / "fixtures" / "v1" / "tiktok" / "titles.jsonl"))
+    parser.add_argument("--model", default=settings.CATEGORY_CLASSIFIER_PATH)
+    parser.add_argument("--llm", type=int, default=0, help="Titles also sent to the LLM (0 = skip)")
+    args = parser.parse_args()
+
+    if not Path(args.model).exists():
+        print(f"No model at {args.model} (run scripts/train_category_classifier.py first)")
+        sys.exit(1)
+
+    corpus = load_corpus(Path(args.corpus))
+    texts = [text for text, _ in corpus]
+    expected = [category for _, category in corpus]
+    classifier = CategoryClassifier.load(args.model)
+    print(f"Corpus: {len(corpus)} labeled titles | model trained {classifier.metadata.get('trained_at')} "
+          f"(held-out accuracy {classifier.metadata.get('test_accuracy')})\n")
+
+    results: Dict[str, Tuple[float, float, int]] = {}
+    predicted, latency = bench_classifier(classifier, texts)
+    results["classifier"] = (accuracy(predicted, expected), latency, len(texts))
+
+    if args.llm:
+        sample = corpus[:args.llm]
+        llm_predicted, llm_latency = bench_llm([text for text, _ in sample])
+        results["llm"] = (accuracy(llm_predicted, [category for _, category in sample]), llm_latency, len(sample))
+        # Même échantillon pour une comparaison équitable
+        results["classifier (same sample)"] = (accuracy(predicted[:args.llm], [c for _, c in sample]), latency, len(sample))
+
+    print(f"{'method':<26}{'titles':>8}{'accuracy':>10}{'µs/product':>14}")
+    for name, (score, micros, count) in results.items():
+        print(f"{name:<26}{count:>8}{score:>10.1%}{micros:>14,.1f}")
+    if "llm" in results:
+        print(f"\nClassifier is {results['llm'][1] / results['classifier'][1]:,.0f}x faster than the LLM")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Benchmark de la détection de doublons par nom (ProductDatabase.check_duplicate_by_name).
+
+Pour chaque taille: base temporaire de N produits synthétiques, construction de l'index de
+noms, puis latence p50/p95 d'une vérification (noms proches de produits existants + noms
+nouveaux). L'ancien algorithme (désérialisation de tous les produits + SequenceMatcher sur
+chacun) est mesuré jusqu'à --legacy-max produits, avec le taux d'accord entre les deux.
+
+Rappel: paires plantées (variante proche d'un nom existant, ratio >= --threshold) dont le nom
+d'origine doit être retrouvé, et part de ces paires sans aucun bucket LSH commun. Le ratio
+"Portable Mini Blender" / "Portable Blender" sert de cas fixe.
+
+Usage:
+    python scripts/bench_duplicate_check.py [--sizes 10000 100000 1000000] [--queries 200]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from models.product_models import (  # noqa: E402
+    MarketAnalysis, PricingStrategy, ProductCategory, ProductScore, ProductSource, ReviewAnalysis,
+    SupplierInfo, WinningProduct,
+)
+from utils.database import ProductDatabase  # noqa: E402
+from utils.name_index import MAX_CANDIDATES, name_buckets, name_similarity, normalize_name  # noqa: E402
+
+
+ADJECTIVES = ["Portable", "Mini", "Smart", "Wireless", "Magnetic", "Electric", "Rechargeable", "Foldable",
+              "LED", "RGB", "Cordless", "Heated", "Automatic", "Silicone", "Bluetooth", "Ergonomic"]
+NOUNS = ["Blender", "Strip Lights", "Earbuds", "Phone Holder", "Neck Fan", "Humidifier", "Moon Lamp", "Speaker",
+         "Charger", "Eye Massager", "Makeup Organizer", "Spin Scrubber", "Galaxy Projector", "Car Vacuum",
+         "Kitchen Scale", "Milk Frother", "Ice Roller", "Hair Straightener", "Water Bottle", "Cat Fountain"]
+SUFFIXES = ["Pro", "Max", "Plus", "5M", "2024", "for Home", "for Car", "Set", "Kit", "with Remote", "USB", "XL"]
+
+
+def synthetic_name(rng: random.Random) -> str:
+    words = [rng.choice(ADJECTIVES), rng.choice(ADJECTIVES), rng.choice(NOUNS), rng.choice(SUFFIXES)]
+    return " ".join(words) + f" {rng.choice(['', 'V', 'Gen ', 'Model '])}{rng.randint(1, 9999)}"
+
+
+def near_variant(name: str, rng: random.Random) -> str:
+    """Variante proche (mot retiré, ajouté ou abrégé) d'un nom existant"""
+    words = name.split()
+    operation = rng.random()
+    if operation < 0.35 and len(words) > 3:
+        words.pop(rng.randrange(1, len(words)))
+    elif operation < 0.7:
+        words.insert(rng.randrange(len(words) + 1), rng.choice(SUFFIXES))
+    else:
+        index = rng.randrange(len(words))
+        words[index] = words[index][:-1] if len(words[index]) > 3 else words[index]
+    return " ".join(words)
+
+
+def template_product() -> dict:
+    product = WinningProduct(
+        id="template",
+        name="template",
+        description="Synthetic product for benchmarks",
+        category=ProductCategory.HOME_GARDEN,
+        source=ProductSource(platform="TikTok", url="https://www.tiktok.com/@bench/video/1", engagement=1000),
+        suppliers=[SupplierInfo(platform="AliExpress", product_url="https://aliexpress.com/item/1.html",
+                                supplier_name="Bench Store", price=5.0, shipping_cost=1.0)],
+        market_analysis=MarketAnalysis(niche="bench", target_geography=["US"], market_size_estimate="Medium",
+                                       competition_level="Medium", trend_direction="Rising"),
+        review_analysis=ReviewAnalysis(),
+        pricing_strategy=PricingStrategy(cost_price=5.0, total_cost=6.0, suggested_retail_price=19.99,
+                                         profit_margin_percent=70.0, profit_amount=13.99),
+        score=ProductScore(trend_score=70, profit_score=70, competition_score=50, demand_score=60,
+                           quality_score=60, shipping_score=80, overall_score=65, reasoning="bench"),
+    )
+    return json.loads(product.model_dump_json())
+
+
+def populate(db_path: str, names: List[str]):
+    """Insertion brute (comme main.py): l'index de noms est construit au ProductDatabase() suivant"""
+    template = template_product()
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            id TEXT PRIMARY KEY, name TEXT NOT NULL, category TEXT, data JSON NOT NULL,
+            overall_score REAL, is_approved INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    with conn:
+        conn.executemany(
+            "INSERT INTO products (id, name, category, data, overall_score, is_approved) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (f"p{i}", name, "home_garden", json.dumps({**template, "id": f"p{i}", "name": name}), 65.0, 0)
+                for i, name in enumerate(names)
+            ),
+        )
+    conn.close()
+
+
+def legacy_check(db: ProductDatabase, name: str, threshold: float) -> Optional[WinningProduct]:
+    """Algorithme d'origine: tous les produits désérialisés, SequenceMatcher sur chacun"""
+    for product in db.get_all_products():
+        if SequenceMatcher(None, name.lower(), product.name.lower()).ratio() >= threshold:
+            return product
+    return None
+
+
+def recall_pairs(names: List[str], rng: random.Random, count: int, threshold: float) -> List[Tuple[int, str]]:
+    """(position du nom d'origine, variante) pour des variantes de ratio >= threshold"""
+    pairs = [(0, "Portable Blender")]  # names[0] = "Portable Mini Blender"
+    while len(pairs) < count:
+        source = rng.randrange(len(names))
+        variant = near_variant(names[source], rng)
+        if rng.random() < 0.5:
+            variant = near_variant(variant, rng)
+        if name_similarity(normalize_name(variant), normalize_name(names[source])) >= threshold:
+            pairs.append((source, variant))
+    return pairs
+
+
+def recall(db: ProductDatabase, names: List[str], pairs: List[Tuple[int, str]], threshold: float) -> str:
+    found = no_bucket = 0
+    for source, variant in pairs:
+        matches = db.find_similar_names(variant, threshold, limit=MAX_CANDIDATES)
+        found += any(match.product_id == f"p{source}" for match in matches)
+        no_bucket += not set(name_buckets(normalize_name(variant))) & set(name_buckets(normalize_name(names[source])))
+    return (f"recall {found}/{len(pairs)} ({found / len(pairs):.2%}), "
+            f"{no_bucket / len(pairs):.2%} of pairs share no LSH bucket")
+
+
+def percentiles(samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"p50 {statistics.median(ordered) * 1000:8.2f} ms  p95 {p95 * 1000:8.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark duplicate-name checks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--legacy-max", type=int, default=100_000, help="Largest size timed with the old algorithm")
+    parser.add_argument("--legacy-queries", type=int, default=5)
+    parser.add_argument("--recall-pairs", type=int, default=1_000, help="Planted near-duplicate pairs checked for recall")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        names = ["Portable Mini Blender"] + [synthetic_name(rng) for _ in range(size - 1)]
+        queries = [near_variant(rng.choice(names), rng) if i % 2 == 0 else synthetic_name(rng) for i in range(args.queries)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = str(Path(tmp) / "products.db")
+            started = time.perf_counter()
+            populate(db_path, names)
+            populated = time.perf_counter() - started
+
+            started = time.perf_counter()
+            db = ProductDatabase(db_path)
+            indexed = time.perf_counter() - started
+            print(f"\n{size:,} products: inserted in {populated:.1f}s, name index built in {indexed:.1f}s")
+
+            latencies, found = [], []
+            for query in queries:
+                started = time.perf_counter()
+                found.append(db.check_duplicate_by_name(query, args.threshold))
+                latencies.append(time.perf_counter() - started)
+            print(f"  index   {percentiles(latencies)}  ({sum(f is not None for f in found)}/{len(queries)} duplicates)")
+            print(f"  {recall(db, names, recall_pairs(names, rng, args.recall_pairs, args.threshold), args.threshold)}")
+
+            if size <= args.legacy_max:
+                legacy_latencies, agree = [], 0
+                sample = list(range(min(args.legacy_queries, len(queries))))
+                for index in sample:
+                    started = time.perf_counter()
+                    legacy = legacy_check(db, queries[index], args.threshold)
+                    legacy_latencies.append(time.perf_counter() - started)
+                    agree += (legacy is None) == (found[index] is None)
+                print(f"  legacy  {percentiles(legacy_latencies)}  (same verdict on {agree}/{len(sample)} queries)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark des parsers des outils sur les réponses enregistrées de fixtures/<version>/.
+
+Pour chaque cas du manifest: records/seconde, pic mémoire (tracemalloc) d'un parsing,
+et exactitude (sortie == fichier .expected.json). Mêmes points d'entrée que
+scripts/reprocess_snapshots.py, donc que les outils.
+
+Usage:
+    python scripts/bench_parsers.py                       # mesure + exactitude
+    python scripts/bench_parsers.py --save-baseline       # enregistre la référence
+    python scripts/bench_parsers.py --compare             # compare à la référence (code 1 si régression)
+    python scripts/bench_parsers.py --update-expected     # après un changement de parser voulu
+
+La référence (output/bench/parsers_baseline.json) dépend de la machine: elle n'est pas
+versionnée (output/ est ignoré), chaque poste enregistre la sienne avec --save-baseline.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from reprocess_snapshots import PARSERS  # noqa: E402 (scripts/ est dans sys.path)
+
+
+DEFAULT_BASELINE = ROOT / "output" / "bench" / "parsers_baseline.json"
+DEFAULT_TOLERANCE = 0.15  # Écart relatif toléré avant de signaler une régression
+ROUNDS = 5
+
+
+def load_cases(fixtures_dir: Path, only: List[str] = None) -> List[Dict[str, Any]]:
+    manifest = json.loads((fixtures_dir / "manifest.json").read_text(encoding="utf-8"))
+    cases = []
+    for case in manifest["cases"]:
+        if only and case["name"] not in only and case["tool"] not in only:
+            continue
+        case = dict(case)
+        case["body"] = (fixtures_dir / case["file"]).read_bytes()
+        case["expected_path"] = fixtures_dir / case["expected"]
+        cases.append(case)
+    return cases
+
+
+def _first_difference(actual: List[Dict], expected: List[Dict]) -> str:
+    if len(actual) != len(expected):
+        return f"{len(actual)} records, expected {len(expected)}"
+    for index, (got, want) in enumerate(zip(actual, expected)):
+        for key in sorted(set(got) | set(want)):
+            if got.get(key) != want.get(key):
+                return f"record {index} field '{key}': {got.get(key)!r} != {want.get(key)!r}"
+    return ""
+
+
+def bench_case(case: Dict[str, Any], min_time: float) -> Dict[str, Any]:
+    parse = PARSERS[case["tool"]]
+    body, query = case["body"], case["query"]
+
+    # Exactitude (et échauffement: imports, caches de regex)
+    records = json.loads(json.dumps(parse(body, query)))  # Même représentation que le .expected.json
+    expected = json.loads(case["expected_path"].read_text(encoding="utf-8")) if case["expected_path"].exists() else None
+    difference = "no expected file" if expected is None else _first_difference(records, expected)
+
+    # Débit: meilleur de ROUNDS tours de min_time / ROUNDS secondes (le moins perturbé par la machine)
+    best_rate, iterations = 0.0, 0
+    for _ in range(ROUNDS):
+        round_iterations, started = 0, time.perf_counter()
+        while True:
+            parse(body, query)
+            round_iterations += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time / ROUNDS:
+                break
+        iterations += round_iterations
+        best_rate = max(best_rate, round_iterations / elapsed)
+
+    # Pic mémoire d'un parsing (hors boucle de débit: tracemalloc ralentit tout)
+    tracemalloc.start()
+    parse(body, query)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "records": len(records),
+        "input_bytes": len(body),
+        "iterations": iterations,
+        "parses_per_sec": round(best_rate, 1),
+        "records_per_sec": round(best_rate * len(records), 1),
+        "peak_kib": round(peak / 1024, 1),
+        "correct": not difference,
+        "difference": difference,
+        "records_output": records,
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Régressions: débit en baisse ou mémoire en hausse au-delà de la tolérance, ou sortie incorrecte"""
+    regressions = []
+    for name, result in results.items():
+        if not result["correct"]:
+            regressions.append(f"{name}: incorrect output ({result['difference']})")
+        reference = baseline["cases"].get(name)
+        if not reference:
+            continue
+        if result["records_per_sec"] < reference["records_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {result['records_per_sec']:.0f} rec/s vs baseline {reference['records_per_sec']:.0f}"
+            )
+        if result["peak_kib"] > reference["peak_kib"] * (1 + tolerance):
+            regressions.append(f"{name}: peak memory {result['peak_kib']} KiB vs baseline {reference['peak_kib']} KiB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tool parsers over recorded fixtures")
+    parser.add_argument("--fixtures", default=str(ROOT / "fixtures" / "v1"), help="Versioned fixtures directory")
+    parser.add_argument("--only", nargs="*", help="Case names or tools to run")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds spent timing each case")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare with the baseline, exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-expected", action="store_true", help="Rewrite .expected.json from current output")
+    args = parser.parse_args()
+
+    fixtures_dir = Path(args.fixtures)
+    cases = load_cases(fixtures_dir, args.only)
+    results: Dict[str, Dict] = {}
+
+    print(f"{'case':<22}{'records':>8}{'parses/s':>11}{'records/s':>12}{'peak KiB':>10}  correct")
+    for case in cases:
+        result = bench_case(case, args.min_time)
+        records_output = result.pop("records_output")
+        if args.update_expected:
+            case["expected_path"].write_text(json.dumps(records_output, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+            result["correct"], result["difference"] = True, ""
+        results[case["name"]] = result
+        print(
+            f"{case['name']:<22}{result['records']:>8}{result['parses_per_sec']:>11}"
+            f"{result['records_per_sec']:>12}{result['peak_kib']:>10}  {'yes' if result['correct'] else 'NO: ' + result['difference']}"
+        )
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({
+            "fixtures": fixtures_dir.name,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "cases": results,
+        }, indent=2) + "\n", encoding="utf-8")
+        print(f"\nBaseline saved: {baseline_path}")
+
+    failures = [f"{name}: incorrect output ({r['difference']})" for name, r in results.items() if not r["correct"]]
+    if args.compare:
+        if not baseline_path.exists():
+            print(f"\nNo baseline at {baseline_path} (run with --save-baseline first)")
+            sys.exit(1)
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        if baseline.get("fixtures") != fixtures_dir.name:
+            print(f"\n[WARNING] Baseline recorded on fixtures {baseline.get('fixtures')}, not {fixtures_dir.name}")
+        failures = compare(results, baseline, args.tolerance)
+
+    if failures:
+        print("\nRegressions:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\nNo regression" if args.compare else "\nAll parsers correct")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark de l'extraction produit sans LLM sur un corpus de titres TikTok
+(fixtures/v1/tiktok/titles.jsonl: {"text", "expected"}, expected = null si aucun produit).
+Titres "ambiguous": true: nom générique ("water bottle", "cable box for TV", "#minifan") que le
+lexique doit laisser au LLM; comptés à part (part renvoyée au LLM) et dans la précision.
+
+Compare l'ancienne cascade (6 regex essayées l'une après l'autre) au lexique compilé
+(utils/product_lexicon.py, une seule regex): extractions/seconde, part des titres résolus
+sans appel LLM, précision sur les titres annotés.
+
+Usage:
+    python scripts/bench_product_extractor.py [--corpus PATH] [--min-time 1.0]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils.product_lexicon import MIN_CONFIDENCE, get_product_lexicon  # noqa: E402
+
+
+# Cascade d'origine de ProductExtractorTool._run, conservée comme point de comparaison
+LEGACY_PATTERNS = [
+    r"(?:LED|RGB)\s+(?:strip|lights?|bulbs?)",
+    r"(?:wireless|bluetooth)\s+(?:earbuds|headphones|speaker)",
+    r"(?:portable|mini)\s+(?:blender|fan|humidifier)",
+    r"(?:magnetic|suction)\s+(?:phone\s+)?holder",
+    r"(?:car|desk|phone)\s+(?:mount|stand|organizer)",
+    r"(?:smart|mini|portable)\s+\w+",
+]
+
+
+def legacy_extract(text: str) -> Optional[str]:
+    for pattern in LEGACY_PATTERNS:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            return match.group(0).title()
+    return None  # -> appel LLM
+
+
+def lexicon_extract(text: str) -> Optional[str]:
+    matches = get_product_lexicon().match(text)
+    if matches and matches[0].confidence >= MIN_CONFIDENCE:
+        return matches[0].product_name
+    return None  # -> appel LLM
+
+
+def throughput(extract, texts: List[str], min_time: float) -> float:
+    """Extractions/seconde (meilleur de 5 tours)"""
+    best = 0.0
+    for _ in range(5):
+        count, started = 0, time.perf_counter()
+        while time.perf_counter() - started < min_time / 5:
+            for text in texts:
+                extract(text)
+            count += len(texts)
+        best = max(best, count / (time.perf_counter() - started))
+    return best
+
+
+def evaluate(extract, rows: List[Dict[str, Any]]) -> Dict[str, float]:
+    resolved = correct = labeled_correct = deferred = 0
+    for row in rows:
+        found = extract(row["text"])
+        resolved += found is not None
+        if row["expected"] is None:
+            correct += found is None
+            deferred += found is None and row.get("ambiguous", False)
+        else:
+            labeled_correct += found == row["expected"]
+            correct += found == row["expected"]
+    labeled = sum(1 for row in rows if row["expected"] is not None)
+    ambiguous = sum(1 for row in rows if row.get("ambiguous"))
+    return {
+        "resolved_without_llm": resolved / len(rows),
+        "accuracy": correct / len(rows),
+        "product_recall": labeled_correct / labeled if labeled else 0.0,
+        "ambiguous_deferred": deferred / ambiguous if ambiguous else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark product extraction without LLM")
+    parser.add_argument("--corpus", default=str(ROOT / "fixtures" / "v1" / "tiktok" / "titles.jsonl"))
+    parser.add_argument("--min-time", type=float, default=1.0)
+    args = parser.parse_args()
+
+    rows = [json.loads(line) for line in Path(args.corpus).read_text(encoding="utf-8").splitlines() if line.strip()]
+    texts = [row["text"] for row in rows]
+    print(f"Corpus: {len(rows)} titles ({sum(r['expected'] is None for r in rows)} without product, "
+          f"{sum(bool(r.get('ambiguous')) for r in rows)} ambiguous)\n")
+
+    print(f"{'extractor':<12}{'extractions/s':>15}{'resolved w/o LLM':>18}{'accuracy':>10}{'recall':>8}{'ambiguous -> LLM':>18}")
+    for name, extract in (("legacy", legacy_extract), ("lexicon", lexicon_extract)):
+        rate = throughput(extract, texts, args.min_time)
+        quality = evaluate(extract, rows)
+        accuracy = f"{quality['accuracy']:.1%}" if name == "lexicon" else "n/a"  # L'ancienne cascade ne canonise pas
+        recall = f"{quality['product_recall']:.1%}" if name == "lexicon" else "n/a"
+        print(f"{name:<12}{rate:>15,.0f}{quality['resolved_without_llm']:>18.1%}{accuracy:>10}{recall:>8}"
+              f"{quality['ambiguous_deferred']:>18.1%}")
+
+
+if __name__ == "__main__":
+    main()
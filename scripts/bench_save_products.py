@@ -0,0 +1,106 @@
+"""
+Benchmark de l'écriture de produits: ProductDatabase.save_products (executemany, une
+transaction, model_dump_json) contre l'ancienne boucle save_product (une connexion, un
+json.dumps(model_dump()) et un commit par produit).
+
+Pour chaque taille: produits synthétiques construits hors chrono, base temporaire, débit en
+produits/seconde (index de recherche et tables relationnelles compris pour save_products).
+L'ancienne boucle n'est mesurée que jusqu'à --legacy-max produits.
+
+Usage:
+    python scripts/bench_save_products.py [--sizes 1000 100000] [--legacy-max 1000]
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_duplicate_check import synthetic_name, template_product  # noqa: E402 (scripts/ est dans sys.path)
+from models.product_models import WinningProduct  # noqa: E402
+from utils.database import ProductDatabase  # noqa: E402
+
+
+def make_products(count: int, seed: int) -> List[WinningProduct]:
+    rng = random.Random(seed)
+    template = template_product()
+    return [
+        WinningProduct(**{**template, "id": f"p{i}", "name": synthetic_name(rng)})
+        for i in range(count)
+    ]
+
+
+def legacy_save(db_path: str, product: WinningProduct):
+    """Ancien save_product: connexion, sérialisation par dict Python et commit à chaque produit"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        INSERT OR REPLACE INTO products
+        (id, name, category, data, overall_score, is_approved, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (
+        product.id,
+        product.name,
+        product.category.value,
+        json.dumps(product.model_dump(), default=str),
+        product.score.overall_score,
+        1 if product.is_approved else 0,
+        datetime.now().isoformat()
+    ))
+    conn.commit()
+    conn.close()
+
+
+def serialization_micros(products: List[WinningProduct]) -> str:
+    sample = products[:1000]
+    started = time.perf_counter()
+    for product in sample:
+        json.dumps(product.model_dump(), default=str)
+    legacy = (time.perf_counter() - started) / len(sample) * 1e6
+    started = time.perf_counter()
+    for product in sample:
+        product.model_dump_json()
+    fast = (time.perf_counter() - started) / len(sample) * 1e6
+    return f"json.dumps(model_dump()) {legacy:.1f} µs, model_dump_json() {fast:.1f} µs per product"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk product saves")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--legacy-max", type=int, default=1_000, help="Largest size timed with the old per-product loop")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        products = make_products(size, args.seed)
+        print(f"\n{size:,} products")
+        print(f"  serialization  {serialization_micros(products)}")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db = ProductDatabase(str(Path(tmp) / "bulk.db"))
+            started = time.perf_counter()
+            written = db.save_products(products)
+            elapsed = time.perf_counter() - started
+            print(f"  save_products  {written / elapsed:>10,.0f} products/s  ({elapsed:.2f}s, indexes included)")
+
+            if size <= args.legacy_max:
+                legacy_path = str(Path(tmp) / "legacy.db")
+                ProductDatabase(legacy_path)  # Schéma uniquement
+                started = time.perf_counter()
+                for product in products:
+                    legacy_save(legacy_path, product)
+                legacy_elapsed = time.perf_counter() - started
+                print(f"  legacy loop    {size / legacy_elapsed:>10,.0f} products/s  ({legacy_elapsed:.2f}s, no index)"
+                      f"  -> {legacy_elapsed / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
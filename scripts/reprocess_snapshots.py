@@ -0,0 +1,143 @@
+"""
+Relance les parsers des outils sur les réponses brutes archivées (utils/snapshot_store.py),
+sans aucun appel réseau: utile après la correction d'un parser.
+
+Usage:
+    python scripts/reprocess_snapshots.py                      # tous les outils
+    python scripts/reprocess_snapshots.py --tool aliexpress --workers 8
+    python scripts/reprocess_snapshots.py --since-days 7 --all-fetches
+    python scripts/reprocess_snapshots.py --purge-older-than 30 [--max-size-mb 512]   # nettoyage seul
+
+Résultats: output/reprocessed/<tool>.jsonl (une ligne par snapshot)
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.config import settings
+from utils.snapshot_store import SnapshotStore
+
+
+MAX_RECORDS = 1000  # Pas de limite de résultats au re-parsing: on veut tout ce que la page contient
+
+
+def _parse_aliexpress(body: bytes, query: str) -> List[Dict[str, Any]]:
+    from tools.aliexpress_scraper import parse_aliexpress_html
+    return parse_aliexpress_html(body, query, MAX_RECORDS)
+
+
+def _parse_amazon(body: bytes, query: str) -> List[Dict[str, Any]]:
+    from tools.amazon_scraper import parse_amazon_search_html
+    return parse_amazon_search_html(body, query, MAX_RECORDS)
+
+
+def _parse_rainforest(body: bytes, query: str) -> List[Dict[str, Any]]:
+    from tools.amazon_rainforest import parse_rainforest_results
+    return parse_rainforest_results(json.loads(body).get("search_results", []), MAX_RECORDS)
+
+
+def _parse_cj(body: bytes, query: str) -> List[Dict[str, Any]]:
+    from tools.cj_dropshipping import parse_cj_products
+    data = json.loads(body)
+    return parse_cj_products((data.get("data") or {}).get("list", [])) if data.get("code") == 200 else []
+
+
+def _parse_tiktok(body: bytes, query: str) -> List[Dict[str, Any]]:
+    from tools.tiktok_scraper import parse_tiktok_page
+    data = json.loads(body)
+    return parse_tiktok_page(data.get("data") or {}, query) if data.get("code") == 0 else []
+
+
+def _parse_pinterest(body: bytes, query: str) -> List[Dict[str, Any]]:
+    from tools.pinterest_scraper import parse_pinterest_html
+    return parse_pinterest_html(body.decode("utf-8", errors="replace"), query, MAX_RECORDS)
+
+
+PARSERS = {
+    "aliexpress": _parse_aliexpress,
+    "amazon": _parse_amazon,
+    "rainforest": _parse_rainforest,
+    "cj": _parse_cj,
+    "tiktok": _parse_tiktok,
+    "pinterest": _parse_pinterest,
+}
+
+
+def reprocess_one(snapshot_root: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Exécuté dans un process worker: décompresse et parse un snapshot"""
+    result = {key: entry[key] for key in ("id", "sha256", "tool", "query", "fetched_at")}
+    try:
+        body = SnapshotStore(snapshot_root).get(entry["sha256"])
+        result["records"] = PARSERS[entry["tool"]](body, entry["query"] or "")
+    except Exception as e:
+        result["records"] = []
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse archived upstream responses without refetching")
+    parser.add_argument("--tool", choices=sorted(PARSERS), help="Only reprocess this tool's snapshots")
+    parser.add_argument("--since-days", type=float, help="Only snapshots fetched in the last N days")
+    parser.add_argument("--all-fetches", action="store_true", help="Reprocess every fetch, not just each distinct content once")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--snapshot-dir", default=settings.SNAPSHOT_DIR)
+    parser.add_argument("--output-dir", default=str(Path(settings.OUTPUT_DIR) / "reprocessed"))
+    parser.add_argument("--purge-older-than", type=float, metavar="DAYS", help="Delete snapshots older than N days, then exit")
+    parser.add_argument("--max-size-mb", type=float, help="With --purge-older-than: also delete the oldest contents beyond this size")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.snapshot_dir)
+    if args.purge_older_than is not None or args.max_size_mb:
+        max_bytes = int(args.max_size_mb * 1024 * 1024) if args.max_size_mb else None
+        purged = store.purge(args.purge_older_than, max_bytes)
+        print(f"Purged {purged['fetches']} fetches, {purged['blobs']} blobs ({purged['bytes'] / 1024 / 1024:.1f} MB)")
+        return
+
+    since = time.time() - args.since_days * 86400 if args.since_days else None
+    entries = [
+        entry for entry in store.iter_index(tool=args.tool, since=since, latest_only=not args.all_fetches)
+        if entry["tool"] in PARSERS
+    ]
+    if not entries:
+        print("No snapshots to reprocess")
+        return
+
+    print(f"Reprocessing {len(entries)} snapshots with {args.workers} workers...")
+    started = time.perf_counter()
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    outputs, summary = {}, {}
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            results = executor.map(reprocess_one, [args.snapshot_dir] * len(entries), entries, chunksize=8)
+            for result in results:
+                tool = result["tool"]
+                if tool not in outputs:
+                    outputs[tool] = open(output_dir / f"{tool}.jsonl", "w", encoding="utf-8")
+                    summary[tool] = {"snapshots": 0, "records": 0, "errors": 0}
+                outputs[tool].write(json.dumps(result, ensure_ascii=False) + "\n")
+                summary[tool]["snapshots"] += 1
+                summary[tool]["records"] += len(result["records"])
+                summary[tool]["errors"] += "error" in result
+    finally:
+        for handle in outputs.values():
+            handle.close()
+
+    elapsed = time.perf_counter() - started
+    for tool, counts in sorted(summary.items()):
+        print(f"  {tool:<12} {counts['snapshots']:>6} snapshots  {counts['records']:>8} records  {counts['errors']:>4} errors")
+    print(f"Done in {elapsed:.1f}s -> {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Entraîne le classifieur de catégories (utils/category_classifier.py) sur les datasets
+Amazon téléchargés par scripts/download_datasets.py:
+
+    datasets/amazon_sales/*.csv          colonnes product_name, category ("A|B|C")
+    datasets/amazon_products_2023/*.csv  colonnes name, main_category, sub_category
+
+Les catégories Amazon sont ramenées à ProductCategory (map_amazon_category), 20% des
+produits sont gardés pour l'évaluation, le modèle est écrit dans CATEGORY_CLASSIFIER_PATH.
+
+Usage:
+    python scripts/train_category_classifier.py [--datasets datasets] [--max-per-class 20000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from sklearn.metrics import classification_report
+from sklearn.model_selection import train_test_split
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils.category_classifier import CategoryClassifier, accuracy, map_amazon_category  # noqa: E402
+from utils.config import settings  # noqa: E402
+
+
+DATASET_DIRS = ("amazon_sales", "amazon_products_2023")
+
+
+def _read_csv(path: Path) -> pd.DataFrame:
+    frame = pd.read_csv(path, low_memory=False, on_bad_lines="skip")
+    if {"product_name", "category"} <= set(frame.columns):
+        return pd.DataFrame({"text": frame["product_name"], "path": frame["category"]})
+    if {"name", "main_category"} <= set(frame.columns):
+        sub = frame["sub_category"] if "sub_category" in frame.columns else ""
+        return pd.DataFrame({"text": frame["name"], "path": frame["main_category"].astype(str) + "|" + sub.astype(str)})
+    return pd.DataFrame(columns=["text", "path"])
+
+
+def load_examples(datasets_dir: Path, max_per_class: int, seed: int) -> pd.DataFrame:
+    frames = []
+    for name in DATASET_DIRS:
+        for path in sorted((datasets_dir / name).glob("*.csv")):
+            frame = _read_csv(path)
+            print(f"  {path.relative_to(datasets_dir)}: {len(frame)} rows")
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame(columns=["text", "label"])
+
+    examples = pd.concat(frames, ignore_index=True).dropna(subset=["text"])
+    examples["text"] = examples["text"].astype(str).str.strip()
+    examples = examples[examples["text"].str.len() > 3].drop_duplicates(subset=["text"])
+
+    # Mapping une fois par chemin distinct (quelques milliers) plutôt que par ligne
+    mapping = {path: map_amazon_category(str(path)).value for path in examples["path"].unique()}
+    examples["label"] = examples["path"].map(mapping)
+
+    # Plafond par classe: Electronics domine largement les datasets Amazon
+    shuffled = examples.sample(frac=1.0, random_state=seed)
+    return shuffled.groupby("label").head(max_per_class).reset_index(drop=True)[["text", "label"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the product category classifier")
+    parser.add_argument("--datasets", default=str(ROOT / "datasets"))
+    parser.add_argument("--max-per-class", type=int, default=20_000)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=settings.CATEGORY_CLASSIFIER_PATH)
+    args = parser.parse_args()
+
+    print(f"Loading Amazon datasets from {args.datasets}")
+    examples = load_examples(Path(args.datasets), args.max_per_class, args.seed)
+    if examples.empty:
+        print("No Amazon dataset found (run scripts/download_datasets.py first)")
+        sys.exit(1)
+    print(f"\n{len(examples)} examples:\n{examples['label'].value_counts().to_string()}\n")
+
+    train, test = train_test_split(examples, test_size=args.test_size, random_state=args.seed, stratify=examples["label"])
+
+    started = time.perf_counter()
+    classifier = CategoryClassifier.fit(train["text"].tolist(), train["label"].tolist())
+    print(f"Trained on {len(train)} examples in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    predicted = [category.value for category in classifier.predict(test["text"].tolist())]
+    elapsed = time.perf_counter() - started
+    test_accuracy = accuracy(predicted, test["label"].tolist())
+    print(f"Held-out accuracy: {test_accuracy:.1%} ({len(test)} examples, {elapsed / len(test) * 1e6:.0f} µs/product in batch)\n")
+    print(classification_report(test["label"], predicted, zero_division=0))
+
+    classifier.metadata.update({
+        "datasets": list(DATASET_DIRS),
+        "test_accuracy": round(test_accuracy, 4),
+        "test_samples": len(test),
+    })
+    classifier.save(args.output)
+    print(f"Model saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -33,10 +33,14 @@ def create_trend_discovery_task():
            Example call:
            {{"keywords": ["tiktokmakemebuyit", "amazonfinds"], "max_videos": 10, "region": "us"}}
         
-        2. FOR EACH VIDEO FOUND:
-           - Use Product Extractor tool to identify the ACTUAL PRODUCT
-           - Input: video title + description + hashtags
-           - Output: Real product name, category, description
+           Videos come back deduplicated and ranked by trend_score (best first),
+           with views_per_day and engagement_rate already computed: do NOT re-rank them.
+        
+        2. EXTRACT THE PRODUCTS OF ALL VIDEOS IN ONE CALL:
+           - Call the Product Extractor tool ONCE with every video found:
+             {{"videos": [{{"title": "...", "description": "...", "hashtags": ["..."]}}, ...]}}
+           - Do NOT call it once per video
+           - Output: a list aligned with the videos (real product name, category, description)
            
            CRITICAL: "DIY Home Hacks" is NOT a product!
            → Extract "LED Strip Lights" from the video content
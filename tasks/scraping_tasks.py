@@ -12,7 +12,11 @@ def create_aliexpress_sourcing_task(context):
         description="""
         For each product, find suppliers on AliExpress:
         
-        Search AliExpress for the product and retrieve:
+        Call the AliExpress tool ONCE with ALL product names in the
+        "product_names" list (e.g. {"product_names": ["LED Strip Lights", "Mini Blender"]}).
+        The products are searched in parallel and results come back per product.
+        
+        For each product retrieve:
         1. Top 5 suppliers by rating and orders
         2. Product prices (in USD)
         3. Supplier ratings (must be 4.0+)
@@ -111,6 +115,14 @@ def create_pricing_strategy_task(context):
            - profit_margin_percent = ((retail_price - total_cost) / retail_price) * 100
            - profit_amount = retail_price - total_cost
         
+        7. Geography pricing (CJ Dropshipping suppliers):
+           - Take the supplier's "platform_product_id" (CJ pid) from Task 4
+           - Call the CJ Shipping Cost Calculator with product_id and cost_price
+           - Copy its "recommended_geography_pricing" (price per market, freight included)
+           - NEVER copy "estimated_geography_pricing": those markets only have placeholder
+             freight (no API key or API error); leave them out and report the tool's note
+           - For other suppliers, use an empty object
+        
         IMPORTANT: 
         - Process ALL products from Task 1, not just one
         - Use REAL numbers from the context, not placeholders
@@ -140,7 +152,8 @@ def create_pricing_strategy_task(context):
               "price_range_min": 15.99,
               "price_range_max": 24.99,
               "average_competitor_price": 20.96
-            }
+            },
+            "recommended_geography_pricing": {"US": 25.63, "EU": 27.10, "FR": 27.40, "UK": 26.90, "CA": 26.20}
           },
           "Product Name 2": { ... }
         }
@@ -53,7 +53,11 @@ def create_trend_validation_task(context):
         Validate product trends using data sources:
         
         1. Use Google Trends to check search volume and trend direction
-        2. Analyze TikTok engagement metrics (views, likes, shares)
+           (call it ONCE with all product names in "keywords", e.g.
+           {"keywords": ["LED Strip Lights", "Mini Blender"]})
+        2. Analyze TikTok momentum with TikTok Engagement Growth
+           ({"days": 7, "kind": "hashtag"}): use the stored plays_per_day growth rates,
+           do NOT re-derive growth from raw view counts
         3. Check Pinterest save/repin trends
         4. Determine if trend is Rising, Stable, or Declining
         5. Predict trend longevity (viral fad vs sustainable trend)
@@ -93,14 +97,14 @@ def create_duplicate_check_task(context):
         Look for the "product_name" field in the outputs of Task 1 (Trend Discovery).
         
         1. For EACH product from Task 1, extract the product_name
-        2. Use the DuplicateCheckerTool to check each product name
-        3. Compare product names using fuzzy matching (threshold 0.8)
-        4. Determine similarity score (0-1)
-        5. Flag duplicates if similarity >= 0.8
+        2. Call the DuplicateCheckerTool ONCE with ALL names: product_names (array of strings)
+        3. The tool compares names against the database AND against each other (threshold 0.8)
+        4. Report its similarity score (0-1) for each product
+        5. Flag duplicates if similarity >= 0.8 (existing product or earlier candidate)
         
         Steps:
         - Review the context from Task 1 (trend_task) to get all product names
-        - For each product name, call the DuplicateCheckerTool
+        - Call the DuplicateCheckerTool a single time with the full list
         - Return results for ALL products, not just one
         
         If no duplicates found, return is_duplicate: false for each product.
@@ -118,6 +122,7 @@ def create_duplicate_check_task(context):
             "is_duplicate": false,
             "existing_product_id": null,
             "similarity_score": 0.0,
+            "duplicate_of_candidate": null,
             "reason": "No duplicate found"
           },
           ...
@@ -1,15 +1,67 @@
 from crewai.tools.base_tool import BaseTool
-from typing import List, Dict, Any, Type
+from typing import List, Dict, Any, Type, Optional, Union
 from pydantic import BaseModel, Field
-import requests
 from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
+from utils import http_client
+from utils.header_profiles import headers_for
+from utils.concurrency import run_concurrently
+from utils.config import settings
+from utils.snapshot_store import record_snapshot
+import json
 import re
 
 
+def parse_aliexpress_html(html: Union[str, bytes], product_name: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    """Extrait les offres d'une page de recherche AliExpress (liste vide si rien d'exploitable)"""
+    results: List[Dict[str, Any]] = []
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Simplified parsing (AliExpress structure changes frequently)
+    product_items = soup.find_all("div", {"class": re.compile("product")})[:max_results]
+
+    for item in product_items:
+        try:
+            price_elem = item.find("span", {"class": re.compile("price")})
+            title_elem = item.find("a", {"class": re.compile("title")})
+            rating_elem = item.find("span", {"class": re.compile("rating")})
+            orders_elem = item.find("span", {"class": re.compile("order")})
+            img_elem = item.find("img")
+
+            product_url = ""
+            if title_elem and title_elem.get("href"):
+                href = title_elem.get("href")
+                if href.startswith("//"):
+                    product_url = f"https:{href}"
+                elif not href.startswith("http"):
+                    product_url = f"https://www.aliexpress.com{href}"
+                else:
+                    product_url = href
+
+            results.append(
+                {
+                    "platform": "AliExpress",
+                    "product_name": title_elem.get_text(strip=True) if title_elem else product_name,
+                    "product_url": product_url,
+                    "image_url": img_elem.get("src") if img_elem else "",
+                    "price": float(re.sub(r"[^\d.]", "", price_elem.get_text())) if price_elem else 0.0,
+                    "rating": float(rating_elem.get_text(strip=True)) if rating_elem else 0.0,
+                    "total_orders": orders_elem.get_text(strip=True) if orders_elem else "0",
+                    "supplier_name": "AliExpress Seller",
+                    "shipping_time_days": 25,
+                    "shipping_cost": 0.0,
+                }
+            )
+        except Exception as e:
+            print(f"Error parsing item: {e}")
+            continue
+
+    return results
+
+
 class AliExpressScraperInput(BaseModel):
     """Input for AliExpress Scraper"""
-    product_name: str = Field(description="Product name to search (single product name)")
+    product_name: Optional[str] = Field(default=None, description="Product name to search (single product name)")
+    product_names: Optional[List[str]] = Field(default=None, description="Several product names searched in parallel in one call")
     max_results: int = Field(default=5, description="Max products to retrieve per search")
 
 
@@ -17,16 +69,44 @@ class AliExpressScraperTool(BaseTool):
     name: str = "AliExpress Product Scraper"
     description: str = """
     Scrape AliExpress to find supplier prices, ratings, and shipping info.
-    Call this tool ONCE per product with: product_name (string) and max_results (integer, default 5).
-    Returns JSON string with product URLs, prices, supplier ratings, order counts.
-    Example: Call with product_name="Smart Home Speaker", max_results=5
+    Call this tool ONCE with ALL products: product_names (array of strings) and max_results (integer, default 5).
+    Products are searched in parallel. Returns a JSON object {product_name: [suppliers...]}
+    with product URLs, prices, supplier ratings, order counts.
+    Example: Call with product_names=["Smart Home Speaker", "LED Strip Lights"], max_results=5
+    A single product_name (string) is still accepted and returns a JSON list.
     """
     args_schema: Type[BaseModel] = AliExpressScraperInput
     
-    def _run(self, product_name: str, max_results: int = 5) -> str:
+    def _run(
+        self,
+        product_name: Optional[str] = None,
+        max_results: int = 5,
+        product_names: Optional[List[str]] = None
+    ) -> str:
         """Search AliExpress for product suppliers. Returns JSON string."""
+        if product_names:
+            if isinstance(product_names, str):
+                product_names = [product_names]
+            if product_name:
+                product_names = [product_name] + list(product_names)
+            
+            batch = run_concurrently(
+                lambda name: self._search(name, max_results),
+                product_names,
+                max_workers=settings.MAX_WORKERS,
+                on_error=lambda name, e: [{"error": str(e), "product_name": name}],
+            )
+            return json.dumps(batch, indent=2)
+        
+        if not product_name:
+            return json.dumps([{"error": "product_name or product_names is required"}])
+        
+        # Return as JSON string for CrewAI compatibility
+        return json.dumps(self._search(product_name, max_results), indent=2)
+    
+    def _search(self, product_name: str, max_results: int = 5) -> List[Dict[str, Any]]:
+        """Search AliExpress for a single product"""
         results: List[Dict[str, Any]] = []
-        ua = UserAgent()
 
         try:
             search_url = "https://www.aliexpress.com/wholesale"
@@ -36,54 +116,13 @@ class AliExpressScraperTool(BaseTool):
                 "page": 1,
             }
 
-            headers = {
-                "User-Agent": ua.random,
-                "Accept-Language": "en-US,en;q=0.9",
-            }
+            headers = headers_for(search_url)
 
-            response = requests.get(search_url, params=params, headers=headers, timeout=15)
+            response = http_client.get(search_url, params=params, headers=headers, timeout=15)
 
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, "html.parser")
-
-                # Simplified parsing (AliExpress structure changes frequently)
-                product_items = soup.find_all("div", {"class": re.compile("product")})[:max_results]
-
-                for item in product_items:
-                    try:
-                        price_elem = item.find("span", {"class": re.compile("price")})
-                        title_elem = item.find("a", {"class": re.compile("title")})
-                        rating_elem = item.find("span", {"class": re.compile("rating")})
-                        orders_elem = item.find("span", {"class": re.compile("order")})
-                        img_elem = item.find("img")
-
-                        product_url = ""
-                        if title_elem and title_elem.get("href"):
-                            href = title_elem.get("href")
-                            if href.startswith("//"):
-                                product_url = f"https:{href}"
-                            elif not href.startswith("http"):
-                                product_url = f"https://www.aliexpress.com{href}"
-                            else:
-                                product_url = href
-
-                        results.append(
-                            {
-                                "platform": "AliExpress",
-                                "product_name": title_elem.get_text(strip=True) if title_elem else product_name,
-                                "product_url": product_url,
-                                "image_url": img_elem.get("src") if img_elem else "",
-                                "price": float(re.sub(r"[^\d.]", "", price_elem.get_text())) if price_elem else 0.0,
-                                "rating": float(rating_elem.get_text(strip=True)) if rating_elem else 0.0,
-                                "total_orders": orders_elem.get_text(strip=True) if orders_elem else "0",
-                                "supplier_name": "AliExpress Seller",
-                                "shipping_time_days": 25,
-                                "shipping_cost": 0.0,
-                            }
-                        )
-                    except Exception as e:
-                        print(f"Error parsing item: {e}")
-                        continue
+                record_snapshot("aliexpress", product_name, response)
+                results.extend(parse_aliexpress_html(response.content, product_name, max_results))
 
                 # Fallback mock data
                 if not results:
@@ -107,6 +146,4 @@ class AliExpressScraperTool(BaseTool):
             print(f"Error scraping AliExpress: {e}")
             results.append({"error": str(e), "product_name": product_name})
 
-        # Return as JSON string for CrewAI compatibility
-        import json
-        return json.dumps(results, indent=2)
+        return results
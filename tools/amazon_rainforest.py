@@ -7,10 +7,56 @@ Free tier: 100 requests/month
 from crewai.tools.base_tool import BaseTool
 from typing import List, Dict, Any, Type
 from pydantic import BaseModel, Field
-import requests
+from utils import http_client
+from utils.config import settings
+from utils.snapshot_store import record_snapshot
 import os
 
 
+RAINFOREST_BASE_URL = "https://api.rainforestapi.com/request"
+
+
+def parse_rainforest_results(results: List[Dict], max_results: int) -> List[Dict[str, Any]]:
+    """Parse les search_results d'une réponse Rainforest (type=search)"""
+    parsed = []
+
+    for result in results[:max_results]:
+        # Extract price
+        price_raw = result.get("price", {})
+        if isinstance(price_raw, dict):
+            price = price_raw.get("value", 0)
+        else:
+            price = float(price_raw) if price_raw else 0
+
+        # Extract rating
+        rating_raw = result.get("rating", 0)
+        rating = float(rating_raw) if rating_raw else 0
+
+        # Extract review count
+        reviews_raw = result.get("ratings_total", 0)
+        reviews = int(reviews_raw) if reviews_raw else 0
+
+        # Build Amazon URL
+        asin = result.get("asin", "")
+        product_url = f"https://www.amazon.com/dp/{asin}" if asin else result.get("link", "")
+
+        parsed.append({
+            "platform": "Amazon",
+            "asin": asin,
+            "product_name": result.get("title", ""),
+            "product_url": product_url,
+            "price": price,
+            "rating": rating,
+            "review_count": reviews,
+            "bestseller_rank": result.get("bestseller", {}).get("rank") if result.get("bestseller") else None,
+            "prime_eligible": result.get("is_prime", False),
+            "in_stock": result.get("is_available", True),
+            "image_url": result.get("image", "")
+        })
+
+    return parsed
+
+
 class AmazonRainforestInput(BaseModel):
     """Input for Amazon search"""
     product_name: str = Field(description="Product name to search on Amazon")
@@ -32,11 +78,8 @@ class AmazonRainforestTool(BaseTool):
     Use this to analyze competitive pricing on Amazon.
     """
     args_schema: Type[BaseModel] = AmazonRainforestInput
-    
-    def __init__(self):
-        super().__init__()
-        self.api_key = os.getenv("RAINFOREST_API_KEY", "")
-        self.base_url = "https://api.rainforestapi.com/request"
+    api_key: str = Field(default_factory=lambda: os.getenv("RAINFOREST_API_KEY", ""))
+    base_url: str = RAINFOREST_BASE_URL
     
     def _run(self, product_name: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """Search Amazon via Rainforest API"""
@@ -57,13 +100,15 @@ class AmazonRainforestTool(BaseTool):
                 "max_page": "1"
             }
             
-            response = requests.get(
+            response = http_client.get(
                 self.base_url,
                 params=params,
-                timeout=15
+                timeout=15,
+                hedge=settings.HEDGE_REQUESTS
             )
             
             if response.status_code == 200:
+                record_snapshot("rainforest", product_name, response)
                 data = response.json()
                 
                 search_results = data.get("search_results", [])
@@ -92,43 +137,7 @@ class AmazonRainforestTool(BaseTool):
     
     def _parse_results(self, results: List[Dict], max_results: int) -> List[Dict[str, Any]]:
         """Parse Rainforest API response"""
-        parsed = []
-        
-        for result in results[:max_results]:
-            # Extract price
-            price_raw = result.get("price", {})
-            if isinstance(price_raw, dict):
-                price = price_raw.get("value", 0)
-            else:
-                price = float(price_raw) if price_raw else 0
-            
-            # Extract rating
-            rating_raw = result.get("rating", 0)
-            rating = float(rating_raw) if rating_raw else 0
-            
-            # Extract review count
-            reviews_raw = result.get("ratings_total", 0)
-            reviews = int(reviews_raw) if reviews_raw else 0
-            
-            # Build Amazon URL
-            asin = result.get("asin", "")
-            product_url = f"https://www.amazon.com/dp/{asin}" if asin else result.get("link", "")
-            
-            parsed.append({
-                "platform": "Amazon",
-                "asin": asin,
-                "product_name": result.get("title", ""),
-                "product_url": product_url,
-                "price": price,
-                "rating": rating,
-                "review_count": reviews,
-                "bestseller_rank": result.get("bestseller", {}).get("rank") if result.get("bestseller") else None,
-                "prime_eligible": result.get("is_prime", False),
-                "in_stock": result.get("is_available", True),
-                "image_url": result.get("image", "")
-            })
-        
-        return parsed
+        return parse_rainforest_results(results, max_results)
     
     def _mock_data(self, product_name: str, max_results: int) -> List[Dict[str, Any]]:
         """Mock data si API non dispo"""
@@ -167,11 +176,8 @@ class AmazonProductDetails(BaseTool):
     Get detailed information for a specific Amazon product by ASIN.
     Returns: full description, features, specs, review summary.
     """
-    
-    def __init__(self):
-        super().__init__()
-        self.api_key = os.getenv("RAINFOREST_API_KEY", "")
-        self.base_url = "https://api.rainforestapi.com/request"
+    api_key: str = Field(default_factory=lambda: os.getenv("RAINFOREST_API_KEY", ""))
+    base_url: str = RAINFOREST_BASE_URL
     
     def _run(self, asin: str) -> Dict[str, Any]:
         """Get product details"""
@@ -190,10 +196,11 @@ class AmazonProductDetails(BaseTool):
                 "asin": asin
             }
             
-            response = requests.get(
+            response = http_client.get(
                 self.base_url,
                 params=params,
-                timeout=15
+                timeout=15,
+                hedge=settings.HEDGE_REQUESTS
             )
             
             if response.status_code == 200:
@@ -4,15 +4,56 @@ Documentation: https://developers.cjdropshipping.com/
 """
 
 from crewai.tools.base_tool import BaseTool
-from typing import List, Dict, Any, Type
+from typing import List, Dict, Any, Type, Optional, Union
 from pydantic import BaseModel, Field
-import requests
+from models.product_models import Geography
+from utils.concurrency import run_concurrently
+from utils.config import settings
+from utils.freight_cache import FreightCache
+from utils.snapshot_store import record_snapshot
+from utils import http_client
 import os
 
 
+CJ_BASE_URL = "https://developers.cjdropshipping.com/api2.0/v1"
+
+
+def parse_cj_products(products: List[Dict]) -> List[Dict[str, Any]]:
+    """Parse la liste de produits d'une réponse CJ product/list"""
+    results = []
+
+    for product in products:
+        # Calculer coût shipping (approximatif si pas dispo)
+        shipping_cost = product.get("shippingFee", 0)
+        if not shipping_cost:
+            # Estimation basique
+            weight_kg = product.get("weight", 0.5)
+            shipping_cost = 3.5 + (weight_kg * 2)  # Base + weight
+
+        results.append({
+            "platform": "CJ Dropshipping",
+            "product_id": product.get("pid", ""),
+            "product_name": product.get("productNameEn", ""),
+            "product_url": f"https://cjdropshipping.com/product/detail/{product.get('pid', '')}",
+            "price": float(product.get("sellPrice", 0)),
+            "shipping_cost": float(shipping_cost),
+            "shipping_time_days": int(product.get("deliveryDays", 15)),
+            "stock_available": int(product.get("stockQuantity", 0)),
+            "rating": float(product.get("rating", 0)) if product.get("rating") else 4.5,
+            "total_orders": int(product.get("totalOrders", 0)),
+            "weight_kg": float(product.get("weight", 0)),
+            "image_url": product.get("productImage", ""),
+            "category": product.get("categoryName", ""),
+            "supplier_name": "CJ Dropshipping Verified"
+        })
+
+    return results
+
+
 class CJDropshippingInput(BaseModel):
     """Input for CJ Dropshipping search"""
-    product_name: str = Field(description="Product name to search")
+    product_name: Optional[str] = Field(default=None, description="Product name to search")
+    product_names: Optional[List[str]] = Field(default=None, description="Several product names searched in parallel in one call")
     max_results: int = Field(default=5, description="Max products to return")
 
 
@@ -29,16 +70,40 @@ class CJDropshippingTool(BaseTool):
     - Better supplier ratings
     
     Use this to find dropshipping suppliers for products.
+    Pass product_names (array) to search ALL products in ONE call: returns {product_name: [products...]}.
     """
     args_schema: Type[BaseModel] = CJDropshippingInput
-    
-    def __init__(self):
-        super().__init__()
-        self.api_key = os.getenv("CJ_DROPSHIPPING_API_KEY", "")
-        self.base_url = "https://developers.cjdropshipping.com/api2.0/v1"
+    api_key: str = Field(default_factory=lambda: os.getenv("CJ_DROPSHIPPING_API_KEY", ""))
+    base_url: str = CJ_BASE_URL
+        
+    def _run(
+        self,
+        product_name: Optional[str] = None,
+        max_results: int = 5,
+        product_names: Optional[List[str]] = None
+    ) -> Union[List[Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+        """Search CJ Dropshipping for products (one name, or many in parallel)"""
+        
+        if product_names:
+            if isinstance(product_names, str):
+                product_names = [product_names]
+            if product_name:
+                product_names = [product_name] + list(product_names)
+            
+            return run_concurrently(
+                lambda name: self._search(name, max_results),
+                product_names,
+                max_workers=settings.MAX_WORKERS,
+                on_error=lambda name, e: self._mock_data(name, max_results),
+            )
         
-    def _run(self, product_name: str, max_results: int = 5) -> List[Dict[str, Any]]:
-        """Search CJ Dropshipping for products"""
+        if not product_name:
+            return [{"error": "product_name or product_names is required"}]
+        
+        return self._search(product_name, max_results)
+    
+    def _search(self, product_name: str, max_results: int = 5) -> List[Dict[str, Any]]:
+        """Search CJ Dropshipping for a single product"""
         
         if not self.api_key:
             print("⚠️  CJ_DROPSHIPPING_API_KEY not configured")
@@ -60,7 +125,7 @@ class CJDropshippingTool(BaseTool):
                 "country": "US"  # Target country for shipping
             }
             
-            response = requests.post(
+            response = http_client.post(
                 endpoint,
                 json=payload,
                 headers=headers,
@@ -68,6 +133,7 @@ class CJDropshippingTool(BaseTool):
             )
             
             if response.status_code == 200:
+                record_snapshot("cj", product_name, response)
                 data = response.json()
                 
                 if data.get("code") == 200:
@@ -88,34 +154,7 @@ class CJDropshippingTool(BaseTool):
     
     def _parse_products(self, products: List[Dict]) -> List[Dict[str, Any]]:
         """Parse CJ API response"""
-        results = []
-        
-        for product in products:
-            # Calculer coût shipping (approximatif si pas dispo)
-            shipping_cost = product.get("shippingFee", 0)
-            if not shipping_cost:
-                # Estimation basique
-                weight_kg = product.get("weight", 0.5)
-                shipping_cost = 3.5 + (weight_kg * 2)  # Base + weight
-            
-            results.append({
-                "platform": "CJ Dropshipping",
-                "product_id": product.get("pid", ""),
-                "product_name": product.get("productNameEn", ""),
-                "product_url": f"https://cjdropshipping.com/product/detail/{product.get('pid', '')}",
-                "price": float(product.get("sellPrice", 0)),
-                "shipping_cost": float(shipping_cost),
-                "shipping_time_days": int(product.get("deliveryDays", 15)),
-                "stock_available": int(product.get("stockQuantity", 0)),
-                "rating": float(product.get("rating", 0)) if product.get("rating") else 4.5,
-                "total_orders": int(product.get("totalOrders", 0)),
-                "weight_kg": float(product.get("weight", 0)),
-                "image_url": product.get("productImage", ""),
-                "category": product.get("categoryName", ""),
-                "supplier_name": "CJ Dropshipping Verified"
-            })
-        
-        return results
+        return parse_cj_products(products)
     
     def _mock_data(self, product_name: str, max_results: int) -> List[Dict[str, Any]]:
         """Mock data si API non dispo"""
@@ -146,6 +185,27 @@ class CJDropshippingTool(BaseTool):
         return results
 
 
+# Pays de livraison CJ pour chaque Geography (EU = entrepôt/destination de référence DE)
+GEOGRAPHY_COUNTRY_CODES = {
+    Geography.US: "US",
+    Geography.EU: "DE",
+    Geography.FR: "FR",
+    Geography.UK: "GB",
+    Geography.CA: "CA",
+}
+
+
+class CJShippingInput(BaseModel):
+    """Input for CJ Shipping Calculator"""
+    product_id: Optional[str] = Field(default=None, description="CJ product id (pid)")
+    destination_country: str = Field(default="US", description="ISO country code")
+    quantity: int = Field(default=1, description="Units per order")
+    product_ids: Optional[List[str]] = Field(default=None, description="Several pids quoted in one call")
+    destination_countries: Optional[List[str]] = Field(default=None, description="Several destinations (default: US, DE, FR, GB, CA)")
+    cost_price: Optional[float] = Field(default=None, description="Supplier unit price: returns the retail price per geography")
+    target_margin_percent: Optional[float] = Field(default=None, description="Target margin for cost_price (default: minimum margin)")
+
+
 class CJShippingCalculator(BaseTool):
     """Calculate shipping cost for CJ products"""
     
@@ -154,27 +214,119 @@ class CJShippingCalculator(BaseTool):
     Calculate accurate shipping cost from CJ Dropshipping.
     Input: product_id, destination_country, quantity
     Returns: shipping cost, delivery time
+    Batch mode: product_ids (array) and destination_countries (array) returns
+    a freight matrix {product_id: {country: quote}} in one call.
+    Pricing mode: product_id and cost_price (optionally target_margin_percent) returns
+    recommended_geography_pricing {geography: retail price} covering freight to each market.
+    Markets without a real freight quote are listed in estimated_geography_pricing instead (with a note).
+    Quotes are cached locally, repeated lookups cost no API call.
     """
-    
-    def __init__(self):
-        super().__init__()
-        self.api_key = os.getenv("CJ_DROPSHIPPING_API_KEY", "")
-        self.base_url = "https://developers.cjdropshipping.com/api2.0/v1"
+    args_schema: Type[BaseModel] = CJShippingInput
+    api_key: str = Field(default_factory=lambda: os.getenv("CJ_DROPSHIPPING_API_KEY", ""))
+    base_url: str = CJ_BASE_URL
     
     def _run(
         self,
-        product_id: str,
+        product_id: Optional[str] = None,
         destination_country: str = "US",
+        quantity: int = 1,
+        product_ids: Optional[List[str]] = None,
+        destination_countries: Optional[List[str]] = None,
+        cost_price: Optional[float] = None,
+        target_margin_percent: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Calculate shipping (single quote, freight matrix or retail price per geography)"""
+        
+        if cost_price is not None:
+            if not product_id:
+                return {"error": "product_id is required with cost_price"}
+            try:
+                pricing = self.geography_pricing(product_id, cost_price, quantity, target_margin_percent)
+            except ValueError as e:
+                return {"error": str(e)}
+            return {"product_id": product_id, "cost_price": cost_price, **pricing}
+        
+        if product_ids or destination_countries:
+            pids = list(product_ids or [])
+            if product_id:
+                pids.insert(0, product_id)
+            countries = destination_countries or list(GEOGRAPHY_COUNTRY_CODES.values())
+            return self.quote_matrix(pids, countries, quantity)
+        
+        if not product_id:
+            return {"error": "product_id or product_ids is required"}
+        
+        return self.quote_matrix([product_id], [destination_country], quantity)[product_id][destination_country]
+    
+    def quote_matrix(
+        self,
+        product_ids: List[str],
+        countries: List[str],
         quantity: int = 1
+    ) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Devis produits × destinations: cache d'abord, puis appels API concurrents (bornés) pour le reste"""
+        cache = FreightCache()
+        keys = [(pid, country) for pid in dict.fromkeys(product_ids) for country in dict.fromkeys(countries)]
+        
+        quotes = cache.get_many(keys, quantity)
+        missing = [key for key in keys if key not in quotes]
+        
+        if missing:
+            fetched = run_concurrently(
+                lambda key: self._quote(key[0], key[1], quantity),
+                missing,
+                max_workers=settings.MAX_WORKERS,
+                on_error=lambda key, e: self._fallback_quote(f"Estimation (error: {e})"),
+            )
+            for (pid, country), quote in fetched.items():
+                if not quote.get("is_estimate"):
+                    cache.put(pid, country, quantity, quote)
+                quotes[(pid, country)] = quote
+        
+        matrix: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for pid, country in keys:
+            matrix.setdefault(pid, {})[country] = quotes[(pid, country)]
+        return matrix
+    
+    def geography_pricing(
+        self,
+        product_id: str,
+        cost_price: float,
+        quantity: int = 1,
+        target_margin_percent: float = None
     ) -> Dict[str, Any]:
-        """Calculate shipping"""
+        """
+        Prix de vente par Geography à partir du fret en cache (PricingStrategy.recommended_geography_pricing).
+        prix = (coût produit + fret) / (1 - marge cible)
+        Les marchés sans devis réel (pas de clé API, erreur) sont mis à part dans
+        estimated_geography_pricing, avec la note du devis: jamais dans recommended_geography_pricing.
+        """
+        margin = (target_margin_percent if target_margin_percent is not None else settings.MIN_PROFIT_MARGIN_PERCENT) / 100
+        if not 0 <= margin < 1:
+            raise ValueError(f"target_margin_percent must be in [0, 100), got {margin * 100:g}")
+        freight = self.quote_matrix([product_id], list(GEOGRAPHY_COUNTRY_CODES.values()), quantity)[product_id]
+        
+        recommended, estimated, notes = {}, {}, []
+        for geography, country in GEOGRAPHY_COUNTRY_CODES.items():
+            quote = freight[country]
+            price = round((cost_price + quote["shipping_cost"]) / (1 - margin), 2)
+            if quote.get("is_estimate"):
+                estimated[geography.value] = price
+                notes.append(quote["note"])
+            else:
+                recommended[geography.value] = price
+        
+        pricing = {"recommended_geography_pricing": recommended}
+        if estimated:
+            pricing["estimated_geography_pricing"] = estimated
+            pricing["note"] = "Placeholder freight, not a real quote: " + "; ".join(dict.fromkeys(notes))
+        return pricing
+    
+    def _quote(self, product_id: str, destination_country: str, quantity: int) -> Dict[str, Any]:
+        """Un appel freightCalculate (pid -> pays)"""
         
         if not self.api_key:
-            return {
-                "shipping_cost": 4.99,
-                "delivery_days": 12,
-                "note": "Mock data - Configure CJ_DROPSHIPPING_API_KEY"
-            }
+            return self._fallback_quote("Mock data - Configure CJ_DROPSHIPPING_API_KEY")
         
         try:
             endpoint = f"{self.base_url}/logistic/freightCalculate"
@@ -195,7 +347,7 @@ class CJShippingCalculator(BaseTool):
                 "endCountry": destination_country
             }
             
-            response = requests.post(
+            response = http_client.post(
                 endpoint,
                 json=payload,
                 headers=headers,
@@ -205,8 +357,13 @@ class CJShippingCalculator(BaseTool):
             if response.status_code == 200:
                 data = response.json()
                 
+                freights = []
                 if data.get("code") == 200:
-                    freight = data.get("data", {}).get("list", [{}])[0]
+                    freights = (data.get("data") or {}).get("list") or []
+                
+                # Réponse sans montant de fret: estimation, pas un devis à 0 mis en cache comme réel
+                if freights and freights[0].get("freight") is not None:
+                    freight = freights[0]
                     
                     return {
                         "shipping_cost": float(freight.get("freight", 0)),
@@ -215,19 +372,21 @@ class CJShippingCalculator(BaseTool):
                     }
             
             # Fallback
-            return {
-                "shipping_cost": 4.99,
-                "delivery_days": 12,
-                "note": "Estimation (API error)"
-            }
+            return self._fallback_quote("Estimation (API error)")
             
         except Exception as e:
             print(f"❌ Shipping calc error: {e}")
-            return {
-                "shipping_cost": 4.99,
-                "delivery_days": 12,
-                "note": "Estimation (error)"
-            }
+            return self._fallback_quote("Estimation (error)")
+    
+    @staticmethod
+    def _fallback_quote(note: str) -> Dict[str, Any]:
+        """Estimation forfaitaire: marquée is_estimate, jamais mise en cache ni utilisée comme prix recommandé"""
+        return {
+            "shipping_cost": 4.99,
+            "delivery_days": 12,
+            "is_estimate": True,
+            "note": note
+        }
 
 
 if __name__ == "__main__":
@@ -1,54 +1,98 @@
 from crewai.tools.base_tool import BaseTool
-from typing import Dict, Any, Type
+from typing import Dict, Any, List, Optional, Type, Union
 from pydantic import BaseModel, Field
-from utils.database import ProductDatabase
+from utils.database import ProductDatabase, record_run_products
 from utils.config import settings
-from difflib import SequenceMatcher
 
 
 class DuplicateCheckerInput(BaseModel):
     """Input for Duplicate Checker"""
-    product_name: str = Field(description="Product name to check")
+    product_name: Optional[str] = Field(default=None, description="Product name to check")
+    product_names: Optional[List[str]] = Field(default=None, description="Several product names checked in one call")
     threshold: float = Field(default=0.8, description="Similarity threshold (0-1)")
 
 
 class DuplicateCheckerTool(BaseTool):
     name: str = "Duplicate Product Checker"
     description: str = """
-    Check if a product already exists in the database.
-    Uses fuzzy matching to detect similar product names.
-    Returns duplicate check result with similarity score.
+    Check if products already exist in the database.
+    Uses fuzzy matching and name embeddings to detect similar product names
+    (e.g. "LED Strip Lights RGB 5M" vs "Color Changing LED Light Strip").
+
+    Call ONCE with: product_names (array of strings), threshold (number, default 0.8).
+    Returns one result per product, in the same order: product_name, is_duplicate,
+    existing_product_id, similarity_score, duplicate_of_candidate (earlier name of the
+    same list it duplicates, or null), related_products (full-text search) and reason.
     """
     args_schema: Type[BaseModel] = DuplicateCheckerInput
     
-    def _run(self, product_name: str, threshold: float = 0.8) -> Dict[str, Any]:
-        """Check for duplicate products in database"""
+    def _run(
+        self,
+        product_name: Optional[str] = None,
+        product_names: Optional[List[str]] = None,
+        threshold: float = 0.8
+    ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        """Check for duplicate products in database (and within the batch)"""
+        names = list(product_names or [])
+        if isinstance(product_names, str):
+            names = [product_names]
+        if product_name:
+            names.insert(0, product_name)
+        if not names:
+            return {"error": "product_name or product_names is required"}
+
         try:
             db = ProductDatabase(settings.DATABASE_PATH)
-            existing_product = db.check_duplicate_by_name(product_name, threshold)
-
-            if existing_product:
-                similarity = SequenceMatcher(
-                    None, product_name.lower(), existing_product.name.lower()
-                ).ratio()
-
-                return {
-                    "is_duplicate": True,
-                    "existing_product_id": existing_product.id,
-                    "similarity_score": similarity,
-                    "reason": f"Product '{product_name}' is similar to existing product '{existing_product.name}' (similarity: {similarity:.2%})",
-                }
-            else:
-                return {
-                    "is_duplicate": False,
-                    "existing_product_id": None,
-                    "similarity_score": 0.0,
-                    "reason": f"No duplicate found for '{product_name}'",
-                }
-
+            checks = db.find_duplicates_batch(names, threshold, limit=1)
+            results = [self._result(db, names, check) for check in checks]
         except Exception as e:
+            results = [
+                {"product_name": name, "is_duplicate": False, "error": str(e), "reason": f"Error checking duplicates: {e}"}
+                for name in names
+            ]
+
+        # Appel historique avec un seul nom: résultat unique, pas de liste
+        return results[0] if product_name and not product_names else results
+
+    def _result(self, db: ProductDatabase, names: List[str], check: Dict[str, Any]) -> Dict[str, Any]:
+        name = check["name"]
+        duplicate_of = names[check["batch_duplicate_of"]] if check["batch_duplicate_of"] is not None else None
+
+        if check["duplicates"]:
+            existing = check["duplicates"][0]
+            record_run_products([existing["product_id"]])
             return {
-                "is_duplicate": False,
-                "error": str(e),
-                "reason": f"Error checking duplicates: {e}",
+                "product_name": name,
+                "is_duplicate": True,
+                "existing_product_id": existing["product_id"],
+                "similarity_score": existing["similarity"],
+                "lexical_similarity": existing["lexical_similarity"],
+                "semantic_similarity": existing.get("semantic_similarity"),
+                "duplicate_of_candidate": duplicate_of,
+                "reason": f"Product '{name}' is similar to existing product '{existing['name']}' "
+                          f"({existing['match']} match, similarity: {existing['similarity']:.2%})",
             }
+
+        if duplicate_of:
+            return {
+                "product_name": name,
+                "is_duplicate": True,
+                "existing_product_id": None,
+                "similarity_score": check["batch_similarity"],
+                "duplicate_of_candidate": duplicate_of,
+                "reason": f"Product '{name}' is similar to candidate '{duplicate_of}' checked in the same batch "
+                          f"(similarity: {check['batch_similarity']:.2%})",
+            }
+
+        related = db.search_products(name, limit=3)
+        return {
+            "product_name": name,
+            "is_duplicate": False,
+            "existing_product_id": None,
+            "similarity_score": 0.0,
+            "duplicate_of_candidate": None,
+            "related_products": [
+                {"id": r["id"], "name": r["name"], "similarity": r["similarity"]} for r in related
+            ],
+            "reason": f"No duplicate found for '{name}'",
+        }
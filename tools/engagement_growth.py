@@ -0,0 +1,35 @@
+from crewai.tools.base_tool import BaseTool
+from typing import List, Dict, Any, Type
+from pydantic import BaseModel, Field
+from utils.engagement_history import EngagementHistory
+
+
+class EngagementGrowthInput(BaseModel):
+    """Input for TikTok Engagement Growth"""
+    days: float = Field(default=7, description="Look-back window in days")
+    kind: str = Field(default="hashtag", description="'hashtag' or 'video'")
+    limit: int = Field(default=10, description="Number of results")
+
+
+class EngagementGrowthTool(BaseTool):
+    name: str = "TikTok Engagement Growth"
+    description: str = """
+    Fastest-growing TikTok hashtags or videos over the last N days, computed from the
+    engagement snapshots stored at every run (no API call).
+    Each result has plays_per_day, likes_per_day and shares_per_day measured between the
+    first and last snapshot of the window; hashtags also show first/last video counts.
+    Use these growth rates to judge trend momentum instead of raw view counts.
+    Example: {"days": 7, "kind": "hashtag", "limit": 10}
+    """
+    args_schema: Type[BaseModel] = EngagementGrowthInput
+
+    def _run(self, days: float = 7, kind: str = "hashtag", limit: int = 10) -> List[Dict[str, Any]]:
+        """Query the engagement history"""
+        try:
+            results = EngagementHistory().fastest_growing(days=days, kind=kind, limit=limit)
+        except ValueError as e:
+            return [{"error": str(e)}]
+
+        if not results:
+            return [{"note": f"Not enough history yet: growth needs at least two runs within {days:g} days"}]
+        return results
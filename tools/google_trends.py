@@ -1,12 +1,77 @@
 from crewai.tools.base_tool import BaseTool
-from typing import Dict, Any, Type
+from typing import Dict, Any, Type, List, Optional, Tuple
 from pydantic import BaseModel, Field
 from pytrends.request import TrendReq
+from datetime import date, timedelta
+from utils.circuit_breaker import guard
+from utils.trends_store import TrendsStore
+import pandas as pd
+import re
+import threading
+
+
+MAX_KEYWORDS_PER_PAYLOAD = 5  # Limite Google Trends par requête (ancre comprise)
+MAX_DAILY_WINDOW_DAYS = 269  # Au-delà, Google renvoie des points hebdomadaires
+OVERLAP_DAYS = 14  # Jours re-téléchargés pour recaler la queue sur la série stockée
+
+# Une seule session pytrends (cookies + connexions réutilisés), pytrends n'est pas thread-safe
+_pytrends: Optional[TrendReq] = None
+_pytrends_lock = threading.Lock()
+
+
+def _get_pytrends() -> TrendReq:
+    global _pytrends
+    if _pytrends is None:
+        _pytrends = TrendReq(hl="en-US", tz=360)
+    return _pytrends
+
+
+def _daily_window_days(timeframe: str) -> Optional[int]:
+    """'today 3-m' -> 90. None si la fenêtre n'est pas en points quotidiens (stockage impossible)"""
+    match = re.fullmatch(r"today (\d+)-([my])", timeframe.strip())
+    if not match:
+        return None
+    days = int(match.group(1)) * (30 if match.group(2) == "m" else 365)
+    return days if days <= MAX_DAILY_WINDOW_DAYS else None
+
+
+def _chunks(items: List[str], size: int) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _summarize(keyword: str, values: List[float], rising_queries: List[str], timeframe: str, geo: str) -> Dict[str, Any]:
+    avg_interest = 0
+    trend_direction = "Stable"
+
+    if values:
+        avg_interest = int(sum(values) / len(values))
+
+        recent = sum(values[-4:]) / len(values[-4:])
+        older = sum(values[:4]) / len(values[:4])
+
+        if recent > older * 1.2:
+            trend_direction = "Rising"
+        elif recent < older * 0.8:
+            trend_direction = "Declining"
+
+    return {
+        "keyword": keyword,
+        "average_interest": avg_interest,
+        "trend_direction": trend_direction,
+        "rising_queries": rising_queries,
+        "timeframe": timeframe,
+        "geo": geo or "Worldwide",
+    }
 
 
 class GoogleTrendsInput(BaseModel):
     """Input for Google Trends"""
-    keyword: str = Field(description="Keyword to analyze")
+    keyword: Optional[str] = Field(default=None, description="Keyword to analyze")
+    keywords: Optional[List[str]] = Field(default=None, description="Several keywords analyzed in one call")
+    anchor_keyword: Optional[str] = Field(
+        default=None,
+        description="Reference keyword added to every request so keywords are fetched 4 at a time on one common scale"
+    )
     timeframe: str = Field(default="today 3-m", description="Time frame")
     geo: str = Field(default="", description="Geography code (US, FR, etc)")
 
@@ -16,46 +81,159 @@ class GoogleTrendsTool(BaseTool):
     description: str = """
     Analyze keyword trends on Google Trends.
     Returns trend score, related queries, rising trends.
+    Pass keywords (array) to analyze all products in ONE call: returns {keyword: result}.
+    Each keyword is queried on its own scale, unless anchor_keyword is given (a broad term
+    such as the niche name): keywords are then compared 4 at a time against it.
     Use this to validate product demand and trend direction.
     """
     args_schema: Type[BaseModel] = GoogleTrendsInput
-    
-    def _run(self, keyword: str, timeframe: str = "today 3-m", geo: str = "") -> Dict[str, Any]:
-        """Analyze Google Trends for keyword"""
-        try:
-            pytrends = TrendReq(hl="en-US", tz=360)
-            pytrends.build_payload([keyword], cat=0, timeframe=timeframe, geo=geo)
 
+    def _run(
+        self,
+        keyword: Optional[str] = None,
+        timeframe: str = "today 3-m",
+        geo: str = "",
+        keywords: Optional[List[str]] = None,
+        anchor_keyword: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Analyze Google Trends for one or several keywords"""
+        names = list(keywords or [])
+        if keyword:
+            names.insert(0, keyword)
+        names = list(dict.fromkeys(k.strip() for k in names if k and k.strip()))
+        if not names:
+            return {"error": "keyword or keywords is required"}
+
+        anchor = anchor_keyword.strip() if anchor_keyword and anchor_keyword.strip() else None
+        window_days = _daily_window_days(timeframe)
+        if window_days is None:
+            results = self._fetch_direct(names, timeframe, geo, anchor)
+        else:
+            results = self._fetch_incremental(names, window_days, timeframe, geo, anchor)
+
+        if keyword and not keywords:
+            return results[names[0]]
+        return results
+
+    def _fetch_payload(self, batch: List[str], timeframe: str, geo: str):
+        """Un build_payload pour <= 5 mots-clés: (interest_over_time, related_queries)"""
+        with _pytrends_lock, guard("trends.google.com"):
+            pytrends = _get_pytrends()
+            pytrends.build_payload(batch, cat=0, timeframe=timeframe, geo=geo)
             interest_df = pytrends.interest_over_time()
+            related = pytrends.related_queries()
 
-            avg_interest = 0
-            trend_direction = "Stable"
+        if not interest_df.empty and "isPartial" in interest_df.columns:
+            interest_df = interest_df[~interest_df["isPartial"].astype(bool)]
+        return interest_df, related
 
-            if not interest_df.empty and keyword in interest_df.columns:
-                avg_interest = int(interest_df[keyword].mean())
+    @staticmethod
+    def _rising(related: Dict[str, Any], keyword: str) -> List[str]:
+        if keyword in related and related[keyword]["rising"] is not None:
+            return related[keyword]["rising"]["query"].head(5).tolist()
+        return []
 
-                recent = interest_df[keyword].iloc[-4:].mean()
-                older = interest_df[keyword].iloc[:4].mean()
+    def _fetch_series(
+        self, names: List[str], timeframe: str, geo: str, anchor: Optional[str] = None
+    ) -> Dict[str, Tuple[Optional[pd.Series], List[str], Optional[str]]]:
+        """
+        {mot-clé: (série d'intérêt, rising queries, erreur)}.
 
-                if recent > older * 1.2:
-                    trend_direction = "Rising"
-                elif recent < older * 0.8:
-                    trend_direction = "Declining"
+        Google Trends met chaque payload à l'échelle 0-100 de son mot-clé le plus recherché:
+        des mots-clés sans rapport groupés ensemble écrasent les plus faibles vers 0. Sans ancre,
+        un payload par mot-clé (chacun sur sa propre échelle). Avec ancre, elle est ajoutée à
+        chaque payload de 4 mots-clés: chaque payload est recalé sur la moyenne de l'ancre du
+        premier, puis l'ensemble est remis sur 0-100 (comme un payload unique).
+        """
+        if anchor:
+            others = [name for name in names if name != anchor]
+            batches = [batch + [anchor] for batch in _chunks(others, MAX_KEYWORDS_PER_PAYLOAD - 1)] or [[anchor]]
+        else:
+            batches = [[name] for name in names]
 
-            related = pytrends.related_queries()
-            rising_queries = []
-
-            if keyword in related and related[keyword]["rising"] is not None:
-                rising_queries = related[keyword]["rising"]["query"].head(5).tolist()
-
-            return {
-                "keyword": keyword,
-                "average_interest": avg_interest,
-                "trend_direction": trend_direction,
-                "rising_queries": rising_queries,
-                "timeframe": timeframe,
-                "geo": geo or "Worldwide",
-            }
-
-        except Exception as e:
-            return {"error": str(e), "keyword": keyword}
+        fetched: Dict[str, Tuple[Optional[pd.Series], List[str], Optional[str]]] = {}
+        reference = None  # Moyenne de l'ancre dans le premier payload
+        for batch in batches:
+            try:
+                interest_df, related = self._fetch_payload(batch, timeframe, geo)
+            except Exception as e:
+                for kw in batch:
+                    fetched.setdefault(kw, (None, [], str(e)))
+                continue
+
+            scale = 1.0
+            if anchor:
+                anchor_mean = float(interest_df[anchor].mean()) if not interest_df.empty and anchor in interest_df.columns else 0.0
+                if anchor_mean <= 0:
+                    for kw in batch:
+                        fetched.setdefault(kw, (None, [], f"No interest for anchor keyword '{anchor}', cannot rescale"))
+                    continue
+                reference = reference or anchor_mean
+                scale = reference / anchor_mean
+
+            for kw in batch:
+                values = interest_df[kw].astype(float) * scale if not interest_df.empty and kw in interest_df.columns else None
+                fetched[kw] = (values, self._rising(related, kw), None)
+
+        if anchor:
+            peak = max((values.max() for values, _, _ in fetched.values() if values is not None and len(values)), default=0)
+            if peak > 0:
+                fetched = {
+                    kw: (values * (100 / peak) if values is not None else None, rising, error)
+                    for kw, (values, rising, error) in fetched.items()
+                }
+        return fetched
+
+    def _fetch_direct(self, names: List[str], timeframe: str, geo: str, anchor: Optional[str] = None) -> Dict[str, Any]:
+        """Fenêtres non quotidiennes: requête complète, sans stockage"""
+        fetched = self._fetch_series(names, timeframe, geo, anchor)
+        results: Dict[str, Any] = {}
+        for kw in names:
+            values, rising, error = fetched[kw]
+            if error:
+                results[kw] = {"error": error, "keyword": kw}
+            else:
+                results[kw] = _summarize(kw, values.tolist() if values is not None else [], rising, timeframe, geo)
+        return results
+
+    def _fetch_incremental(
+        self, names: List[str], window_days: int, timeframe: str, geo: str, anchor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Ne télécharge que la queue manquante de chaque série, puis calcule tout depuis le stockage"""
+        store = TrendsStore()
+        today = date.today()
+        window_start = today - timedelta(days=window_days)
+
+        # Regrouper les mots-clés par date de début de téléchargement
+        to_fetch: Dict[date, List[str]] = {}
+        for kw in names:
+            last = store.last_day(kw, geo)
+            if last and last >= today - timedelta(days=1):
+                continue  # Série à jour (le jour courant est toujours partiel)
+            fetch_from = max(window_start, last - timedelta(days=OVERLAP_DAYS)) if last else window_start
+            to_fetch.setdefault(fetch_from, []).append(kw)
+
+        errors: Dict[str, str] = {}
+        for fetch_from, group in to_fetch.items():
+            fetched = self._fetch_series(group, f"{fetch_from.isoformat()} {today.isoformat()}", geo, anchor)
+            for kw in group:
+                values, rising, error = fetched[kw]
+                if error:
+                    errors[kw] = error
+                    continue
+                if values is not None:
+                    store.merge_series(kw, geo, {ts.date(): float(value) for ts, value in values.items()})
+                store.save_rising_queries(kw, geo, rising)
+
+        results: Dict[str, Any] = {}
+        for kw in names:
+            series = store.series(kw, geo, window_start)
+            if not series and kw in errors:
+                results[kw] = {"error": errors[kw], "keyword": kw}
+                continue
+
+            result = _summarize(kw, [value for _, value in series], store.rising_queries(kw, geo), timeframe, geo)
+            if kw in errors:
+                result["warning"] = f"Stored data only, refresh failed: {errors[kw]}"
+            results[kw] = result
+        return results
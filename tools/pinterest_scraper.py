@@ -1,12 +1,54 @@
 from crewai.tools.base_tool import BaseTool
 from typing import List, Dict, Any, Type
+from urllib.parse import quote
 from pydantic import BaseModel, Field
-import requests
+from utils import http_client
+from utils.header_profiles import headers_for
+from utils.browser_pool import get_browser_pool
+from utils.snapshot_store import record_snapshot
 from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
+import re
 import time
 
 
+PINTEREST_BASE_URL = "https://www.pinterest.com"
+PIN_LINK_SELECTOR = 'a[href*="/pin/"]'
+MAX_CONCURRENT_PAGES = 3
+
+
+def parse_pinterest_html(html: str, keyword: str, max_pins: int, base_url: str = PINTEREST_BASE_URL) -> List[Dict[str, Any]]:
+    """Extrait les pins (id, titre, image) d'une page de recherche Pinterest rendue"""
+    soup = BeautifulSoup(html, "html.parser")
+    pins: List[Dict[str, Any]] = []
+    seen = set()
+
+    for link in soup.select(PIN_LINK_SELECTOR):
+        match = re.search(r"/pin/(\d+)", link.get("href", ""))
+        if not match or match.group(1) in seen:
+            continue
+
+        img = link.find("img")
+        title = (img.get("alt") if img else "") or link.get("aria-label", "")
+        if not title.strip():
+            continue  # Pas de texte = pas de produit exploitable
+
+        pin_id = match.group(1)
+        seen.add(pin_id)
+        pins.append({
+            "platform": "Pinterest",
+            "url": f"{base_url}/pin/{pin_id}/",
+            "pin_id": pin_id,
+            "title": title.strip(),
+            "image_url": img.get("src", "") if img else "",
+            "keyword": keyword,
+            "engagement": 0,  # Compteurs de saves absents des pages de recherche
+        })
+        if len(pins) >= max_pins:
+            break
+
+    return pins
+
+
 class PinterestScraperInput(BaseModel):
     """Input for Pinterest Scraper"""
     keywords: List[str] = Field(description="Keywords to search on Pinterest")
@@ -17,40 +59,66 @@ class PinterestScraperTool(BaseTool):
     name: str = "Pinterest Trend Scraper"
     description: str = """
     Scrape Pinterest to find trending products based on keywords.
-    
+
     IMPORTANT: Call this tool with a SINGLE dictionary object containing:
     - keywords: array of strings (e.g., ["home gadgets", "beauty products"])
     - max_pins: integer (default: 5)
-    
+
     Example correct usage:
     {"keywords": ["home gadgets", "beauty products"], "max_pins": 5}
-    
-    Returns pin URLs, save counts, repins.
+
+    Returns pin URLs, titles and images.
     Use this to identify popular products on Pinterest.
     """
     args_schema: Type[BaseModel] = PinterestScraperInput
-    
+    base_url: str = PINTEREST_BASE_URL
+
     def _run(self, keywords: List[str] = None, max_pins: int = 5) -> List[Dict[str, Any]]:
         """Search Pinterest for trending products"""
         # Validation
         if not keywords:
             return [{"error": "Keywords are required. Provide a list of keywords to search."}]
-        
+
         if not isinstance(keywords, list):
             keywords = [str(keywords)]
-        
+
+        keywords = keywords[:3]
+        search_urls = {keyword: f"{self.base_url}/search/pins/?q={quote(keyword)}" for keyword in keywords}
+
+        try:
+            pages = get_browser_pool(max_pages=MAX_CONCURRENT_PAGES).fetch_many(
+                list(search_urls.values()),
+                wait_for_selector=PIN_LINK_SELECTOR,
+                scrolls=1 if max_pins > 10 else 0,
+            )
+        except Exception as e:
+            print(f"Pinterest browser pool unavailable, falling back to plain HTTP: {e}")
+            return self._run_without_browser(search_urls, max_pins)
+
         results: List[Dict[str, Any]] = []
-        ua = UserAgent()
+        for keyword, search_url in search_urls.items():
+            html = pages.get(search_url)
+            if isinstance(html, Exception) or not html:
+                print(f"Error scraping Pinterest for '{keyword}': {html}")
+                continue
+            record_snapshot("pinterest", keyword, html)
+            results.extend(parse_pinterest_html(html, keyword, max_pins, self.base_url))
+
+        return results if results else [{"error": "No Pinterest data found"}]
 
-        for keyword in keywords[:3]:
+    def _run_without_browser(self, search_urls: Dict[str, str], max_pins: int) -> List[Dict[str, Any]]:
+        """Sans Playwright: HTML statique (souvent vide de pins), sinon URL de recherche uniquement"""
+        results: List[Dict[str, Any]] = []
+
+        for keyword, search_url in search_urls.items():
             try:
-                search_url = f"https://www.pinterest.com/search/pins/?q={keyword.replace(' ', '%20')}"
-                headers = {"User-Agent": ua.random}
-                response = requests.get(search_url, headers=headers, timeout=10)
+                headers = headers_for(search_url)
+                response = http_client.get(search_url, headers=headers, timeout=10)
 
                 if response.status_code == 200:
-                    BeautifulSoup(response.content, "html.parser")  # structure non utilisée ici
-                    results.append(
+                    record_snapshot("pinterest", keyword, response)
+                    pins = parse_pinterest_html(response.text, keyword, max_pins, self.base_url)
+                    results.extend(pins or [
                         {
                             "platform": "Pinterest",
                             "url": search_url,
@@ -58,7 +126,7 @@ class PinterestScraperTool(BaseTool):
                             "engagement": 0,
                             "note": "Pinterest requires browser automation for full data",
                         }
-                    )
+                    ])
 
                 time.sleep(2)
 
@@ -67,3 +135,30 @@ class PinterestScraperTool(BaseTool):
                 continue
 
         return results if results else [{"error": "No Pinterest data found"}]
+
+
+if __name__ == "__main__":
+    # Test contre la fixture locale servie par un serveur HTTP de substitution
+    from functools import partial
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+    from pathlib import Path
+    import threading
+
+    fixture_dir = Path(__file__).resolve().parent.parent / "fixtures" / "v1" / "pinterest"
+
+    class FixtureHandler(SimpleHTTPRequestHandler):
+        def translate_path(self, path):
+            return str(fixture_dir / "search.html")  # Toute recherche renvoie la fixture
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=str(fixture_dir)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    tool = PinterestScraperTool(base_url=f"http://127.0.0.1:{server.server_port}")
+    print("🧪 Testing Pinterest Scraper against local fixture...")
+    for pin in tool._run(["home gadgets", "kitchen"], max_pins=10):
+        print(f"  - [{pin.get('keyword')}] {pin.get('title')} -> {pin.get('url')}")
+
+    server.shutdown()
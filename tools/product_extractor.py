@@ -3,32 +3,80 @@ Outil d'extraction de produits depuis descriptions TikTok
 Utilise le LLM local pour identifier le produit réel dans une vidéo/description
 """
 
+import json
 from crewai.tools.base_tool import BaseTool
-from typing import Dict, Any, Type
-from pydantic import BaseModel, Field
-from utils.llm import get_ollama_llm
-import re
+from typing import Dict, Any, Type, List, Optional
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from utils.llm import get_ollama_llm, CrewOllamaLLM
+from models.product_models import ProductCategory
+from utils.category_classifier import coerce_category, get_category_classifier
+from utils.product_lexicon import get_product_lexicon, ProductMatch, MIN_CONFIDENCE
+
+
+LLM_BATCH_SIZE = 10  # Textes par appel LLM (au-delà, le modèle local mélange les index)
+LLM_MAX_ATTEMPTS = 2  # 1 appel + 1 relance des seuls items invalides / manquants
+VIDEO_TEXT_MAX_CHARS = 400  # Titre + description + hashtags tronqués dans le prompt
+
+_llm: Optional[CrewOllamaLLM] = None
+
+
+def _get_llm() -> CrewOllamaLLM:
+    """LLM partagé par toutes les extractions du process (créé au premier besoin)"""
+    global _llm
+    if _llm is None:
+        _llm = get_ollama_llm()
+    return _llm
+
+
+class VideoText(BaseModel):
+    title: str = Field(default="", description="Titre de la vidéo TikTok")
+    description: str = Field(default="", description="Description complète")
+    hashtags: str = Field(default="", description="Hashtags de la vidéo")
+
+    def full_text(self) -> str:
+        return f"{self.title}. {self.description}. {self.hashtags}"
+
+
+class ExtractedProduct(BaseModel):
+    """Un élément de la réponse LLM, validé individuellement"""
+    index: int
+    product_name: str
+    category: str = ProductCategory.OTHER.value
+    description: str = ""
+    keywords: List[str] = Field(default_factory=list)
+
+    @field_validator("product_name")
+    @classmethod
+    def _known_product(cls, value: str) -> str:
+        value = value.strip()
+        if not value or value.lower() in ("unknown product", "unknown", "n/a", "none"):
+            raise ValueError("no product identified")
+        return value
 
 
 class ProductExtractorInput(BaseModel):
-    video_title: str = Field(description="Titre de la vidéo TikTok")
+    video_title: str = Field(default="", description="Titre de la vidéo TikTok")
     video_description: str = Field(default="", description="Description complète")
     hashtags: str = Field(default="", description="Hashtags de la vidéo")
+    videos: Optional[List[VideoText]] = Field(
+        default=None, description="Several videos (title, description, hashtags) extracted in one call"
+    )
 
 
 class ProductExtractorTool(BaseTool):
     name: str = "Product Extractor from TikTok"
     description: str = """
-    Extrait le nom du produit RÉEL depuis une vidéo TikTok.
+    Extrait le nom du produit RÉEL depuis une ou plusieurs vidéos TikTok.
     
-    Input: Titre vidéo + description + hashtags
-    Output: Nom produit structuré, catégorie, description
+    Input: Titre vidéo + description + hashtags, OU videos: [{title, description, hashtags}, ...]
+    (préférer videos: toutes les vidéos en UN appel)
+    Output: Nom produit structuré, catégorie, description (une liste, dans l'ordre, avec videos)
     
     Exemple:
     Input: "DIY Home Hacks - These LED lights changed my room! 🔥 #tiktokmakemebuyit #ledlights"
     Output: {
         "product_name": "LED Strip Lights",
-        "category": "Home & Garden",
+        "category": "home_garden",
         "description": "Color-changing LED strips for room decoration"
     }
     """
@@ -36,111 +84,150 @@ class ProductExtractorTool(BaseTool):
     
     def _run(
         self,
-        video_title: str,
+        video_title: str = "",
         video_description: str = "",
-        hashtags: str = ""
-    ) -> Dict[str, Any]:
-        """Extrait produit depuis contenu TikTok"""
+        hashtags: str = "",
+        videos: Optional[List[Any]] = None
+    ):
+        """Extrait produit depuis contenu TikTok (une vidéo -> dict, videos -> liste alignée)"""
+        
+        if videos:
+            items = [v if isinstance(v, VideoText) else VideoText.model_validate(v) for v in videos]
+            return self.extract_batch([item.full_text() for item in items])
         
         # Combiner toutes les infos
-        full_text = f"{video_title}. {video_description}. {hashtags}"
-        
-        # Patterns communs de produits
-        product_patterns = [
-            r"(?:LED|RGB)\s+(?:strip|lights?|bulbs?)",
-            r"(?:wireless|bluetooth)\s+(?:earbuds|headphones|speaker)",
-            r"(?:portable|mini)\s+(?:blender|fan|humidifier)",
-            r"(?:magnetic|suction)\s+(?:phone\s+)?holder",
-            r"(?:car|desk|phone)\s+(?:mount|stand|organizer)",
-            r"(?:smart|mini|portable)\s+\w+",
-        ]
-        
-        # Essayer regex d'abord
-        for pattern in product_patterns:
-            match = re.search(pattern, full_text, re.IGNORECASE)
-            if match:
-                product_name = match.group(0).title()
-                return self._structure_product(product_name, full_text)
+        return self.extract_batch([f"{video_title}. {video_description}. {hashtags}"])[0]
+    
+    def extract_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Lexique d'abord (sans LLM); les textes non résolus sont envoyés au LLM par lots
+        de LLM_BATCH_SIZE. Résultats dans l'ordre des textes.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        unresolved: Dict[int, str] = {}
+        
+        lexicon = get_product_lexicon()
+        for index, text in enumerate(texts):
+            matches = lexicon.match(text)
+            if matches and matches[0].confidence >= MIN_CONFIDENCE:
+                results[index] = self._structure_product(matches)
+            else:
+                unresolved[index] = text
         
         # Fallback: Utiliser LLM pour extraction
-        return self._extract_with_llm(full_text)
+        if unresolved:
+            extracted = self._extract_with_llm(unresolved)
+            for index, text in unresolved.items():
+                results[index] = extracted.get(index) or self._fallback_extraction(text)
+            self._classify(results, unresolved)
+        
+        return results
     
-    def _extract_with_llm(self, text: str) -> Dict[str, Any]:
-        """Utilise DeepSeek local pour extraire produit"""
+    def _classify(self, results: List[Dict[str, Any]], texts: Dict[int, str]):
+        """
+        Catégorie des produits hors lexique: classifieur local (un seul lot) si entraîné,
+        sinon libellé LLM / heuristique ramené à ProductCategory.
+        """
+        classifier = get_category_classifier()
+        if classifier is None:
+            for index in texts:
+                results[index]["category"] = coerce_category(results[index]["category"]).value
+            return
         
-        llm = get_ollama_llm()
+        indexes = list(texts)
+        predictions = classifier.predict_with_confidence(
+            f"{results[index]['product_name']} {texts[index]}" for index in indexes
+        )
+        for index, (category, confidence) in zip(indexes, predictions):
+            results[index]["category"] = category.value
+            results[index]["category_confidence"] = confidence
+    
+    def _extract_with_llm(self, texts: Dict[int, str]) -> Dict[int, Dict[str, Any]]:
+        """
+        Extraction LLM par lots: un prompt par lot, réponse = tableau JSON indexé.
+        Chaque élément est validé séparément; seuls les éléments invalides ou manquants
+        sont relancés. Les éléments jamais validés sont absents du résultat.
+        """
+        extracted: Dict[int, Dict[str, Any]] = {}
+        pending = dict(texts)
         
+        for _ in range(LLM_MAX_ATTEMPTS):
+            if not pending:
+                break
+            items = list(pending.items())
+            for start in range(0, len(items), LLM_BATCH_SIZE):
+                batch = dict(items[start:start + LLM_BATCH_SIZE])
+                for product in self._call_llm_batch(batch):
+                    extracted[product.index] = {
+                        **product.model_dump(exclude={"index"}),
+                        "method": "llm",
+                    }
+            pending = {index: text for index, text in pending.items() if index not in extracted}
+        
+        return extracted
+    
+    def _call_llm_batch(self, batch: Dict[int, str]) -> List[ExtractedProduct]:
+        """Un appel LLM pour tout le lot; retourne les seuls éléments valides et attendus"""
+        
+        videos = [{"index": index, "text": text[:VIDEO_TEXT_MAX_CHARS]} for index, text in batch.items()]
         prompt = f"""
-Analyze this TikTok video text and extract the ACTUAL PRODUCT being shown/promoted.
-
-Video Text: "{text}"
-
-Return ONLY a JSON object (no markdown, no explanation):
-{{
-    "product_name": "Exact product name (e.g., 'LED Strip Lights RGB 5M')",
-    "category": "Product category (Home & Garden, Beauty, Tech, Fashion, Kitchen, Pet)",
-    "description": "Brief product description (1 sentence)",
-    "keywords": ["keyword1", "keyword2", "keyword3"]
-}}
-
-If no clear product is found, return:
-{{
-    "product_name": "Unknown Product",
-    "category": "Other",
-    "description": "Video content unclear",
-    "keywords": []
-}}
+Analyze each TikTok video text below and extract the ACTUAL PRODUCT being shown/promoted.
+
+Videos (JSON): {json.dumps(videos, ensure_ascii=False)}
+
+Return ONLY a JSON array (no markdown, no explanation), one object per video, same "index":
+[
+    {{
+        "index": 0,
+        "product_name": "Exact product name (e.g., 'LED Strip Lights RGB 5M')",
+        "category": "One of: {", ".join(c.value for c in ProductCategory)}",
+        "description": "Brief product description (1 sentence)",
+        "keywords": ["keyword1", "keyword2", "keyword3"]
+    }}
+]
+
+If no clear product is found for a video, use "product_name": "Unknown Product".
 
 JSON:
 """
         
         try:
-            response = llm.invoke(prompt)
-            
-            # Parser réponse LLM
-            import json
-            
-            # Nettoyer réponse (retirer markdown si présent)
-            clean_response = response.content if hasattr(response, 'content') else str(response)
-            clean_response = clean_response.strip()
-            
-            # Retirer ```json et ``` si présents
-            if clean_response.startswith("```"):
-                clean_response = clean_response.split("```")[1]
-                if clean_response.startswith("json"):
-                    clean_response = clean_response[4:]
-            
-            clean_response = clean_response.strip()
-            
-            # Parser JSON
-            result = json.loads(clean_response)
-            
-            # Validation
-            if not result.get("product_name") or result["product_name"] == "Unknown Product":
-                # Fallback: extraire manuellement
-                return self._fallback_extraction(text)
-            
-            return result
-            
+            response = _get_llm().call(prompt)
+            raw_items = _parse_json_array(response)
         except Exception as e:
             print(f"❌ LLM extraction failed: {e}")
-            return self._fallback_extraction(text)
+            return []
+        
+        valid = []
+        for raw in raw_items:
+            try:
+                product = ExtractedProduct.model_validate(raw)
+            except ValidationError:
+                continue
+            if product.index in batch:
+                valid.append(product)
+        return valid
     
     def _fallback_extraction(self, text: str) -> Dict[str, Any]:
         """Extraction basique si LLM échoue"""
         
         # Mots-clés produits communs
         product_keywords = {
-            'led': ('Home & Garden', 'LED lighting product'),
-            'light': ('Home & Garden', 'Lighting product'),
-            'phone': ('Tech', 'Phone accessory'),
-            'wireless': ('Tech', 'Wireless device'),
-            'makeup': ('Beauty', 'Makeup product'),
-            'kitchen': ('Kitchen', 'Kitchen gadget'),
-            'organizer': ('Home & Garden', 'Organization product'),
-            'holder': ('Accessories', 'Holder/stand product'),
+            'led': (ProductCategory.HOME_GARDEN, 'LED lighting product'),
+            'light': (ProductCategory.HOME_GARDEN, 'Lighting product'),
+            'phone': (ProductCategory.ELECTRONICS, 'Phone accessory'),
+            'wireless': (ProductCategory.ELECTRONICS, 'Wireless device'),
+            'makeup': (ProductCategory.BEAUTY, 'Makeup product'),
+            'kitchen': (ProductCategory.HOME_GARDEN, 'Kitchen gadget'),
+            'organizer': (ProductCategory.HOME_GARDEN, 'Organization product'),
+            'holder': (ProductCategory.ACCESSORIES, 'Holder/stand product'),
         }
         
+        # Mention de faible confiance du lexique (ex: "portable juicer") plutôt que rien
+        best = get_product_lexicon().best(text)
+        if best:
+            return {**best.to_dict(), "description": "Product from viral TikTok video", "method": "lexicon_low_confidence"}
+        
         text_lower = text.lower()
         
         for keyword, (category, desc) in product_keywords.items():
@@ -156,7 +243,7 @@ JSON:
                 
                 return {
                     "product_name": product_name,
-                    "category": category,
+                    "category": category.value,
                     "description": desc,
                     "keywords": [keyword]
                 }
@@ -164,43 +251,32 @@ JSON:
         # Dernier fallback
         return {
             "product_name": "Trending Product",
-            "category": "Other",
+            "category": ProductCategory.OTHER.value,
             "description": "Product from viral TikTok video",
             "keywords": ["viral", "trending"]
         }
     
-    def _structure_product(self, product_name: str, full_text: str) -> Dict[str, Any]:
-        """Structure le produit extrait"""
-        
-        # Déterminer catégorie basique
-        category_map = {
-            'led': 'Home & Garden',
-            'light': 'Home & Garden',
-            'bluetooth': 'Tech',
-            'wireless': 'Tech',
-            'phone': 'Tech',
-            'makeup': 'Beauty',
-            'skincare': 'Beauty',
-            'kitchen': 'Kitchen',
-            'pet': 'Pet',
-            'fashion': 'Fashion',
-            'jewelry': 'Fashion'
-        }
-        
-        category = 'Other'
-        for keyword, cat in category_map.items():
-            if keyword in product_name.lower():
-                category = cat
-                break
-        
+    def _structure_product(self, matches: List[ProductMatch]) -> Dict[str, Any]:
+        """Structure le produit extrait par le lexique"""
+        best = matches[0]
         return {
-            "product_name": product_name,
-            "category": category,
-            "description": f"{product_name} as seen on TikTok",
-            "keywords": product_name.lower().split()
+            **best.to_dict(),
+            "description": f"{best.product_name} as seen on TikTok",
+            "method": "lexicon",
+            "other_products": [m.product_name for m in matches[1:]],
         }
 
 
+def _parse_json_array(response: str) -> List[Any]:
+    """Tableau JSON d'une réponse LLM (markdown ```json et texte autour tolérés)"""
+    text = str(response).strip()
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        raise ValueError(f"no JSON array in LLM response: {text[:200]!r}")
+    parsed = json.loads(text[start:end + 1])
+    return parsed if isinstance(parsed, list) else []
+
+
 if __name__ == "__main__":
     # Test
     extractor = ProductExtractorTool()
@@ -215,3 +291,7 @@ if __name__ == "__main__":
         result = extractor._run(title, desc, tags)
         print(f"\nTest: {title}")
         print(f"Result: {result}")
+    
+    # Lot: un seul appel LLM pour toutes les vidéos non résolues par le lexique
+    batch = extractor._run(videos=[{"title": t, "description": d, "hashtags": h} for t, d, h in tests])
+    print(f"\nBatch: {batch}")
@@ -0,0 +1,278 @@
+"""
+Agrégateur fournisseurs multi-sources
+Interroge AliExpress, CJ Dropshipping et Amazon (Rainforest) en parallèle,
+normalise tout en SupplierInfo, dédoublonne et classe les offres.
+"""
+
+from crewai.tools.base_tool import BaseTool
+from typing import List, Dict, Any, Type, Optional, Tuple
+from pydantic import BaseModel, Field, ValidationError
+from models.product_models import SupplierInfo
+from tools.aliexpress_scraper import AliExpressScraperTool
+from tools.cj_dropshipping import CJDropshippingTool
+from tools.amazon_rainforest import AmazonRainforestTool
+from utils.concurrency import run_concurrently
+from utils.config import settings
+import numpy as np
+import re
+
+
+SUPPLIER_SOURCES = ("aliexpress", "cj", "amazon")
+
+# Poids du score de classement (somme = 1)
+LANDED_COST_WEIGHT = 0.45
+RATING_WEIGHT = 0.30
+SHIPPING_TIME_WEIGHT = 0.25
+
+# Deux offres d'une même plateforme sont "quasi identiques" au-delà de ce seuil
+DUPLICATE_TITLE_SIMILARITY = 0.85
+DUPLICATE_PRICE_TOLERANCE = 0.05
+
+
+def _parse_int(value: Any) -> int:
+    """'500+', '1,234 sold', '2.5k', 1200 -> int"""
+    if value is None or isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).lower().replace(",", "").strip()
+    match = re.search(r"(\d+(?:\.\d+)?)\s*([km])?", text)
+    if not match:
+        return 0
+    number = float(match.group(1))
+    if match.group(2) == "k":
+        number *= 1_000
+    elif match.group(2) == "m":
+        number *= 1_000_000
+    return int(number)
+
+
+def _parse_float(value: Any) -> float:
+    if value is None or isinstance(value, bool):
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    cleaned = re.sub(r"[^\d.]", "", str(value))
+    try:
+        return float(cleaned) if cleaned else 0.0
+    except ValueError:
+        return 0.0
+
+
+def normalize_offer(raw: Dict[str, Any]) -> Optional[Tuple[SupplierInfo, Dict[str, Any]]]:
+    """
+    Convertit une offre brute (AliExpress / CJ / Amazon) en SupplierInfo.
+    Retourne (SupplierInfo, extras) ou None si l'offre est inutilisable (erreur, prix nul...).
+    """
+    if not raw or "error" in raw:
+        return None
+
+    platform = raw.get("platform", "Unknown")
+    rating = _parse_float(raw.get("rating"))
+
+    if platform == "Amazon":
+        # Amazon = vendeur retail: livraison rapide, frais inclus si Prime
+        shipping_time_days = 2 if raw.get("prime_eligible") else 7
+        supplier_name = "Amazon Seller"
+    else:
+        shipping_time_days = _parse_int(raw.get("shipping_time_days")) or 30
+        supplier_name = raw.get("supplier_name") or f"{platform} Seller"
+
+    try:
+        supplier = SupplierInfo(
+            platform=platform,
+            product_url=raw.get("product_url") or "",
+            supplier_name=supplier_name,
+            price=_parse_float(raw.get("price")),
+            shipping_cost=_parse_float(raw.get("shipping_cost")),
+            shipping_time_days=shipping_time_days,
+            rating=min(max(rating, 0.0), 5.0) if rating else None,
+            total_orders=_parse_int(raw.get("total_orders")),
+            stock_available=_parse_int(raw.get("stock_available")) if raw.get("stock_available") is not None else None,
+            weight_kg=_parse_float(raw.get("weight_kg")) or None,
+        )
+    except ValidationError:
+        return None
+
+    extras = {
+        "listing_title": raw.get("product_name", ""),
+        "review_count": _parse_int(raw.get("review_count", raw.get("total_reviews"))),
+        "image_url": raw.get("image_url", ""),
+        "platform_product_id": raw.get("product_id"),  # pid CJ: devis de fret / prix par marché
+        "is_mock": "note" in raw,
+    }
+    return supplier, extras
+
+
+def _title_tokens(title: str) -> set:
+    return set(re.findall(r"[a-z0-9]+", title.lower()))
+
+
+def _is_near_duplicate(a: Tuple[SupplierInfo, Dict], b: Tuple[SupplierInfo, Dict]) -> bool:
+    supplier_a, extras_a = a
+    supplier_b, extras_b = b
+
+    if supplier_a.product_url and supplier_a.product_url == supplier_b.product_url:
+        return True
+    if supplier_a.platform != supplier_b.platform:
+        return False
+
+    tokens_a, tokens_b = _title_tokens(extras_a["listing_title"]), _title_tokens(extras_b["listing_title"])
+    if not tokens_a or not tokens_b:
+        return False
+    jaccard = len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+    price_gap = abs(supplier_a.price - supplier_b.price) / max(supplier_a.price, supplier_b.price)
+    return jaccard >= DUPLICATE_TITLE_SIMILARITY and price_gap <= DUPLICATE_PRICE_TOLERANCE
+
+
+def dedupe_offers(offers: List[Tuple[SupplierInfo, Dict]]) -> List[Tuple[SupplierInfo, Dict]]:
+    """Garde une seule offre par groupe quasi identique (la mieux notée, puis la moins chère)"""
+    ordered = sorted(offers, key=lambda o: (-(o[0].rating or 0), o[0].price + o[0].shipping_cost))
+    kept: List[Tuple[SupplierInfo, Dict]] = []
+    for offer in ordered:
+        if not any(_is_near_duplicate(offer, existing) for existing in kept):
+            kept.append(offer)
+    return kept
+
+
+def _min_max_inverse(values: np.ndarray) -> np.ndarray:
+    """1.0 pour la plus petite valeur, 0.0 pour la plus grande"""
+    span = values.max() - values.min()
+    if span <= 0:
+        return np.ones_like(values)
+    return 1.0 - (values - values.min()) / span
+
+
+def score_offers(offers: List[Tuple[SupplierInfo, Dict]]) -> np.ndarray:
+    """Score 0-100 vectorisé: coût rendu (prix + livraison), note, délai de livraison"""
+    if not offers:
+        return np.array([])
+
+    landed_cost = np.array([s.price + s.shipping_cost for s, _ in offers], dtype=float)
+    rating = np.array([s.rating if s.rating is not None else np.nan for s, _ in offers], dtype=float)
+    shipping_days = np.array([s.shipping_time_days for s, _ in offers], dtype=float)
+
+    # Note inconnue = note médiane des offres connues (ni bonus ni pénalité)
+    known = rating[~np.isnan(rating)]
+    rating = np.where(np.isnan(rating), np.median(known) if known.size else 2.5, rating)
+
+    score = (
+        LANDED_COST_WEIGHT * _min_max_inverse(landed_cost)
+        + RATING_WEIGHT * rating / 5.0
+        + SHIPPING_TIME_WEIGHT * _min_max_inverse(shipping_days)
+    )
+    return np.round(score * 100, 1)
+
+
+class SupplierAggregatorInput(BaseModel):
+    """Input for Supplier Aggregator"""
+    product_name: Optional[str] = Field(default=None, description="Product name to source")
+    product_names: Optional[List[str]] = Field(default=None, description="Several products sourced in one call")
+    top_n: int = Field(default=5, description="Number of ranked offers to return per product")
+    max_results_per_source: int = Field(default=5, description="Offers fetched from each source")
+
+
+class SupplierAggregatorTool(BaseTool):
+    name: str = "Supplier Aggregator"
+    description: str = """
+    Find and rank suppliers for products across AliExpress, CJ Dropshipping and Amazon at once.
+    All sources are queried in parallel, normalized to the same fields, deduplicated
+    and ranked by landed cost (price + shipping), rating and shipping time.
+
+    Call ONCE with: product_names (array of strings), top_n (integer, default 5).
+    Returns {product_name: {"best_supplier": {...}, "offers": [ranked offers...]}}.
+    Each offer has: rank, score (0-100), platform, supplier_name, price, shipping_cost,
+    landed_cost, shipping_time_days, rating, total_orders, product_url, platform_product_id.
+    """
+    args_schema: Type[BaseModel] = SupplierAggregatorInput
+
+    def _run(
+        self,
+        product_name: Optional[str] = None,
+        product_names: Optional[List[str]] = None,
+        top_n: int = 5,
+        max_results_per_source: int = 5
+    ) -> Dict[str, Any]:
+        """Aggregate and rank supplier offers"""
+        names = list(product_names or [])
+        if isinstance(product_names, str):
+            names = [product_names]
+        if product_name:
+            names.insert(0, product_name)
+        if not names:
+            return {"error": "product_name or product_names is required"}
+
+        sources = {
+            "aliexpress": AliExpressScraperTool(),
+            "cj": CJDropshippingTool(),
+            "amazon": AmazonRainforestTool(),
+        }
+
+        def fetch(job: Tuple[str, str]) -> List[Dict[str, Any]]:
+            name, source = job
+            tool = sources[source]
+            if source == "amazon":
+                return tool._run(name, max_results_per_source)
+            return tool._search(name, max_results_per_source)
+
+        jobs = [(name, source) for name in names for source in SUPPLIER_SOURCES]
+        raw_results = run_concurrently(
+            fetch,
+            jobs,
+            max_workers=min(len(jobs), settings.MAX_WORKERS),
+            on_error=lambda job, e: [{"error": str(e)}],
+        )
+
+        aggregated: Dict[str, Any] = {}
+        for name in names:
+            offers = []
+            for source in SUPPLIER_SOURCES:
+                for raw in raw_results.get((name, source)) or []:
+                    normalized = normalize_offer(raw)
+                    if normalized:
+                        offers.append(normalized)
+
+            aggregated[name] = self._rank(dedupe_offers(offers), top_n)
+
+        return aggregated
+
+    def _rank(self, offers: List[Tuple[SupplierInfo, Dict]], top_n: int) -> Dict[str, Any]:
+        if not offers:
+            return {"best_supplier": None, "offers": [], "note": "No usable supplier offers found"}
+
+        # Offres d'exemple (source sans clé API): notées entre elles, toujours classées après les vraies,
+        # jamais retenues comme meilleur fournisseur
+        real = [offer for offer in offers if not offer[1]["is_mock"]]
+        mock = [offer for offer in offers if offer[1]["is_mock"]]
+        ordered = []
+        for group in (real, mock):
+            scores = score_offers(group)
+            ordered.extend((group[idx], float(scores[idx])) for idx in np.argsort(-scores, kind="stable"))
+
+        ranked = []
+        for rank, ((supplier, extras), score) in enumerate(ordered[:top_n], start=1):
+            ranked.append({
+                "rank": rank,
+                "score": score,
+                "landed_cost": round(supplier.price + supplier.shipping_cost, 2),
+                **supplier.model_dump(),
+                **extras,
+            })
+
+        if not real:
+            return {"best_supplier": None, "offers": ranked, "note": "Only sample (mock) supplier offers found"}
+        return {"best_supplier": ranked[0], "offers": ranked}
+
+
+if __name__ == "__main__":
+    # Test
+    tool = SupplierAggregatorTool()
+
+    print("🧪 Testing Supplier Aggregator...")
+    results = tool._run(product_names=["LED strip lights"], top_n=3)
+
+    for product, data in results.items():
+        print(f"\n📦 {product}")
+        for offer in data["offers"]:
+            print(f"  #{offer['rank']} [{offer['score']}] {offer['platform']} - ${offer['landed_cost']} "
+                  f"({offer['shipping_time_days']} days, rating {offer['rating']})")
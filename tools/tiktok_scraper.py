@@ -1,18 +1,240 @@
 from crewai.tools.base_tool import BaseTool
-from typing import List, Dict, Any, Type, Optional
+from typing import List, Dict, Any, Type, Optional, Iterator, Set
 from pydantic import BaseModel, Field
 import requests
 import time
+from utils import http_client
 from utils.config import settings
+from utils.snapshot_store import record_snapshot
+from utils.engagement import top_videos
+from utils.engagement_history import EngagementHistory
+
+
+TIKTOK_SEARCH_URL = "https://tiktok-scraper7.p.rapidapi.com/feed/search"
+TIKTOK_API_HOST = "tiktok-scraper7.p.rapidapi.com"
+TIKTOK_PAGE_SIZE = 30  # Max videos par page acceptes par l'endpoint feed/search
+GROWTH_WINDOW_DAYS = 7  # Croissance mesuree entre snapshots des 7 derniers jours
+
+
+class TikTokAPIError(Exception):
+    """Erreur renvoyee par l'API TikTok. fatal=True arrete toute la recherche (cle invalide, quota...)."""
+
+    def __init__(self, message: str, fatal: bool = False, suggestion: Optional[str] = None, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.message = message
+        self.fatal = fatal
+        self.suggestion = suggestion
+        self.status_code = status_code
+
+    def to_result(self, keyword: Optional[str] = None) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"error": self.message}
+        if self.suggestion:
+            result["suggestion"] = self.suggestion
+        if keyword and not self.fatal:
+            result["keyword"] = keyword
+        if self.status_code and not self.fatal:
+            result["status_code"] = self.status_code
+        return result
+
+
+def _fetch_feed_page(
+    keyword: str,
+    cursor: str,
+    count: int,
+    region: str,
+    publish_time: int,
+    sort_type: int,
+) -> Dict[str, Any]:
+    """Recupere une page de feed/search. Retourne le bloc `data` (videos, cursor, hasMore)."""
+    headers = {
+        "x-rapidapi-key": settings.RAPID_API_KEY,
+        "x-rapidapi-host": TIKTOK_API_HOST,
+    }
+    params = {
+        "keywords": keyword,
+        "region": region,
+        "count": str(count),
+        "cursor": cursor,
+        "publish_time": str(publish_time),
+        "sort_type": str(sort_type),
+    }
+
+    response = http_client.get(TIKTOK_SEARCH_URL, headers=headers, params=params, timeout=15)
+
+    if response.status_code == 200:
+        record_snapshot("tiktok", keyword, response, cursor=cursor, region=region)
+        data = response.json()
+        # Check if API returned success
+        if data.get("code") != 0:
+            raise TikTokAPIError(f"TikTok API error: {data.get('msg', 'Unknown API error')}")
+        return data.get("data") or {}
+
+    if response.status_code == 401:
+        raise TikTokAPIError(
+            f"API Key invalide ou expiree pour RapidAPI. Status: {response.status_code}",
+            fatal=True,
+            suggestion="Verifiez votre RAPID_API_KEY dans config.py ou .env",
+        )
+    if response.status_code == 404:
+        raise TikTokAPIError(f"Endpoint API introuvable (404). Verifiez l'URL: {TIKTOK_SEARCH_URL}", fatal=True)
+    if response.status_code == 429:
+        raise TikTokAPIError(
+            f"Rate limit depasse ou credits epuises. Status: {response.status_code}",
+            fatal=True,
+            suggestion="Attendez quelques minutes ou verifiez vos credits RapidAPI",
+        )
+
+    error_data = response.text[:200] if response.text else "No error details"
+    raise TikTokAPIError(
+        f"Erreur API TikTok: Status {response.status_code} - {error_data}",
+        status_code=response.status_code,
+    )
+
+
+def _normalize_video(video: Dict[str, Any], keyword: str) -> Dict[str, Any]:
+    """Convertit une video brute de l'API en resultat du scraper"""
+    # Build TikTok URL from video_id or aweme_id
+    video_id = video.get("video_id") or video.get("aweme_id", "")
+    author = video.get("author") or {}
+    author_id = author.get("unique_id", "")
+
+    if author_id and video_id:
+        tiktok_url = f"https://tiktok.com/@{author_id}/video/{video_id}"
+    else:
+        tiktok_url = f"https://tiktok.com/search?q={keyword}"
+
+    return {
+        "platform": "TikTok",
+        "url": tiktok_url,
+        "video_id": video_id,
+        "aweme_id": video.get("aweme_id", ""),
+        "engagement": video.get("play_count", 0),
+        "likes": video.get("digg_count", 0),
+        "shares": video.get("share_count", 0),
+        "comments": video.get("comment_count", 0),
+        "downloads": video.get("download_count", 0),
+        "keyword": keyword,
+        "title": video.get("title", ""),
+        "author": {
+            "unique_id": author_id,
+            "nickname": author.get("nickname", ""),
+            "id": author.get("id", ""),
+        },
+        "create_time": video.get("create_time", 0),
+        "duration": video.get("duration", 0),
+        "cover": video.get("cover", ""),
+    }
+
+
+def _is_product_video(video: Dict[str, Any]) -> bool:
+    """Une video sans titre/description ne permet pas d'extraire un produit"""
+    return bool((video.get("title") or "").strip())
+
+
+def parse_tiktok_page(page: Dict[str, Any], keyword: str) -> List[Dict[str, Any]]:
+    """Videos produit d'un bloc `data` de feed/search, normalisees (sans dedoublonnage entre pages)"""
+    return [_normalize_video(video, keyword) for video in page.get("videos") or [] if _is_product_video(video)]
+
+
+def iter_tiktok_videos(
+    keywords: List[str],
+    target: int,
+    per_keyword: int,
+    region: str = "us",
+    publish_time: int = 0,
+    sort_type: int = 0,
+    max_pages: int = 5,
+    seen: Optional[Set[str]] = None,
+    errors: Optional[List[Dict[str, Any]]] = None,
+    matched_keywords: Optional[Dict[str, Set[str]]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Parcourt feed/search page par page (cursor/hasMore) et yield les videos au fil de l'eau.
+
+    - Dedoublonne par video_id/aweme_id entre pages ET entre keywords (`seen` partageable entre appels)
+    - S'arrete des que `target` videos uniques avec produit ont ete produites
+    - Les erreurs non fatales d'un keyword sont ajoutees a `errors` et on passe au keyword suivant
+    - Les erreurs fatales (401/404/429) levent TikTokAPIError
+    - `matched_keywords` recoit {video_id: keywords qui l'ont remontee}, copies ecartees comprises
+    """
+    seen = seen if seen is not None else set()
+    yielded = 0
+
+    for keyword in keywords:
+        cursor = "0"
+        fetched = 0
+
+        for _ in range(max_pages):
+            count = min(TIKTOK_PAGE_SIZE, per_keyword - fetched)
+            try:
+                page = _fetch_feed_page(keyword, cursor, count, region, publish_time, sort_type)
+            except TikTokAPIError as e:
+                if e.fatal:
+                    raise
+                print(f"[TikTok ERROR] {e.message}")
+                if errors is not None:
+                    errors.append(e.to_result(keyword))
+                break
+            except requests.exceptions.Timeout:
+                error_msg = f"Timeout lors de la requete TikTok pour '{keyword}'. Le serveur n'a pas repondu a temps."
+                print(f"[TikTok ERROR] {error_msg}")
+                if errors is not None:
+                    errors.append({"error": error_msg, "keyword": keyword})
+                break
+            except requests.exceptions.RequestException as e:
+                error_msg = f"Erreur de connexion TikTok pour '{keyword}': {e}"
+                print(f"[TikTok ERROR] {error_msg}")
+                if errors is not None:
+                    errors.append({"error": error_msg, "keyword": keyword})
+                break
+
+            videos = page.get("videos") or []
+            if not videos and cursor == "0":
+                print(f"[TikTok] No videos found for keyword: {keyword}")
+                if errors is not None:
+                    errors.append({"error": f"No videos found for keyword: {keyword}", "keyword": keyword})
+
+            for video in videos:
+                video_id = str(video.get("video_id") or video.get("aweme_id") or "")
+                if video_id:
+                    if matched_keywords is not None:
+                        matched_keywords.setdefault(video_id, set()).add(keyword)
+                    if video_id in seen:
+                        continue
+                    seen.add(video_id)
+
+                if not _is_product_video(video):
+                    continue
+
+                yield _normalize_video(video, keyword)
+                fetched += 1
+                yielded += 1
+
+                if yielded >= target:
+                    return
+                if fetched >= per_keyword:
+                    break
+
+            next_cursor = str(page.get("cursor", ""))
+            if fetched >= per_keyword or not page.get("hasMore") or not next_cursor or next_cursor == cursor:
+                break
+            cursor = next_cursor
+
+            time.sleep(1)  # Rate limiting entre pages
+
+        time.sleep(1)  # Rate limiting entre keywords
 
 
 class TikTokScraperInput(BaseModel):
     """Input for TikTok Scraper"""
     keywords: List[str] = Field(description="Keywords/hashtags to search on TikTok (without # symbol)")
-    max_videos: int = Field(default=3, description="Max videos to analyze")
+    max_videos: int = Field(default=3, description="Max videos to analyze per keyword")
+    max_total_videos: Optional[int] = Field(default=None, description="Stop once this many unique videos are found across all keywords")
+    max_pages: int = Field(default=5, description="Max result pages to follow per keyword")
     region: str = Field(default="us", description="Region code (e.g., 'us', 'gb', 'fr')")
     publish_time: int = Field(default=0, description="0=ALL, 1=24h, 7=week, 30=month, 90=3months, 180=6months")
     sort_type: int = Field(default=0, description="0=Relevance, 1=Like count, 3=Date posted")
+    top_k: Optional[int] = Field(default=10, description="Return only the K best-ranked unique videos (None = all, ranked)")
 
 
 class TikTokScraperTool(BaseTool):
@@ -23,15 +245,20 @@ class TikTokScraperTool(BaseTool):
     IMPORTANT: Call this tool with a SINGLE dictionary object containing:
     - keywords: array of strings (e.g., ["tiktokmakemebuyit", "home gadgets"])
       Note: Do NOT include the # symbol in keywords
-    - max_videos: integer (default: 3)
+    - max_videos: integer, max videos per keyword (default: 3)
+    - max_total_videos: integer, stop after this many unique videos overall (optional)
+    - max_pages: integer, result pages to follow per keyword (default: 5)
     - region: string (default: "us")
     - publish_time: integer (default: 0 for all time)
     - sort_type: integer (default: 0 for relevance)
+    - top_k: integer, number of best-ranked videos returned (default: 10)
     
     Example correct usage:
     {"keywords": ["tiktokmakemebuyit", "home gadgets"], "max_videos": 3, "region": "us"}
     
-    Returns a list of trending videos with engagement metrics.
+    Returns unique trending videos (no duplicates across keywords), already ranked by trend_score
+    (views per day, engagement rate, share rate, number of keywords that surfaced the video),
+    with likes/comments/shares and normalized rates.
     Use this to identify viral products on TikTok.
     """
     args_schema: Type[BaseModel] = TikTokScraperInput
@@ -40,9 +267,12 @@ class TikTokScraperTool(BaseTool):
         self, 
         keywords: List[str] = None, 
         max_videos: int = 3,
+        max_total_videos: Optional[int] = None,
+        max_pages: int = 5,
         region: str = "us",
         publish_time: int = 0,
-        sort_type: int = 0
+        sort_type: int = 0,
+        top_k: Optional[int] = 10
     ) -> List[Dict[str, Any]]:
         """Search TikTok for trending products"""
         # Validation
@@ -53,142 +283,57 @@ class TikTokScraperTool(BaseTool):
             keywords = [str(keywords)]
         
         # Remove # symbol if present
-        keywords = [kw.strip("#") for kw in keywords]
+        keywords = [kw.strip("#") for kw in keywords][:3]  # Limit to 3 keywords
         
+        target = max_total_videos or max_videos * len(keywords)
         results: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        matched_keywords: Dict[str, Set[str]] = {}
         
-        for keyword in keywords[:3]:  # Limit to 3 keywords
-            try:
-                url = "https://tiktok-scraper7.p.rapidapi.com/feed/search"
-                
-                headers = {
-                    "x-rapidapi-key": settings.RAPID_API_KEY,
-                    "x-rapidapi-host": "tiktok-scraper7.p.rapidapi.com"
-                }
-                
-                params = {
-                    "keywords": keyword,
-                    "region": region,
-                    "count": str(max_videos),
-                    "cursor": "0",
-                    "publish_time": str(publish_time),
-                    "sort_type": str(sort_type)
-                }
-                
-                response = requests.get(url, headers=headers, params=params, timeout=15)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    # Check if API returned success
-                    if data.get("code") != 0:
-                        error_msg = data.get("msg", "Unknown API error")
-                        print(f"[TikTok ERROR] API returned error: {error_msg}")
-                        results.append({
-                            "error": f"TikTok API error: {error_msg}",
-                            "keyword": keyword
-                        })
-                        continue
-                    
-                    videos = data.get("data", {}).get("videos", [])
-                    
-                    if videos:
-                        for video in videos[:max_videos]:
-                            # Build TikTok URL from video_id or aweme_id
-                            video_id = video.get("video_id") or video.get("aweme_id", "")
-                            author_id = video.get("author", {}).get("unique_id", "")
-                            
-                            if author_id and video_id:
-                                tiktok_url = f"https://tiktok.com/@{author_id}/video/{video_id}"
-                            else:
-                                tiktok_url = f"https://tiktok.com/search?q={keyword}"
-                            
-                            results.append({
-                                "platform": "TikTok",
-                                "url": tiktok_url,
-                                "video_id": video_id,
-                                "aweme_id": video.get("aweme_id", ""),
-                                "engagement": video.get("play_count", 0),
-                                "likes": video.get("digg_count", 0),
-                                "shares": video.get("share_count", 0),
-                                "comments": video.get("comment_count", 0),
-                                "downloads": video.get("download_count", 0),
-                                "keyword": keyword,
-                                "title": video.get("title", ""),
-                                "author": {
-                                    "unique_id": author_id,
-                                    "nickname": video.get("author", {}).get("nickname", ""),
-                                    "id": video.get("author", {}).get("id", "")
-                                },
-                                "create_time": video.get("create_time", 0),
-                                "duration": video.get("duration", 0),
-                                "cover": video.get("cover", ""),
-                            })
-                    else:
-                        print(f"[TikTok] No videos found for keyword: {keyword}")
-                        results.append({
-                            "error": f"No videos found for keyword: {keyword}",
-                            "keyword": keyword
-                        })
-                        
-                elif response.status_code == 401:
-                    error_msg = f"API Key invalide ou expiree pour RapidAPI. Status: {response.status_code}"
-                    print(f"[TikTok ERROR] {error_msg}")
-                    return [{"error": error_msg, "suggestion": "Verifiez votre RAPID_API_KEY dans config.py ou .env"}]
-                    
-                elif response.status_code == 404:
-                    error_msg = f"Endpoint API introuvable (404). Verifiez l'URL: {url}"
-                    print(f"[TikTok ERROR] {error_msg}")
-                    return [{"error": error_msg}]
-                    
-                elif response.status_code == 429:
-                    error_msg = f"Rate limit depasse ou credits epuises. Status: {response.status_code}"
-                    print(f"[TikTok ERROR] {error_msg}")
-                    return [{"error": error_msg, "suggestion": "Attendez quelques minutes ou verifiez vos credits RapidAPI"}]
-                    
-                else:
-                    error_data = response.text[:200] if response.text else "No error details"
-                    error_msg = f"Erreur API TikTok: Status {response.status_code} - {error_data}"
-                    print(f"[TikTok ERROR] {error_msg}")
-                    results.append({
-                        "error": error_msg,
-                        "keyword": keyword,
-                        "status_code": response.status_code
-                    })
-                
-                time.sleep(1)  # Rate limiting
-                
-            except requests.exceptions.Timeout:
-                error_msg = f"Timeout lors de la requete TikTok pour '{keyword}'. Le serveur n'a pas repondu a temps."
-                print(f"[TikTok ERROR] {error_msg}")
-                results.append({
-                    "error": error_msg,
-                    "keyword": keyword
-                })
-                
-            except requests.exceptions.RequestException as e:
-                error_msg = f"Erreur de connexion TikTok pour '{keyword}': {e}"
-                print(f"[TikTok ERROR] {error_msg}")
-                results.append({
-                    "error": error_msg,
-                    "keyword": keyword
-                })
-                
-            except Exception as e:
-                error_msg = f"Erreur inattendue TikTok pour '{keyword}': {e}"
-                print(f"[TikTok ERROR] {error_msg}")
-                results.append({
-                    "error": error_msg,
-                    "keyword": keyword
-                })
-        
-        if not results:
-            return [{"error": "No TikTok data found. Check your API key and endpoint."}]
+        try:
+            for video in iter_tiktok_videos(
+                keywords,
+                target=target,
+                per_keyword=max_videos,
+                region=region,
+                publish_time=publish_time,
+                sort_type=sort_type,
+                max_pages=max_pages,
+                errors=errors,
+                matched_keywords=matched_keywords,
+            ):
+                results.append(video)
+        except TikTokAPIError as e:
+            print(f"[TikTok ERROR] {e.message}")
+            return [e.to_result()]
+        except Exception as e:
+            error_msg = f"Erreur inattendue TikTok: {e}"
+            print(f"[TikTok ERROR] {error_msg}")
+            errors.append({"error": error_msg})
         
         # Filter out error-only results if we have successful results
-        successful_results = [r for r in results if "error" not in r]
-        if successful_results:
-            return successful_results
+        if results:
+            # Classement en code: seules les K meilleures vidéos vont dans le contexte du LLM
+            ranked = top_videos(results, k=top_k or len(results), matched_keywords=matched_keywords)
+            return self._with_growth(results, ranked)
+        
+        if not errors:
+            return [{"error": "No TikTok data found. Check your API key and endpoint."}]
         
         # Return errors if no successful results
-        return results
+        return errors
+    
+    def _with_growth(self, videos: List[Dict[str, Any]], ranked: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Snapshot de toutes les vidéos vues, puis croissance mesurée depuis les runs précédents"""
+        try:
+            history = EngagementHistory()
+            history.record(videos)
+            growth = history.growth_for([video["video_id"] for video in ranked], days=GROWTH_WINDOW_DAYS)
+        except Exception as e:
+            print(f"[TikTok] Engagement history unavailable: {e}")
+            return ranked
+        
+        for video in ranked:
+            measured = growth.get(video["video_id"])
+            video["plays_growth_per_day"] = round(measured["plays_per_day"], 1) if measured else None
+        return ranked
@@ -0,0 +1,267 @@
+"""
+Pool de navigateurs headless (Playwright) partagé par les outils
+qui ont besoin de pages rendues en JavaScript (Pinterest, ...).
+
+- un seul Chromium lancé, N contextes "chauds" réutilisés d'un appel à l'autre
+- réutilisation des pages par hôte (pas de new_page à chaque URL)
+- interception des requêtes: images / polices / médias bloqués
+- extraction concurrente limitée à max_pages onglets simultanés
+- comme les appels HTTP (utils.http_client): disjoncteur par hôte et timeout borné par
+  l'échéance du run (utils.deadline)
+
+Playwright est optionnel: sans lui (ou si Chromium ne démarre pas), get_browser_pool lève
+BrowserPoolUnavailable et les outils retombent sur du HTTP simple. L'échec est mémorisé:
+pas de nouvelle tentative de lancement à chaque appel.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import itertools
+import threading
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:  # Optionnel (pip install playwright && playwright install chromium)
+    async_playwright = None
+
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError, breaker_for
+from utils.deadline import bounded_timeout
+from utils.header_profiles import headers_for
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Page, Route
+
+
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+
+
+class BrowserPoolUnavailable(RuntimeError):
+    """Playwright absent ou navigateur impossible à lancer"""
+
+
+class BrowserPool:
+    """Pool asynchrone: à utiliser dans une boucle asyncio (voir get_browser_pool pour l'API synchrone)"""
+
+    def __init__(
+        self,
+        max_contexts: int = 2,
+        max_pages: int = 4,
+        headless: bool = True,
+        blocked_resource_types=BLOCKED_RESOURCE_TYPES,
+        navigation_timeout_ms: int = 15000,
+    ):
+        self.max_contexts = max_contexts
+        self.max_pages = max_pages
+        self.headless = headless
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.navigation_timeout_ms = navigation_timeout_ms
+
+        self._playwright = None
+        self._browser = None
+        self._contexts: List["BrowserContext"] = []
+        self._context_cycle = None
+        self._idle_pages: Dict[str, List["Page"]] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def start(self):
+        if self._browser:
+            return
+        if async_playwright is None:
+            raise BrowserPoolUnavailable("playwright is not installed")
+        self._playwright = await async_playwright().start()
+        try:
+            await self._launch()
+        except Exception:
+            await self.close()  # Arrête aussi le driver Playwright déjà démarré
+            raise
+
+    async def _launch(self):
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+
+        for i in range(self.max_contexts):
+            profile = headers_for(f"browser-context-{i}")
+            context = await self._browser.new_context(
+                user_agent=profile["User-Agent"],
+                extra_http_headers={"Accept-Language": profile["Accept-Language"]},
+            )
+            context.set_default_navigation_timeout(self.navigation_timeout_ms)
+            await context.route("**/*", self._route)
+            self._contexts.append(context)
+
+        self._context_cycle = itertools.cycle(self._contexts)
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+
+    async def close(self):
+        for context in self._contexts:
+            await context.close()
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+        self._contexts, self._idle_pages = [], {}
+        self._browser = self._playwright = None
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _route(self, route: "Route"):
+        if route.request.resource_type in self.blocked_resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    @asynccontextmanager
+    async def page(self, url: str):
+        """Onglet pour l'hôte de l'URL: réutilise un onglet libre du même hôte si possible"""
+        host = urlparse(url).netloc
+        async with self._semaphore:
+            idle = self._idle_pages.setdefault(host, [])
+            page = idle.pop() if idle else await next(self._context_cycle).new_page()
+            try:
+                yield page
+            finally:
+                if not page.is_closed():
+                    if len(idle) < self.max_pages:
+                        idle.append(page)
+                    else:
+                        await page.close()
+
+    async def fetch_html(self, url: str, wait_for_selector: Optional[str] = None, scrolls: int = 0) -> str:
+        """HTML après rendu JS (et scrolls optionnels pour charger plus de contenu)"""
+        async with self.page(url) as page:
+            await page.goto(url, wait_until="domcontentloaded")
+            if wait_for_selector:
+                try:
+                    await page.wait_for_selector(wait_for_selector, timeout=self.navigation_timeout_ms)
+                except Exception:
+                    pass  # On rend ce qui est chargé, le parser décidera
+            for _ in range(scrolls):
+                await page.mouse.wheel(0, 4000)
+                await page.wait_for_timeout(500)
+            return await page.content()
+
+    async def fetch_many(
+        self,
+        urls: List[str],
+        wait_for_selector: Optional[str] = None,
+        scrolls: int = 0,
+    ) -> Dict[str, Union[str, Exception]]:
+        """Rendu concurrent de plusieurs URLs (au plus max_pages à la fois). {url: html ou exception}"""
+        unique_urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(
+            *(self.fetch_html(url, wait_for_selector, scrolls) for url in unique_urls),
+            return_exceptions=True,
+        )
+        return dict(zip(unique_urls, results))
+
+
+class SyncBrowserPool:
+    """
+    Façade synchrone pour les outils CrewAI: le BrowserPool vit dans une boucle asyncio
+    dédiée (thread de fond), ce qui garde navigateur et contextes chauds entre deux appels.
+    """
+
+    def __init__(self, **pool_kwargs):
+        self._pool = BrowserPool(**pool_kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="browser-pool", daemon=True)
+        self._thread.start()
+        try:
+            self._call(self._pool.start())
+        except Exception:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            raise
+
+    def _call(self, coroutine, timeout: Optional[float] = None):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()  # Arrête le rendu en cours dans la boucle du pool (Chromium bloqué)
+            raise
+
+    def fetch_many(
+        self,
+        urls: List[str],
+        wait_for_selector: Optional[str] = None,
+        scrolls: int = 0,
+        timeout: Optional[float] = 120,
+    ) -> Dict[str, Union[str, Exception]]:
+        """
+        {url: html ou exception}. Timeout borné par l'échéance du run (DeadlineExceeded si elle
+        est passée); les URLs d'un hôte dont le disjoncteur est ouvert ne sont pas rendues
+        (CircuitOpenError), les autres hôtes comptent un succès si au moins une page a été rendue.
+        """
+        timeout = bounded_timeout(timeout)
+        unique_urls = list(dict.fromkeys(urls))
+        results: Dict[str, Union[str, Exception]] = {}
+        breakers: Dict[str, CircuitBreaker] = {}
+        refused: Dict[str, CircuitOpenError] = {}
+        for url in unique_urls:
+            host = urlparse(url).netloc
+            if host not in breakers and host not in refused:
+                breaker = breaker_for(url)
+                try:
+                    breaker.before_call()
+                    breakers[host] = breaker
+                except CircuitOpenError as e:
+                    refused[host] = e
+            if host in refused:
+                results[url] = refused[host]
+
+        allowed = [url for url in unique_urls if url not in results]
+        try:
+            if allowed:
+                results.update(self._call(self._pool.fetch_many(allowed, wait_for_selector, scrolls), timeout))
+            for host, breaker in breakers.items():
+                pages = [results[url] for url in allowed if urlparse(url).netloc == host]
+                if any(isinstance(page, str) for page in pages):
+                    breaker.record_success()
+                else:
+                    breaker.record_failure(f"{type(pages[0]).__name__}: {pages[0]}")
+        except Exception as e:
+            for breaker in breakers.values():
+                breaker.record_failure(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            for breaker in breakers.values():
+                breaker.release_probe()  # Sans effet après record_*
+        return {url: results[url] for url in unique_urls}
+
+    def close(self):
+        try:
+            self._call(self._pool.close(), timeout=30)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_shared_pool: Optional[SyncBrowserPool] = None
+_shared_pool_error: Optional[str] = None  # Échec du premier lancement, mémorisé pour le process
+_shared_pool_lock = threading.Lock()
+
+
+def get_browser_pool(max_pages: int = 4) -> SyncBrowserPool:
+    """
+    Pool partagé du process, démarré au premier appel et fermé à la sortie.
+    Lève BrowserPoolUnavailable si Playwright manque ou si le lancement a échoué (une seule tentative).
+    """
+    global _shared_pool, _shared_pool_error
+    with _shared_pool_lock:
+        if _shared_pool_error is not None:
+            raise BrowserPoolUnavailable(_shared_pool_error)
+        if _shared_pool is None:
+            try:
+                _shared_pool = SyncBrowserPool(max_pages=max_pages)
+            except Exception as e:
+                _shared_pool_error = f"{type(e).__name__}: {e}"
+                raise BrowserPoolUnavailable(_shared_pool_error) from e
+            atexit.register(_shared_pool.close)
+        return _shared_pool
@@ -0,0 +1,141 @@
+"""
+Classifieur local de catégories produit (TF-IDF caractères + mots, régression logistique).
+
+Entraîné par scripts/train_category_classifier.py sur les catégories Amazon des datasets
+Kaggle (scripts/download_datasets.py), ramenées à models.product_models.ProductCategory.
+Prédiction CPU par lots: quelques dizaines de microsecondes par produit, sans appel LLM.
+"""
+
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import FeatureUnion, Pipeline
+
+from models.product_models import ProductCategory
+from utils.config import settings
+
+
+# Mots-clés d'un niveau de catégorie Amazon ("Home&Kitchen", "pet supplies"...) -> ProductCategory.
+# Testés dans cet ordre: "home, kitchen, pets" doit d'abord être départagé par le niveau inférieur.
+CATEGORY_KEYWORDS: List[Tuple[ProductCategory, frozenset]] = [
+    (ProductCategory.PETS, frozenset({"pet", "pets", "dog", "dogs", "cat", "cats", "aquarium", "aquariums"})),
+    (ProductCategory.TOYS, frozenset({"toy", "toys", "games", "puzzles", "baby"})),
+    (ProductCategory.SPORTS, frozenset({"sports", "sport", "fitness", "outdoor", "outdoors", "exercise", "cycling", "camping", "yoga"})),
+    (ProductCategory.BEAUTY, frozenset({"beauty", "makeup", "skin", "skincare", "hair", "fragrance", "fragrances", "cosmetics", "grooming", "nail", "personal"})),
+    (ProductCategory.FASHION, frozenset({"clothing", "fashion", "shoes", "jewellery", "jewelry", "apparel", "footwear", "watches"})),
+    (ProductCategory.ACCESSORIES, frozenset({"bags", "luggage", "wallets", "handbags", "sunglasses", "car", "motorbike", "automotive"})),
+    (ProductCategory.ELECTRONICS, frozenset({"electronics", "computers", "computer", "mobile", "mobiles", "phones", "headphones", "camera", "cameras", "audio", "tv", "wearable", "laptops", "tablets", "networking"})),
+    (ProductCategory.HOME_GARDEN, frozenset({"home", "kitchen", "garden", "furniture", "appliances", "improvement", "lighting", "bedding", "bath", "decor", "cleaning", "storage", "heating", "cooling", "lawn", "patio"})),
+]
+
+# Anciens libellés de ProductExtractorTool / réponses LLM libres
+LEGACY_LABELS: Dict[str, ProductCategory] = {
+    "home & garden": ProductCategory.HOME_GARDEN,
+    "kitchen": ProductCategory.HOME_GARDEN,
+    "tech": ProductCategory.ELECTRONICS,
+    "pet": ProductCategory.PETS,
+}
+
+_WORDS = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])")  # "HomeImprovement" -> Home, Improvement
+
+
+def _level_category(level: str) -> Optional[ProductCategory]:
+    tokens = {word.lower() for word in _WORDS.findall(level)}
+    for category, keywords in CATEGORY_KEYWORDS:
+        if tokens & keywords:
+            return category
+    return None
+
+
+def map_amazon_category(path: str) -> ProductCategory:
+    """
+    Catégorie Amazon ("Computers&Accessories|Accessories&Peripherals|USBCables", ou
+    "home, kitchen, pets|Pet Supplies") -> ProductCategory, du niveau le plus précis au plus large.
+    """
+    for level in reversed([part for part in (path or "").split("|") if part.strip()]):
+        category = _level_category(level)
+        if category:
+            return category
+    return ProductCategory.OTHER
+
+
+def coerce_category(label: str) -> ProductCategory:
+    """Libellé quelconque (valeur ProductCategory, ancien libellé, texte LLM) -> ProductCategory"""
+    normalized = (label or "").strip().lower()
+    try:
+        return ProductCategory(normalized)
+    except ValueError:
+        pass
+    if normalized in LEGACY_LABELS:
+        return LEGACY_LABELS[normalized]
+    return map_amazon_category(label or "")
+
+
+class CategoryClassifier:
+    """Pipeline scikit-learn + métadonnées d'entraînement, sérialisés ensemble (joblib)"""
+
+    def __init__(self, pipeline: Pipeline, metadata: Optional[Dict[str, object]] = None):
+        self.pipeline = pipeline
+        self.metadata = metadata or {}
+        self._labels = [ProductCategory(label) for label in pipeline.classes_]
+
+    @classmethod
+    def fit(cls, texts: Sequence[str], labels: Sequence[ProductCategory], max_iter: int = 1000) -> "CategoryClassifier":
+        features = FeatureUnion([
+            # n-grammes de caractères: robustes aux titres collés / mal orthographiés ("ledlights")
+            ("chars", TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), min_df=2, sublinear_tf=True, max_features=200_000)),
+            ("words", TfidfVectorizer(analyzer="word", ngram_range=(1, 2), min_df=2, sublinear_tf=True)),
+        ])
+        pipeline = Pipeline([
+            ("features", features),
+            ("model", LogisticRegression(max_iter=max_iter, C=4.0, class_weight="balanced")),
+        ])
+        pipeline.fit([str(text) for text in texts], [ProductCategory(label).value for label in labels])
+        return cls(pipeline, {"trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "samples": len(texts)})
+
+    def predict_with_confidence(self, texts: Iterable[str]) -> List[Tuple[ProductCategory, float]]:
+        """Une prédiction par texte, en un seul passage vectorisé"""
+        texts = [str(text) for text in texts]
+        if not texts:
+            return []
+        probabilities = self.pipeline.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        return [(self._labels[index], round(float(probabilities[row, index]), 3)) for row, index in enumerate(best)]
+
+    def predict(self, texts: Iterable[str]) -> List[ProductCategory]:
+        return [category for category, _ in self.predict_with_confidence(texts)]
+
+    def save(self, path: str = None):
+        path = Path(path or settings.CATEGORY_CLASSIFIER_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({"pipeline": self.pipeline, "metadata": self.metadata}, path)
+
+    @classmethod
+    def load(cls, path: str = None) -> "CategoryClassifier":
+        bundle = joblib.load(path or settings.CATEGORY_CLASSIFIER_PATH)
+        return cls(bundle["pipeline"], bundle["metadata"])
+
+
+_default_classifier: Optional[CategoryClassifier] = None
+
+
+def get_category_classifier() -> Optional[CategoryClassifier]:
+    """Classifieur entraîné du process, ou None tant que le modèle n'a pas été entraîné"""
+    global _default_classifier
+    if _default_classifier is None:
+        if not Path(settings.CATEGORY_CLASSIFIER_PATH).exists():
+            return None
+        _default_classifier = CategoryClassifier.load()
+    return _default_classifier
+
+
+def accuracy(predicted: Sequence[ProductCategory], expected: Sequence[ProductCategory]) -> float:
+    if not expected:
+        return 0.0
+    return float(np.mean([p == e for p, e in zip(predicted, expected)]))
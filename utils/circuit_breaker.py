@@ -0,0 +1,146 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from utils.config import settings
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Levée sans appel réseau quand le circuit de l'hôte est ouvert.
+    Hérite de ConnectionError: les outils la traitent comme une panne réseau (fallback immédiat)."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit ouvert pour {host}: appels suspendus encore {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur d'un hôte upstream:
+    - closed: appels normaux, on compte les échecs consécutifs
+    - open: après N échecs, échec immédiat pendant reset_seconds
+    - half_open: un seul appel de test; succès -> closed, échec -> open
+    """
+
+    def __init__(self, host: str, failure_threshold: int = None, reset_seconds: float = None):
+        self.host = host
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds if reset_seconds is not None else settings.CIRCUIT_RESET_SECONDS
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.total_calls = 0
+        self.total_failures = 0
+        self.short_circuited = 0
+        self.times_opened = 0
+        self.last_error: Optional[str] = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """A appeler avant la requête: lève CircuitOpenError si l'hôte est considéré hors service"""
+        with self._lock:
+            if self.state == OPEN:
+                elapsed = time.monotonic() - self.opened_at
+                if elapsed < self.reset_seconds:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(self.host, self.reset_seconds - elapsed)
+                self.state = HALF_OPEN
+
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(self.host, 0)
+                self._probe_in_flight = True
+
+            self.total_calls += 1
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self, error: str):
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """
+        Libère l'appel de test sans verdict sur l'hôte (erreur hors réseau: échéance, bug, interruption):
+        sans cela, le circuit resterait half_open avec un test "en cours" pour toujours
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_calls": self.total_calls,
+                "total_failures": self.total_failures,
+                "short_circuited": self.short_circuited,
+                "times_opened": self.times_opened,
+                "last_error": self.last_error,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def _host(host_or_url: str) -> str:
+    if "://" in host_or_url:
+        return urlparse(host_or_url).netloc or host_or_url
+    return host_or_url
+
+
+def breaker_for(host_or_url: str) -> CircuitBreaker:
+    """Disjoncteur partagé (un par hôte) pour tous les outils du process"""
+    host = _host(host_or_url)
+    with _registry_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+@contextmanager
+def guard(host_or_url: str):
+    """Protège un appel non basé sur requests (ex: pytrends) par le disjoncteur de l'hôte"""
+    breaker = breaker_for(host_or_url)
+    breaker.before_call()
+    try:
+        yield breaker
+    except Exception as e:
+        breaker.record_failure(str(e))
+        raise
+    else:
+        breaker.record_success()
+    finally:
+        breaker.release_probe()  # Sans effet après record_*; libère le test si un BaseException a interrompu l'appel
+
+
+def circuit_metrics() -> Dict[str, Dict[str, Any]]:
+    """État de santé de chaque hôte appelé pendant le run"""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.host: breaker.snapshot() for breaker in breakers}
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Callable, Dict, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+def run_concurrently(
+    func: Callable[[T], Any],
+    items: Iterable[T],
+    max_workers: int = 5,
+    on_error: Callable[[T, Exception], Any] = None,
+) -> Dict[T, Any]:
+    """
+    Execute func(item) pour chaque item dans un pool de threads (I/O bloquantes: requests, sqlite...).
+
+    Retourne {item: resultat} dans l'ordre des items (doublons ignores).
+    Si on_error est fourni, une exception devient on_error(item, exc) au lieu d'etre propagee.
+    Chaque appel s'execute dans une copie du contexte de l'appelant (echeance du run, ...).
+    """
+    unique_items = list(dict.fromkeys(items))
+    if not unique_items:
+        return {}
+
+    workers = max(1, min(max_workers, len(unique_items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {item: executor.submit(copy_context().run, func, item) for item in unique_items}
+
+    results: Dict[T, Any] = {}
+    for item, future in futures.items():
+        try:
+            results[item] = future.result()
+        except Exception as e:
+            if on_error is None:
+                raise
+            results[item] = on_error(item, e)
+    return results
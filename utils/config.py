@@ -22,6 +22,18 @@ class Settings(BaseSettings):
     # Scraping
     MAX_TIKTOK_VIDEOS: int = int(os.getenv("MAX_TIKTOK_VIDEOS", "3"))
     MAX_PINTEREST_PINS: int = int(os.getenv("MAX_PINTEREST_PINS", "5"))
+    MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", "8"))  # Requêtes upstream simultanées d'un même outil
+    
+    # Circuit breaker (par hôte upstream)
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "60"))
+    
+    # Échéance globale du run (0 = aucune) et requêtes de secours sur les APIs lentes
+    RUN_DEADLINE_SECONDS: float = float(os.getenv("RUN_DEADLINE_SECONDS", "1800"))
+    # Hedging désactivé par défaut: chaque requête de secours est un appel de plus chez l'upstream.
+    # Les APIs facturées à la requête (Rainforest) ne sont doublées que si HEDGE_METERED_REQUESTS=true
+    HEDGE_REQUESTS: bool = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+    HEDGE_METERED_REQUESTS: bool = os.getenv("HEDGE_METERED_REQUESTS", "false").lower() == "true"
     
     # Scoring Thresholds
     MIN_APPROVAL_SCORE: float = 75.0
@@ -32,6 +44,27 @@ class Settings(BaseSettings):
     OUTPUT_DIR: str = "output"
     DATABASE_PATH: str = "output/products.db"
     
+    # Caches locaux
+    FREIGHT_CACHE_PATH: str = "output/freight_cache.db"
+    FREIGHT_CACHE_TTL_HOURS: int = int(os.getenv("FREIGHT_CACHE_TTL_HOURS", "24"))
+    TRENDS_STORE_PATH: str = "output/trends.db"
+    ENGAGEMENT_HISTORY_PATH: str = "output/engagement_history.db"
+    
+    # Réponses brutes des upstreams (re-parsing sans re-téléchargement)
+    SNAPSHOT_DIR: str = "output/snapshots"
+    SNAPSHOTS_ENABLED: bool = os.getenv("SNAPSHOTS_ENABLED", "true").lower() == "true"
+    # Rétention, appliquée une fois par process au premier snapshot (0 = pas de limite)
+    SNAPSHOT_RETENTION_DAYS: float = float(os.getenv("SNAPSHOT_RETENTION_DAYS", "30"))
+    SNAPSHOT_MAX_MB: float = float(os.getenv("SNAPSHOT_MAX_MB", "1024"))
+    
+    # Classifieur de catégories (scripts/train_category_classifier.py)
+    CATEGORY_CLASSIFIER_PATH: str = "output/models/category_classifier.joblib"
+    
+    # Doublons sémantiques (embeddings des noms, sentence-transformers optionnel)
+    SEMANTIC_DUPLICATES_ENABLED: bool = os.getenv("SEMANTIC_DUPLICATES_ENABLED", "true").lower() == "true"
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    SEMANTIC_DUPLICATE_THRESHOLD: float = 0.80
+    
     class Config:
         env_file = ".env"
 
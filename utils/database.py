@@ -1,18 +1,181 @@
+import re
 import sqlite3
-from typing import List, Optional
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+import numpy as np
+import zstandard
+from pydantic import ValidationError
 from models.product_models import WinningProduct
+from utils.config import settings
+from utils.name_index import (
+    INDEX_VERSION, MAX_CANDIDATES, NameMatch, length_bounds, name_buckets, name_similarity, normalize_name,
+    similarities_above,
+)
+from utils.product_relations import (
+    RELATION_TABLES, RELATIONS_VERSION, create_relation_tables, drop_relation_tables, load_products, write_relations,
+)
+from utils.vector_index import VectorIndex, embed_texts, semantic_available
 import json
+import uuid
 from datetime import datetime
 
 
+NAME_INDEX_BATCH = 10_000  # Produits indexés par lot lors du rattrapage
+RELATIONS_BATCH = 5_000  # Produits décomposés en tables relationnelles par transaction
+SEARCH_INDEX_VERSION = f"{INDEX_VERSION}+fts5-trigram-v2"
+
+# Poids bm25 des colonnes de products_fts (name, description, features)
+FTS_COLUMN_WEIGHTS = (10.0, 2.0, 1.0)
+FTS_MIN_TERM_LENGTH = 3  # Le tokenizer trigram ne peut pas chercher moins de 3 caractères
+TYPO_MIN_TRIGRAM_SHARE = 0.5  # Recherche tolérante: part minimale des trigrammes cherchés présents dans le produit
+
+EMBEDDING_BATCH = 256  # Noms encodés par appel au modèle lors du rattrapage
+SEMANTIC_CANDIDATES = 20  # Voisins demandés à l'index vectoriel par vérification
+PAGE_SIZE = 500  # Produits lus par requête dans iter_products
+CHANGES_COMPACT_MIN = 10_000  # Entrées obsolètes du journal de modifications tolérées avant compactage
+
+WORKFLOW_PAYLOAD_ZSTD_LEVEL = 10  # Sorties de tâches (texte / JSON) très redondantes
+LEGACY_RUN_PREFIX = "Workflow Run - "  # Runs autrefois insérés dans products par main.py
+
+# Connexions SQLite: une par thread et par fichier, gardée ouverte (cache de requêtes préparées)
+SQLITE_BUSY_TIMEOUT_MS = 30_000  # Attente d'un verrou tenu par un autre worker avant "database is locked"
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024  # Lectures par mmap plutôt que read() + copie dans le cache de pages
+SQLITE_CACHED_STATEMENTS = 256  # Requêtes préparées gardées par connexion (128 par défaut en 3.12)
+
+# Un index vectoriel par fichier, partagé par toutes les instances (l'ANN est chargé une fois)
+_vector_indexes: Dict[str, VectorIndex] = {}
+
+# Produits écrits ou vérifiés pendant le run (ordre du premier contact), liés au run par main.py
+_run_products: Dict[str, None] = {}
+_run_products_lock = threading.Lock()
+
+_connections = threading.local()
+_schema_lock = threading.RLock()
+_initialized_paths = set()  # Schéma créé / index synchronisés une fois par process et par fichier
+
+
+def _open_connection(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        db_path,
+        timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=SQLITE_CACHED_STATEMENTS,
+    )
+    # WAL: lecteurs et écrivain ne se bloquent plus; NORMAL: pas de fsync à chaque commit (sûr en WAL)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA foreign_keys = ON")  # ON DELETE CASCADE des tables relationnelles
+    return conn
+
+
+def _file_id(db_path: str) -> Optional[tuple]:
+    """(device, inode) du fichier: change s'il est supprimé ou remplacé pendant que la connexion est ouverte"""
+    try:
+        stat = Path(db_path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def _schema_ready(conn: sqlite3.Connection) -> bool:
+    # Dernière table créée par _init_db
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'workflow_run_products'"
+    ).fetchone() is not None
+
+
+def record_run_products(product_ids: Iterable[str]):
+    """Rattache des produits au run en cours (enregistrés, ou trouvés par la vérification de doublons)"""
+    with _run_products_lock:
+        _run_products.update(dict.fromkeys(product_ids))
+
+
+def run_product_ids() -> List[str]:
+    """Produits écrits ou vérifiés pendant le run"""
+    with _run_products_lock:
+        return list(_run_products)
+
+
+class ProductRecord(NamedTuple):
+    """Ligne de products sans désérialisation: le WinningProduct n'est construit que par load()"""
+    id: str
+    name: str
+    category: Optional[str]
+    overall_score: Optional[float]
+    is_approved: bool
+    created_at: Optional[str]
+    data: str
+    
+    def load(self) -> Optional[WinningProduct]:
+        """WinningProduct validé (None si le document n'en est pas un)"""
+        try:
+            return WinningProduct.model_validate_json(self.data)
+        except ValidationError:
+            return None
+
+
 class ProductDatabase:
-    def __init__(self, db_path: str = "output/products.db"):
+    def __init__(self, db_path: str = "output/products.db", embedder: Callable[[Sequence[str]], np.ndarray] = None):
         self.db_path = db_path
-        self._init_db()
+        # Embeddings des noms: modèle sentence-transformers par défaut, ou fonction fournie (tests, benchmarks)
+        self.embedding_model = settings.EMBEDDING_MODEL if embedder is None else getattr(embedder, "__name__", "custom")
+        self._embed = embedder or (lambda texts: embed_texts(texts, self.embedding_model))
+        self.semantic_enabled = settings.SEMANTIC_DUPLICATES_ENABLED and (embedder is not None or semantic_available())
+        self._in_memory = db_path == ":memory:"
+        self._path_key = str(Path(db_path).resolve()) if not self._in_memory else db_path
+        if self._in_memory:
+            # Base propre à l'instance: connexions (une par thread) et vecteurs aussi, dans un
+            # dossier temporaire créé au premier vecteur et supprimé avec l'instance
+            self._pool_local = threading.local()
+            self._vectors_dir: Optional[tempfile.TemporaryDirectory] = None
+            self._vector_indexes: Dict[str, VectorIndex] = {}
+        else:
+            self._pool_local = _connections
+            self._vectors_prefix = str(Path(db_path).with_suffix("")) + "_embeddings"
+            self._vector_indexes = _vector_indexes
+        with _schema_lock:
+            if self._in_memory or self._path_key in _initialized_paths:
+                self._connection()  # Schéma vérifié (et recréé au besoin) à l'ouverture de la connexion
+            else:
+                self._init_db()
+                _initialized_paths.add(self._path_key)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Connexion du thread courant pour cette base (ouverte au premier appel puis réutilisée).
+        Rouverte si le fichier a été supprimé ou remplacé; une connexion qui arrive sur une base
+        sans schéma (:memory:, propre à chaque connexion, ou fichier recréé) l'initialise.
+        """
+        pool = getattr(self._pool_local, "pool", None)
+        if pool is None:
+            pool = self._pool_local.pool = {}
+        entry = pool.get(self._path_key)
+        file_id = None if self._in_memory else _file_id(self.db_path)
+        if entry is not None and entry[1] != file_id:
+            entry[0].close()
+            entry = None
+        if entry is None:
+            conn = _open_connection(self.db_path)
+            pool[self._path_key] = (conn, file_id if file_id is not None else _file_id(self.db_path))
+            if self._in_memory or (self._path_key in _initialized_paths and not _schema_ready(conn)):
+                with _schema_lock:
+                    self._init_db()
+            return conn
+        return entry[0]
+    
+    def close(self):
+        """Ferme la connexion du thread courant (rouverte au besoin par l'appel suivant)"""
+        entry = getattr(self._pool_local, "pool", {}).pop(self._path_key, None)
+        if entry is not None:
+            entry[0].close()
     
     def _init_db(self):
-        """Initialize database schema"""
-        conn = sqlite3.connect(self.db_path)
+        """Initialize database schema (une fois par process et par fichier)"""
+        conn = self._connection()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -28,60 +191,921 @@ class ProductDatabase:
             )
         """)
         
+        # (score, id): ordre total pour la pagination par clé d'iter_products (remplace idx_score)
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_score ON products(overall_score DESC)
+            CREATE INDEX IF NOT EXISTS idx_score_id ON products(overall_score DESC, id)
         """)
+        cursor.execute("DROP INDEX IF EXISTS idx_score")
         
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_approved ON products(is_approved)
         """)
         
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_category ON products(category, overall_score DESC, id)
+        """)
+        
+        # Journal des modifications de products (insertion, mise à jour, suppression), rempli par
+        # triggers: seq ne décroît jamais (AUTOINCREMENT), contrairement au rowid d'un produit
+        # qui peut reprendre une valeur libérée par une suppression. Les index dérivés
+        # (recherche, tables relationnelles, vecteurs) se synchronisent sur seq.
+        changes_created = not cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_changes'"
+        ).fetchone()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS product_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_id TEXT NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_product_changes_product ON product_changes(product_id, seq)
+        """)
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS product_changes_insert AFTER INSERT ON products BEGIN
+                INSERT INTO product_changes (product_id) VALUES (new.id);
+            END
+        """)
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS product_changes_update AFTER UPDATE ON products BEGIN
+                INSERT INTO product_changes (product_id) SELECT old.id WHERE old.id IS NOT new.id;
+                INSERT INTO product_changes (product_id) VALUES (new.id);
+            END
+        """)
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS product_changes_delete AFTER DELETE ON products BEGIN
+                INSERT INTO product_changes (product_id) VALUES (old.id);
+            END
+        """)
+        
+        if changes_created:
+            # Base existante: chaque produit déjà présent compte comme une modification à indexer
+            cursor.execute("INSERT INTO product_changes (product_id) SELECT id FROM products ORDER BY rowid")
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS name_index_state (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        """)
+        
+        # Index dérivés d'une version précédente: reconstruits de zéro (schéma compris)
+        row = cursor.execute("SELECT value FROM name_index_state WHERE key = 'version'").fetchone()
+        if row and row[0] != SEARCH_INDEX_VERSION:
+            for table in ("product_names", "product_name_buckets", "products_fts"):
+                cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute("DELETE FROM name_index_state")
+        
+        # Index de noms (doublons): nom normalisé + buckets MinHash LSH par produit (longueur du nom
+        # dans la clé: le filtre de longueur se fait par intervalle dans chaque bucket). Pas d'index
+        # par produit: les buckets d'un nom sont recalculés depuis product_names pour les supprimer
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS product_names (
+                product_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_length INTEGER NOT NULL,
+                source_rowid INTEGER NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS product_name_buckets (
+                bucket INTEGER NOT NULL,
+                name_length INTEGER NOT NULL,
+                product_id TEXT NOT NULL,
+                PRIMARY KEY (bucket, name_length, product_id)
+            ) WITHOUT ROWID
+        """)
+        
+        # Recherche plein texte (sous-chaînes / fautes légères): rowid = rowid du produit
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, description, features,
+                tokenize = 'trigram'
+            )
+        """)
+        
+        # Embeddings des noms: ligne du fichier float16 -> produit (active = 0 si le produit a été réencodé)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS product_vectors (
+                row INTEGER PRIMARY KEY,
+                product_id TEXT NOT NULL,
+                active INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_product_vectors_product ON product_vectors(product_id, active)
+        """)
+        
+        # Tables relationnelles (fournisseurs, scores, avis, marché, prix): recréées si le schéma a changé
+        row = cursor.execute("SELECT value FROM name_index_state WHERE key = 'relations_version'").fetchone()
+        if row and row[0] != RELATIONS_VERSION:
+            drop_relation_tables(cursor)
+            cursor.execute("DELETE FROM name_index_state WHERE key IN ('relations_version', 'relations_last_seq')")
+        create_relation_tables(cursor)
+        
+        # Runs du workflow: métadonnées indexées + résultat complet compressé (zstd)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_runs (
+                id TEXT PRIMARY KEY,
+                label TEXT NOT NULL,
+                run_at TIMESTAMP NOT NULL,
+                total_tasks INTEGER,
+                tasks_with_output INTEGER,
+                final_output_available INTEGER,
+                is_approved INTEGER,
+                payload_size INTEGER NOT NULL,
+                payload BLOB NOT NULL
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_workflow_runs_run_at ON workflow_runs(run_at DESC)
+        """)
+        
+        # Produits d'un run; pas de clé étrangère vers products: INSERT OR REPLACE (mise à jour
+        # d'un produit) supprimerait les liens en cascade
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_run_products (
+                run_id TEXT NOT NULL REFERENCES workflow_runs(id) ON DELETE CASCADE,
+                product_id TEXT NOT NULL,
+                PRIMARY KEY (run_id, product_id)
+            ) WITHOUT ROWID
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_workflow_run_products_product ON workflow_run_products(product_id)
+        """)
+        
         conn.commit()
-        conn.close()
+        self._migrate_legacy_runs(conn)
+        self._compact_changes(conn)
+        self._sync_search_index(conn)
+        self._sync_relations(conn)
     
-    def save_product(self, product: WinningProduct):
-        """Save or update product"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _migrate_legacy_runs(self, conn: sqlite3.Connection):
+        """Déplace dans workflow_runs les runs que main.py enregistrait comme des produits"""
+        if conn.execute("SELECT 1 FROM name_index_state WHERE key = 'legacy_runs_migrated'").fetchone():
+            return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, name, created_at, data, is_approved FROM products WHERE name LIKE ? AND overall_score = 0",
+                (LEGACY_RUN_PREFIX + "%",),
+            ).fetchall()
+            for run_id, label, created_at, data, approved in rows:
+                try:
+                    payload = json.loads(data)
+                except ValueError:
+                    payload = {"raw_results": data}
+                run_at = created_at or payload.get("timestamp") or datetime.now().isoformat()
+                self._insert_workflow_run(conn, run_id, label, run_at, payload, bool(approved))
+            # Entrées d'index retirées par les syncs (triggers -> product_changes), tables relationnelles en cascade
+            conn.execute("DELETE FROM products WHERE id IN (SELECT value FROM json_each(?))", (json.dumps([row[0] for row in rows]),))
+            conn.execute("INSERT OR REPLACE INTO name_index_state VALUES ('legacy_runs_migrated', '1')")
+        if rows:
+            print(f"[INFO] {len(rows)} workflow run(s) moved from products to workflow_runs")
+    
+    def _compact_changes(self, conn: sqlite3.Connection):
+        """
+        Ne garde que la dernière entrée du journal par produit quand les entrées obsolètes
+        s'accumulent: une synchronisation ne lit que l'état courant du produit, et une entrée
+        n'est supprimée que si une entrée plus récente du même produit reste à traiter.
+        """
+        changes = conn.execute("SELECT count(*) FROM product_changes").fetchone()[0]
+        products = conn.execute("SELECT count(*) FROM products").fetchone()[0]
+        if changes - products < max(CHANGES_COMPACT_MIN, products):
+            return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                DELETE FROM product_changes
+                WHERE seq NOT IN (SELECT max(seq) FROM product_changes GROUP BY product_id)
+            """)
+    
+    def _read_changes(self, conn: sqlite3.Connection, last_seq: int, limit: int) -> List[tuple]:
+        """
+        Modifications de products après last_seq: (seq, product_id, rowid, name), rowid et
+        name à None si le produit a été supprimé depuis
+        """
+        return conn.execute("""
+            SELECT c.seq, c.product_id, p.rowid, p.name
+            FROM product_changes c LEFT JOIN products p ON p.id = c.product_id
+            WHERE c.seq > ? ORDER BY c.seq LIMIT ?
+        """, (last_seq, limit)).fetchall()
+    
+    def _last_change(self, conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT max(seq) FROM product_changes").fetchone()[0] or 0
+    
+    def _sync_search_index(self, conn: sqlite3.Connection):
+        """
+        Indexe (noms LSH + FTS5) les produits modifiés depuis la dernière synchronisation
+        (journal product_changes: insertions, mises à jour et suppressions, y compris celles
+        faites hors de cette classe).
+        Chaque lot est écrit sous verrou d'écriture (BEGIN IMMEDIATE) après relecture de l'état:
+        deux workers qui synchronisent en même temps n'indexent pas deux fois les mêmes produits.
+        """
+        if self._search_index_current(conn):
+            return
         
-        cursor.execute("""
-            INSERT OR REPLACE INTO products 
-            (id, name, category, data, overall_score, is_approved, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+        while True:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                state = dict(conn.execute("SELECT key, value FROM name_index_state").fetchall())
+                last_seq = int(state.get("last_seq", 0))
+                if state.get("version") != SEARCH_INDEX_VERSION:
+                    last_seq = 0
+                changes = self._read_changes(conn, last_seq, NAME_INDEX_BATCH)
+                if not changes and state.get("version") == SEARCH_INDEX_VERSION:
+                    return
+                
+                if last_seq == 0:
+                    for table in ("product_names", "product_name_buckets", "products_fts"):
+                        conn.execute(f"DELETE FROM {table}")
+                
+                # État courant de chaque produit du lot (dernière entrée du journal)
+                latest = {product_id: (rowid, name) for _, product_id, rowid, name in changes}
+                ids = json.dumps(list(latest))
+                previous = conn.execute(
+                    "SELECT product_id, name, source_rowid FROM product_names WHERE product_id IN (SELECT value FROM json_each(?))",
+                    (ids,),
+                ).fetchall()
+                if previous:
+                    conn.executemany("DELETE FROM products_fts WHERE rowid = ?", [(rowid,) for _, _, rowid in previous])
+                    conn.executemany(
+                        "DELETE FROM product_name_buckets WHERE bucket = ? AND name_length = ? AND product_id = ?",
+                        [(bucket, len(name), product_id) for product_id, name, _ in previous for bucket in name_buckets(name)],
+                    )
+                    conn.executemany("DELETE FROM product_names WHERE product_id = ?", [(product_id,) for product_id, _, _ in previous])
+                
+                names, buckets, rowids = [], [], []
+                for product_id, (rowid, name) in latest.items():
+                    if rowid is None:
+                        continue  # Produit supprimé: entrées retirées ci-dessus
+                    normalized = normalize_name(name)
+                    names.append((product_id, normalized, len(normalized), rowid))
+                    buckets.extend((bucket, len(normalized), product_id) for bucket in name_buckets(normalized))
+                    rowids.append(rowid)
+                conn.executemany("INSERT INTO product_names VALUES (?, ?, ?, ?)", names)
+                buckets.sort()  # Insertions dans l'ordre de la clé primaire: pages B-tree contiguës
+                conn.executemany("INSERT OR IGNORE INTO product_name_buckets VALUES (?, ?, ?)", buckets)
+                
+                if rowids:
+                    # Description / features lues dans le JSON directement par SQLite
+                    conn.execute("""
+                        INSERT INTO products_fts (rowid, name, description, features)
+                        SELECT rowid, name,
+                               CASE WHEN json_valid(data) THEN json_extract(data, '$.description') END,
+                               CASE WHEN json_valid(data) AND json_type(data, '$.features') = 'array'
+                                    THEN (SELECT group_concat(value, ' ') FROM json_each(data, '$.features')) END
+                        FROM products WHERE rowid IN (SELECT value FROM json_each(?))
+                    """, (json.dumps(rowids),))
+                if changes:
+                    last_seq = changes[-1][0]
+                conn.executemany(
+                    "INSERT OR REPLACE INTO name_index_state VALUES (?, ?)",
+                    [("version", SEARCH_INDEX_VERSION), ("last_seq", str(last_seq))],
+                )
+            
+            if len(changes) < NAME_INDEX_BATCH:
+                return
+    
+    def _search_index_current(self, conn: sqlite3.Connection) -> bool:
+        """Index à jour (lecture seule, sans verrou): cas de presque tous les appels"""
+        state = dict(conn.execute("SELECT key, value FROM name_index_state").fetchall())
+        if state.get("version") != SEARCH_INDEX_VERSION:
+            return False
+        return int(state.get("last_seq", 0)) >= self._last_change(conn)
+    
+    def _sync_relations(self, conn: sqlite3.Connection):
+        """
+        Décompose dans les tables relationnelles les produits modifiés depuis le dernier passage
+        (même journal product_changes que l'index de recherche: couvre les bases existantes).
+        """
+        state = dict(conn.execute(
+            "SELECT key, value FROM name_index_state WHERE key IN ('relations_version', 'relations_last_seq')"
+        ).fetchall())
+        if (state.get("relations_version") == RELATIONS_VERSION
+                and int(state.get("relations_last_seq", 0)) >= self._last_change(conn)):
+            return
+        
+        while True:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                state = dict(conn.execute(
+                    "SELECT key, value FROM name_index_state WHERE key IN ('relations_version', 'relations_last_seq')"
+                ).fetchall())
+                last_seq = int(state.get("relations_last_seq", 0))
+                if state.get("relations_version") != RELATIONS_VERSION:
+                    for table in RELATION_TABLES:
+                        conn.execute(f"DELETE FROM {table}")
+                    last_seq = 0
+                
+                changes = self._read_changes(conn, last_seq, RELATIONS_BATCH)
+                if changes:
+                    write_relations(conn, list(dict.fromkeys(product_id for _, product_id, _, _ in changes)))
+                    last_seq = changes[-1][0]
+                conn.executemany(
+                    "INSERT OR REPLACE INTO name_index_state VALUES (?, ?)",
+                    [("relations_version", RELATIONS_VERSION), ("relations_last_seq", str(last_seq))],
+                )
+            
+            if len(changes) < RELATIONS_BATCH:
+                return
+    
+    def _vector_index(self, dim: int) -> VectorIndex:
+        if self._in_memory and self._vectors_dir is None:
+            self._vectors_dir = tempfile.TemporaryDirectory(prefix="products_embeddings_")
+            self._vectors_prefix = str(Path(self._vectors_dir.name) / "embeddings")
+        index = self._vector_indexes.get(self._vectors_prefix)
+        if index is None or index.dim != dim:
+            index = self._vector_indexes[self._vectors_prefix] = VectorIndex(
+                self._vectors_prefix, dim, persist_ann=not self._in_memory
+            )
+        return index
+    
+    def _sync_embeddings(self, conn: sqlite3.Connection):
+        """
+        Encode les noms des produits modifiés depuis le dernier passage (journal product_changes)
+        et les ajoute à l'index vectoriel (ajout incrémental, jamais de reconstruction sauf
+        changement de modèle); les vecteurs des produits supprimés sont désactivés.
+        L'encodage se fait hors verrou; l'ajout, sous verrou d'écriture, est abandonné si un
+        autre worker a déjà traité le même lot entre-temps.
+        """
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            state = dict(conn.execute("SELECT key, value FROM name_index_state").fetchall())
+            if state.get("vectors_model") != self.embedding_model:
+                if state.get("vectors_dim"):
+                    self._vector_index(int(state["vectors_dim"])).reset()
+                conn.execute("DELETE FROM product_vectors")
+                conn.execute("DELETE FROM name_index_state WHERE key IN ('vectors_dim', 'vectors_last_seq')")
+                conn.execute("INSERT OR REPLACE INTO name_index_state VALUES ('vectors_model', ?)", (self.embedding_model,))
+                state["vectors_last_seq"] = 0
+        last_seq = int(state.get("vectors_last_seq", 0))
+        
+        while True:
+            changes = self._read_changes(conn, last_seq, EMBEDDING_BATCH)
+            if not changes:
+                return
+            
+            latest = {product_id: name for _, product_id, _, name in changes}
+            present = [(product_id, name) for product_id, name in latest.items() if name is not None]
+            vectors = self._embed([name for _, name in present]) if present else None
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                current = conn.execute("SELECT value FROM name_index_state WHERE key = 'vectors_last_seq'").fetchone()
+                if current and int(current[0]) != last_seq:
+                    last_seq = int(current[0])  # Lot traité par un autre worker: on reprend après lui
+                    continue
+                last_seq = changes[-1][0]
+                conn.executemany("UPDATE product_vectors SET active = 0 WHERE product_id = ?", [(i,) for i in latest])
+                state_rows = [("vectors_model", self.embedding_model), ("vectors_last_seq", str(last_seq))]
+                if present:
+                    # Ajout au fichier sous le verrou SQLite: ordre des lignes identique entre process
+                    vector_rows = self._vector_index(vectors.shape[1]).append(vectors)
+                    conn.executemany(
+                        "INSERT INTO product_vectors (row, product_id) VALUES (?, ?)",
+                        zip(vector_rows, [product_id for product_id, _ in present]),
+                    )
+                    state_rows.append(("vectors_dim", str(vectors.shape[1])))
+                conn.executemany("INSERT OR REPLACE INTO name_index_state VALUES (?, ?)", state_rows)
+            
+            if len(changes) < EMBEDDING_BATCH:
+                return
+    
+    def rebuild_search_index(self):
+        """Reconstruit entièrement les index de recherche (après des suppressions manuelles par exemple)"""
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM name_index_state")
+        self._sync_search_index(conn)
+    
+    def save_workflow_run(
+        self,
+        payload: Dict[str, Any],
+        is_approved: bool = False,
+        product_ids: Sequence[str] = ()
+    ) -> str:
+        """Enregistre un run du workflow (résultat complet compressé) et ses produits; retourne son id"""
+        run_id = str(uuid.uuid4())
+        run_at = payload.get("timestamp") or datetime.now().isoformat()
+        label = f"Workflow Run - {datetime.fromisoformat(run_at).strftime('%Y%m%d_%H%M%S')}"
+        conn = self._connection()
+        with conn:
+            self._insert_workflow_run(conn, run_id, label, run_at, payload, is_approved)
+            conn.executemany(
+                "INSERT OR IGNORE INTO workflow_run_products (run_id, product_id) VALUES (?, ?)",
+                [(run_id, product_id) for product_id in product_ids],
+            )
+        return run_id
+    
+    def _insert_workflow_run(
+        self, conn: sqlite3.Connection, run_id: str, label: str, run_at: str, payload: Dict[str, Any], is_approved: bool
+    ):
+        raw = json.dumps(payload, default=str, ensure_ascii=False).encode("utf-8")
+        summary = payload.get("workflow_summary") or {}
+        conn.execute("""
+            INSERT OR REPLACE INTO workflow_runs
+            (id, label, run_at, total_tasks, tasks_with_output, final_output_available, is_approved, payload_size, payload)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
-            product.id,
-            product.name,
-            product.category.value,
-            json.dumps(product.model_dump(), default=str),
-            product.score.overall_score,
-            1 if product.is_approved else 0,
-            datetime.now().isoformat()
+            run_id,
+            label,
+            run_at,
+            summary.get("total_tasks"),
+            summary.get("tasks_with_output"),
+            1 if summary.get("final_output_available") else 0,
+            1 if is_approved else 0,
+            len(raw),
+            zstandard.ZstdCompressor(level=WORKFLOW_PAYLOAD_ZSTD_LEVEL).compress(raw),
         ))
+    
+    def list_workflow_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Derniers runs, métadonnées seulement (le résultat compressé n'est pas lu)"""
+        rows = self._connection().execute("""
+            SELECT r.id, r.label, r.run_at, r.total_tasks, r.tasks_with_output, r.final_output_available,
+                   r.is_approved, r.payload_size, length(r.payload),
+                   (SELECT COUNT(*) FROM workflow_run_products l WHERE l.run_id = r.id)
+            FROM workflow_runs r ORDER BY r.run_at DESC LIMIT ?
+        """, (limit,)).fetchall()
+        return [
+            {
+                "id": run_id,
+                "label": label,
+                "run_at": run_at,
+                "total_tasks": total_tasks,
+                "tasks_with_output": tasks_with_output,
+                "final_output_available": bool(final_output),
+                "is_approved": bool(approved),
+                "payload_size": payload_size,
+                "compressed_size": compressed_size,
+                "products": products,
+            }
+            for run_id, label, run_at, total_tasks, tasks_with_output, final_output, approved,
+                payload_size, compressed_size, products in rows
+        ]
+    
+    def get_workflow_run(self, run_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Un run (le plus récent si run_id est None) avec son résultat décompressé et ses produits"""
+        conn = self._connection()
+        if run_id is None:
+            row = conn.execute("SELECT id FROM workflow_runs ORDER BY run_at DESC LIMIT 1").fetchone()
+            if not row:
+                return None
+            run_id = row[0]
+        row = conn.execute(
+            "SELECT label, run_at, is_approved, payload FROM workflow_runs WHERE id = ?", (run_id,)
+        ).fetchone()
+        if not row:
+            return None
+        label, run_at, approved, payload = row
+        return {
+            "id": run_id,
+            "label": label,
+            "run_at": run_at,
+            "is_approved": bool(approved),
+            "payload": json.loads(zstandard.ZstdDecompressor().decompress(payload)),
+            "product_ids": [
+                product_id for (product_id,) in
+                conn.execute("SELECT product_id FROM workflow_run_products WHERE run_id = ?", (run_id,))
+            ],
+        }
+    
+    def save_product(self, product: WinningProduct):
+        """Save or update product"""
+        self.save_products([product])
+    
+    def save_products(self, products: Iterable[WinningProduct]) -> int:
+        """
+        Save or update products in one transaction (executemany, un seul commit / fsync), puis
+        met à jour les index une fois pour tout le lot. Sérialisation par model_dump_json
+        (pydantic-core, sans passer par des dicts Python). Retourne le nombre de produits écrits.
+        """
+        updated_at = datetime.now().isoformat()
+        saved_ids = []
         
-        conn.commit()
-        conn.close()
+        def rows():
+            for product in products:
+                saved_ids.append(product.id)
+                yield (
+                    product.id,
+                    product.name,
+                    product.category.value,
+                    product.model_dump_json(),
+                    product.score.overall_score,
+                    1 if product.is_approved else 0,
+                    updated_at,
+                )
+        
+        conn = self._connection()
+        with conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO products 
+                (id, name, category, data, overall_score, is_approved, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows())
+        
+        record_run_products(saved_ids)
+        if saved_ids:
+            self._sync_search_index(conn)
+            self._sync_relations(conn)
+        return len(saved_ids)
     
     def get_all_products(self) -> List[WinningProduct]:
-        """Retrieve all products"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT data FROM products ORDER BY overall_score DESC")
+        """Retrieve all products (documents invalides ignorés); iter_products pour un parcours en mémoire constante"""
+        return list(self.iter_products())
+    
+    def count_products(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM products").fetchone()[0]
+    
+    def iter_products(
+        self,
+        category: Optional[str] = None,
+        is_approved: Optional[bool] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        lazy: bool = False,
+        page_size: int = PAGE_SIZE
+    ) -> Iterator[Union[WinningProduct, ProductRecord]]:
+        """
+        Parcourt les produits du meilleur score au moins bon, page par page (pagination par clé
+        (overall_score, id): chaque page est une recherche d'index, sans OFFSET ni transaction
+        ouverte entre deux pages). Mémoire constante quelle que soit la taille de la table.
+        lazy=True: ProductRecord (colonnes + JSON brut, load() à la demande) au lieu de
+        WinningProduct validés; sinon les documents invalides sont ignorés.
+        Produits sans score: en fin de parcours, sauf filtre sur le score.
+        """
+        conditions, params = [], []
+        if category:
+            conditions.append("category = ?")
+            params.append(category)
+        if is_approved is not None:
+            conditions.append("is_approved = ?")
+            params.append(1 if is_approved else 0)
+        if min_score is not None:
+            conditions.append("overall_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("overall_score <= ?")
+            params.append(max_score)
         
-        products = []
-        for row in cursor.fetchall():
-            data = json.loads(row[0])
-            products.append(WinningProduct(**data))
+        phases = [("overall_score IS NOT NULL", "overall_score DESC, id")]
+        if min_score is None and max_score is None:
+            phases.append(("overall_score IS NULL", "id"))
         
-        conn.close()
-        return products
+        conn = self._connection()
+        for phase, order in phases:
+            last = None
+            while True:
+                where, args = [phase, *conditions], list(params)
+                if last is not None and last.overall_score is not None:
+                    # Borne sur la 1re colonne de l'index (plage), départage par id
+                    where.append("overall_score <= ? AND (overall_score < ? OR id > ?)")
+                    args += [last.overall_score, last.overall_score, last.id]
+                elif last is not None:
+                    where.append("id > ?")
+                    args.append(last.id)
+                rows = conn.execute(f"""
+                    SELECT id, name, category, overall_score, is_approved, created_at, data FROM products
+                    WHERE {" AND ".join(where)} ORDER BY {order} LIMIT ?
+                """, (*args, page_size)).fetchall()
+                
+                for row in rows:
+                    last = ProductRecord(row[0], row[1], row[2], row[3], bool(row[4]), row[5], row[6])
+                    if lazy:
+                        yield last
+                    else:
+                        product = last.load()
+                        if product is not None:
+                            yield product
+                
+                if len(rows) < page_size:
+                    break
     
-    def check_duplicate_by_name(self, name: str, threshold: float = 0.8) -> Optional[WinningProduct]:
-        """Check if similar product exists"""
-        from difflib import SequenceMatcher
+    def get_product(self, product_id: str) -> Optional[WinningProduct]:
+        """Retrieve one product (None if missing or not a valid WinningProduct)"""
+        row = self._connection().execute("SELECT data FROM products WHERE id = ?", (product_id,)).fetchone()
+        if not row:
+            return None
+        try:
+            return WinningProduct(**json.loads(row[0]))
+        except (ValidationError, TypeError, ValueError):
+            return None
+
+    def query_products(
+        self,
+        category: Optional[str] = None,
+        min_overall_score: Optional[float] = None,
+        min_trend_score: Optional[float] = None,
+        min_margin_percent: Optional[float] = None,
+        max_landed_cost: Optional[float] = None,
+        supplier_platform: Optional[str] = None,
+        trend_direction: Optional[str] = None,
+        limit: int = 50
+    ) -> List[WinningProduct]:
+        """
+        Produits filtrés en SQL sur les tables relationnelles (index dédiés, aucun JSON parsé
+        pour filtrer), du meilleur score global au moins bon. max_landed_cost / supplier_platform:
+        au moins un fournisseur (prix + livraison) sous ce coût, sur cette plateforme.
+        """
+        conn = self._connection()
+        self._sync_relations(conn)
+
+        joins, conditions, params = [], [], []
+        if category:
+            conditions.append("p.category = ?")
+            params.append(category)
+        if min_overall_score is not None:
+            conditions.append("p.overall_score >= ?")
+            params.append(min_overall_score)
+        if min_trend_score is not None:
+            joins.append("JOIN scores sc ON sc.product_id = p.id")
+            conditions.append("sc.trend_score >= ?")
+            params.append(min_trend_score)
+        if min_margin_percent is not None:
+            joins.append("JOIN pricing pr ON pr.product_id = p.id")
+            conditions.append("pr.profit_margin_percent >= ?")
+            params.append(min_margin_percent)
+        if trend_direction:
+            joins.append("JOIN market_analysis m ON m.product_id = p.id")
+            conditions.append("m.trend_direction = ?")
+            params.append(trend_direction)
+        if max_landed_cost is not None or supplier_platform:
+            supplier_conditions = ["s.product_id = p.id"]
+            if max_landed_cost is not None:
+                supplier_conditions.append("s.landed_cost <= ?")
+                params.append(max_landed_cost)
+            if supplier_platform:
+                # "+": pas d'idx_suppliers_platform ici, la clé primaire (product_id) est bien plus sélective
+                supplier_conditions.append("+s.platform = ?")
+                params.append(supplier_platform)
+            conditions.append(f"EXISTS (SELECT 1 FROM suppliers s WHERE {' AND '.join(supplier_conditions)})")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        product_ids = [row[0] for row in conn.execute(f"""
+            SELECT p.id FROM products p {" ".join(joins)} {where}
+            ORDER BY p.overall_score DESC LIMIT ?
+        """, (*params, limit)).fetchall()]
+        return load_products(conn, product_ids)
+
+    def category_stats(self) -> List[Dict[str, Any]]:
+        """Par catégorie: nombre de produits, scores et marge moyens, coût fournisseur le plus bas"""
+        conn = self._connection()
+        self._sync_relations(conn)
+        rows = conn.execute("""
+            SELECT p.category, COUNT(*), AVG(sc.overall_score), AVG(sc.trend_score), AVG(pr.profit_margin_percent),
+                   (SELECT MIN(s.landed_cost) FROM suppliers s JOIN products q ON q.id = s.product_id
+                    WHERE q.category = p.category)
+            FROM products p
+            JOIN scores sc ON sc.product_id = p.id
+            LEFT JOIN pricing pr ON pr.product_id = p.id
+            GROUP BY p.category
+            ORDER BY COUNT(*) DESC
+        """).fetchall()
+        return [
+            {
+                "category": category,
+                "products": count,
+                "avg_overall_score": round(overall or 0.0, 2),
+                "avg_trend_score": round(trend or 0.0, 2),
+                "avg_margin_percent": round(margin or 0.0, 2),
+                "min_landed_cost": float(landed_cost) if landed_cost is not None else None,
+            }
+            for category, count, overall, trend, margin, landed_cost in rows
+        ]
+
+    def find_similar_names(self, name: str, threshold: float = 0.8, limit: int = 5) -> List[NameMatch]:
+        """
+        Produits dont le nom est similaire (ratio SequenceMatcher >= threshold), du plus proche
+        au moins proche. Candidats tirés de l'index LSH: seuls ceux-ci sont comparés exactement.
+        """
+        conn = self._connection()
+        self._sync_search_index(conn)
+        return self._similar_names(conn, name, threshold, limit)
+    
+    def _similar_names(self, conn: sqlite3.Connection, name: str, threshold: float, limit: int) -> List[NameMatch]:
+        query = normalize_name(name)
+        buckets = name_buckets(query)
+        if not buckets:
+            return []
+        min_length, max_length = length_bounds(len(query), threshold)
+        
+        # Meilleurs candidats (bandes communes) d'abord; noms normalisés lus pour ceux-là seulement
+        candidates = conn.execute(f"""
+            SELECT c.product_id, n.name
+            FROM (
+                SELECT product_id, COUNT(*) AS shared_bands
+                FROM product_name_buckets
+                WHERE bucket IN ({",".join("?" * len(buckets))})
+                  AND name_length BETWEEN ? AND ?
+                GROUP BY product_id
+                ORDER BY shared_bands DESC
+                LIMIT ?
+            ) c
+            JOIN product_names n ON n.product_id = c.product_id
+        """, (*buckets, min_length, max_length, MAX_CANDIDATES)).fetchall()
         
-        all_products = self.get_all_products()
-        for product in all_products:
-            similarity = SequenceMatcher(None, name.lower(), product.name.lower()).ratio()
-            if similarity >= threshold:
+        similar = similarities_above(query, [normalized for _, normalized in candidates], threshold)
+        if not similar:
+            return []
+        originals = dict(conn.execute(
+            "SELECT id, name FROM products WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps([candidates[position][0] for position, _ in similar]),),
+        ).fetchall())
+        matches = [
+            NameMatch(candidates[position][0], originals[candidates[position][0]], round(similarity, 4))
+            for position, similarity in similar
+            if candidates[position][0] in originals
+        ]
+        matches.sort(key=lambda match: -match.similarity)
+        return matches[:limit]
+    
+    def search_products(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Recherche plein texte (nom, description, features) sans charger la table: bm25 FTS5
+        pondéré par colonne, combiné à la similarité du nom. Sans résultat, nouvelle tentative
+        tolérante aux fautes de frappe: trigrammes des mots cherchés, en gardant les produits
+        qui en contiennent au moins TYPO_MIN_TRIGRAM_SHARE.
+        """
+        normalized = normalize_name(query)
+        words = [word for word in re.findall(r"\w+", normalized) if len(word) >= FTS_MIN_TERM_LENGTH]
+        if not words:
+            return []
+        
+        conn = self._connection()
+        self._sync_search_index(conn)
+        rows = self._fts_query(conn, words, limit * 5)
+        if not rows:
+            trigrams = sorted({word[i:i + 3] for word in words for i in range(len(word) - 2)})
+            rows = [
+                row[:6] for row in self._fts_query(conn, trigrams, limit * 10, with_text=True)
+                if _trigram_share(trigrams, row[6]) >= TYPO_MIN_TRIGRAM_SHARE
+            ]
+        
+        results = []
+        for product_id, name, category, score, approved, rank in rows:
+            similarity = name_similarity(normalized, normalize_name(name))
+            text_score = -rank / (1 - rank)  # bm25 (négatif) -> [0, 1), indépendant des autres lignes
+            results.append({
+                "id": product_id,
+                "name": name,
+                "category": category,
+                "overall_score": score,
+                "is_approved": bool(approved),
+                "similarity": round(similarity, 4),
+                "relevance": round(0.5 * text_score + 0.5 * similarity, 4),
+            })
+        results.sort(key=lambda result: -result["relevance"])
+        return results[:limit]
+    
+    def _fts_query(self, conn: sqlite3.Connection, terms: List[str], limit: int, with_text: bool = False) -> List[tuple]:
+        # Termes entre guillemets (pas d'opérateurs FTS5 venant du texte), reliés par OR
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        weights = ", ".join(str(weight) for weight in FTS_COLUMN_WEIGHTS)
+        text = (
+            ", lower(products_fts.name || ' ' || ifnull(products_fts.description, '') || ' '"
+            " || ifnull(products_fts.features, ''))"
+        ) if with_text else ""
+        return conn.execute(f"""
+            SELECT p.id, p.name, p.category, p.overall_score, p.is_approved,
+                   bm25(products_fts, {weights}) AS rank{text}
+            FROM products_fts
+            JOIN products p ON p.rowid = products_fts.rowid
+            WHERE products_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+        """, (match, limit)).fetchall()
+    
+    def find_duplicates(
+        self,
+        name: str,
+        threshold: float = 0.8,
+        semantic_threshold: float = None,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Doublons probables en un appel: similarité lexicale (index LSH, ratio >= threshold) et
+        sémantique (embeddings, cosinus >= semantic_threshold), chaque candidat noté sur les deux.
+        "LED Strip Lights RGB 5M" / "Color Changing LED Light Strip": raté en lexical, trouvé en sémantique.
+        """
+        return self.find_duplicates_batch([name], threshold, semantic_threshold, limit)[0]["duplicates"]
+    
+    def find_duplicates_batch(
+        self,
+        names: List[str],
+        threshold: float = 0.8,
+        semantic_threshold: float = None,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        find_duplicates pour plusieurs noms: une connexion, une synchronisation des index, un seul
+        encodage. Les noms sont aussi comparés entre eux: batch_duplicate_of = index du nom précédent
+        du lot le plus similaire parmi ceux dont celui-ci est un doublon (None sinon). Un résultat
+        par nom, dans l'ordre.
+        """
+        if semantic_threshold is None:
+            semantic_threshold = settings.SEMANTIC_DUPLICATE_THRESHOLD
+        conn = self._connection()
+        self._sync_search_index(conn)
+        candidates: List[Dict[str, Dict[str, Any]]] = [
+            {
+                match.product_id: {"product_id": match.product_id, "name": match.name, "lexical_similarity": match.similarity}
+                for match in self._similar_names(conn, name, threshold, MAX_CANDIDATES)
+            }
+            for name in names
+        ]
+        
+        vectors = None
+        if self.semantic_enabled and names:
+            try:
+                self._sync_embeddings(conn)
+                vectors = self._embed(names)
+                for vector, name_candidates in zip(vectors, candidates):
+                    self._add_semantic_scores(conn, vector, name_candidates)
+            except Exception as e:
+                vectors = None
+                print(f"[WARNING] Semantic duplicate check unavailable, lexical only: {e}")
+        
+        results = []
+        for index, name in enumerate(names):
+            query = normalize_name(name)
+            duplicates = []
+            for candidate in candidates[index].values():
+                if "lexical_similarity" not in candidate:
+                    candidate["lexical_similarity"] = round(name_similarity(query, normalize_name(candidate["name"])), 4)
+                match = _match_kind(candidate["lexical_similarity"], candidate.get("semantic_similarity"), threshold, semantic_threshold)
+                if match:
+                    candidate["match"] = match
+                    candidate["similarity"] = max(candidate["lexical_similarity"], candidate.get("semantic_similarity") or 0.0)
+                    duplicates.append(candidate)
+            duplicates.sort(key=lambda duplicate: -duplicate["similarity"])
+            
+            # Doublon le plus proche parmi les noms précédents du même lot (lot de quelques dizaines
+            # de noms: comparaison directe)
+            batch_duplicate_of, batch_similarity = None, 0.0
+            for previous in range(index):
+                lexical = name_similarity(query, normalize_name(names[previous]))
+                semantic = min(float(vectors[index] @ vectors[previous]), 1.0) if vectors is not None else None
+                similarity = round(max(lexical, semantic or 0.0), 4)
+                if _match_kind(lexical, semantic, threshold, semantic_threshold) and similarity > batch_similarity:
+                    batch_duplicate_of, batch_similarity = previous, similarity
+            
+            results.append({
+                "name": name,
+                "duplicates": duplicates[:limit],
+                "batch_duplicate_of": batch_duplicate_of,
+                "batch_similarity": batch_similarity,
+            })
+        return results
+    
+    def _add_semantic_scores(self, conn: sqlite3.Connection, query_vector: np.ndarray, candidates: Dict[str, Dict[str, Any]]):
+        """Voisins sémantiques ajoutés aux candidats; candidats lexicaux notés avec leur vecteur stocké"""
+        index = self._vector_index(len(query_vector))
+        
+        neighbours = dict(index.search(query_vector, SEMANTIC_CANDIDATES))
+        if neighbours:
+            for row, product_id, product_name in conn.execute(f"""
+                SELECT v.row, v.product_id, p.name FROM product_vectors v JOIN products p ON p.id = v.product_id
+                WHERE v.active = 1 AND v.row IN ({",".join("?" * len(neighbours))})
+            """, list(neighbours)).fetchall():
+                candidate = candidates.setdefault(product_id, {"product_id": product_id, "name": product_name})
+                candidate["semantic_similarity"] = round(min(neighbours[row], 1.0), 4)  # Arrondi float16
+        
+        lexical_only = [product_id for product_id, c in candidates.items() if "semantic_similarity" not in c]
+        if lexical_only:
+            rows = conn.execute(
+                f"SELECT row, product_id FROM product_vectors WHERE active = 1 AND product_id IN ({','.join('?' * len(lexical_only))})",
+                lexical_only,
+            ).fetchall()
+            if rows:
+                scores = index.get([row for row, _ in rows]) @ query_vector
+                for (_, product_id), score in zip(rows, scores):
+                    candidates[product_id]["semantic_similarity"] = round(min(float(score), 1.0), 4)
+    
+    def check_duplicate_by_name(self, name: str, threshold: float = 0.8) -> Optional[WinningProduct]:
+        """Check if similar product exists (closest lexical or semantic match first)"""
+        for duplicate in self.find_duplicates(name, threshold):
+            product = self.get_product(duplicate["product_id"])
+            if product:
                 return product
         return None
+
+
+def _trigram_share(trigrams: List[str], text: str) -> float:
+    """Part des trigrammes cherchés présents dans le texte (minuscules, comme le tokenizer trigram)"""
+    return sum(trigram in text for trigram in trigrams) / len(trigrams) if trigrams else 0.0
+
+
+def _match_kind(lexical: float, semantic: Optional[float], threshold: float, semantic_threshold: float) -> Optional[str]:
+    """'lexical', 'semantic', 'both' selon les seuils atteints, None si aucun"""
+    is_lexical = lexical >= threshold
+    is_semantic = semantic is not None and semantic >= semantic_threshold
+    if is_lexical and is_semantic:
+        return "both"
+    return "lexical" if is_lexical else ("semantic" if is_semantic else None)
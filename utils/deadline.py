@@ -0,0 +1,55 @@
+"""
+Échéance (deadline) d'exécution propagée de l'orchestrateur jusqu'aux appels HTTP des outils.
+
+main.py ouvre `with deadline(secondes):` autour du kickoff; utils.http_client borne
+chaque timeout au temps restant et échoue immédiatement une fois l'échéance passée.
+Portée par une ContextVar: utils.concurrency copie le contexte dans ses threads.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+import requests
+
+
+# Instant (time.monotonic) au-delà duquel plus aucun appel ne doit partir. None = pas d'échéance
+_deadline_at: ContextVar[Optional[float]] = ContextVar("deadline_at", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Levée sans appel réseau quand l'échéance du run est dépassée.
+    Hérite de Timeout: les outils la traitent comme un délai dépassé (fallback immédiat)."""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Fixe une échéance à maintenant + seconds (une échéance englobante plus proche est conservée)"""
+    if not seconds or seconds <= 0:
+        yield
+        return
+
+    at = time.monotonic() + seconds
+    current = _deadline_at.get()
+    token = _deadline_at.set(at if current is None else min(at, current))
+    try:
+        yield
+    finally:
+        _deadline_at.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Secondes restantes avant l'échéance (peut être négatif), None si aucune échéance"""
+    at = _deadline_at.get()
+    return None if at is None else at - time.monotonic()
+
+
+def bounded_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Timeout d'un appel borné au temps restant. Lève DeadlineExceeded si l'échéance est passée"""
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded(f"Échéance du run dépassée de {-left:.1f}s")
+    return left if timeout is None else min(timeout, left)
@@ -0,0 +1,141 @@
+"""
+Post-traitement des vidéos TikTok: dédoublonnage inter-mots-clés, taux d'engagement
+normalisés et vélocité (vues/jour) calculés en une passe vectorisée, puis top-K compact.
+
+Le classement est fait ici, en code: le LLM ne reçoit que les K meilleures vidéos,
+avec des métriques déjà calculées au lieu des compteurs bruts.
+"""
+
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+
+MIN_AGE_DAYS = 1 / 24  # Une vidéo d'il y a 10 minutes ne doit pas avoir une vélocité infinie
+
+# Poids du trend_score (somme = 1), appliqués aux rangs percentiles de chaque métrique
+VELOCITY_WEIGHT = 0.45
+ENGAGEMENT_RATE_WEIGHT = 0.30
+SHARE_RATE_WEIGHT = 0.15
+KEYWORD_SPREAD_WEIGHT = 0.10
+
+
+def video_key(video: Dict[str, Any]) -> str:
+    return str(video.get("video_id") or video.get("aweme_id") or video.get("url") or "")
+
+
+def dedupe_videos(
+    videos: Iterable[Dict[str, Any]],
+    matched_keywords: Optional[Dict[str, Set[str]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Une entrée par video_id/aweme_id (la copie la plus vue), avec la liste des mots-clés
+    qui l'ont remontée. matched_keywords complète avec les copies déjà écartées en amont.
+    """
+    unique: Dict[str, Dict[str, Any]] = {}
+    keywords: Dict[str, Set[str]] = {}
+
+    for video in videos:
+        key = video_key(video)
+        if not key:
+            continue
+        keywords.setdefault(key, set()).add(video.get("keyword", ""))
+        if key not in unique or video.get("engagement", 0) > unique[key].get("engagement", 0):
+            unique[key] = video
+
+    deduped = []
+    for key, video in unique.items():
+        found_by = keywords[key] | (matched_keywords or {}).get(key, set())
+        deduped.append({**video, "keywords": sorted(k for k in found_by if k)})
+    return deduped
+
+
+def _percentile_rank(values: np.ndarray) -> np.ndarray:
+    """0.0 pour la plus petite valeur, 1.0 pour la plus grande (ex aequo = rang moyen)"""
+    if values.size <= 1:
+        return np.full(values.shape, 0.5)
+    ordered = np.sort(values)
+    low = np.searchsorted(ordered, values, side="left")
+    high = np.searchsorted(ordered, values, side="right") - 1
+    return (low + high) / 2 / (values.size - 1)
+
+
+def score_videos(videos: List[Dict[str, Any]], now: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """Métriques normalisées de toutes les vidéos en une passe (tableaux alignés sur `videos`)"""
+    now = now or time.time()
+
+    plays = np.array([v.get("engagement", 0) or 0 for v in videos], dtype=float)
+    likes = np.array([v.get("likes", 0) or 0 for v in videos], dtype=float)
+    shares = np.array([v.get("shares", 0) or 0 for v in videos], dtype=float)
+    comments = np.array([v.get("comments", 0) or 0 for v in videos], dtype=float)
+    created = np.array([v.get("create_time", 0) or 0 for v in videos], dtype=float)
+    spread = np.array([len(v.get("keywords") or [v.get("keyword")]) for v in videos], dtype=float)
+
+    safe_plays = np.maximum(plays, 1.0)
+    like_rate = likes / safe_plays
+    share_rate = shares / safe_plays
+    comment_rate = comments / safe_plays
+    engagement_rate = (likes + shares + comments) / safe_plays
+
+    # create_time inconnu: âge inconnu, vélocité = 0 (pas de bonus)
+    known_age = created > 0
+    age_days = np.where(known_age, np.maximum((now - created) / 86400, MIN_AGE_DAYS), np.nan)
+    views_per_day = np.where(known_age, plays / np.where(known_age, age_days, 1.0), 0.0)
+
+    trend_score = 100 * (
+        VELOCITY_WEIGHT * _percentile_rank(np.log1p(views_per_day))
+        + ENGAGEMENT_RATE_WEIGHT * _percentile_rank(engagement_rate)
+        + SHARE_RATE_WEIGHT * _percentile_rank(share_rate)
+        + KEYWORD_SPREAD_WEIGHT * _percentile_rank(spread)
+    )
+
+    return {
+        "like_rate": like_rate,
+        "share_rate": share_rate,
+        "comment_rate": comment_rate,
+        "engagement_rate": engagement_rate,
+        "age_days": age_days,
+        "views_per_day": views_per_day,
+        "trend_score": trend_score,
+    }
+
+
+def top_videos(
+    videos: Iterable[Dict[str, Any]],
+    k: int = 10,
+    matched_keywords: Optional[Dict[str, Set[str]]] = None,
+    now: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Dédoublonne, score et retourne les K meilleures vidéos au format compact (pour le prompt)"""
+    unique = dedupe_videos(videos, matched_keywords)
+    if not unique:
+        return []
+
+    metrics = score_videos(unique, now)
+    order = np.argsort(-metrics["trend_score"], kind="stable")[:k]
+
+    compact = []
+    for rank, idx in enumerate(order, start=1):
+        video = unique[idx]
+        age = metrics["age_days"][idx]
+        compact.append({
+            "rank": rank,
+            "trend_score": round(float(metrics["trend_score"][idx]), 1),
+            "title": video.get("title", ""),
+            "url": video.get("url", ""),
+            "video_id": video_key(video),
+            "keywords": video["keywords"],
+            "engagement": int(video.get("engagement", 0) or 0),
+            "likes": int(video.get("likes", 0) or 0),
+            "comments": int(video.get("comments", 0) or 0),
+            "shares": int(video.get("shares", 0) or 0),
+            "engagement_rate": round(float(metrics["engagement_rate"][idx]), 4),
+            "like_rate": round(float(metrics["like_rate"][idx]), 4),
+            "share_rate": round(float(metrics["share_rate"][idx]), 4),
+            "comment_rate": round(float(metrics["comment_rate"][idx]), 4),
+            "views_per_day": round(float(metrics["views_per_day"][idx]), 1),
+            "age_days": None if np.isnan(age) else round(float(age), 1),
+            "author": (video.get("author") or {}).get("unique_id", ""),
+        })
+    return compact
@@ -0,0 +1,231 @@
+"""
+Historique des métriques TikTok: un snapshot par vidéo et par hashtag à chaque run,
+pour mesurer la croissance réelle (vues/jour entre deux passages) au lieu de la
+faire deviner au LLM à partir d'un seul relevé.
+"""
+
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.config import settings
+
+
+HASHTAG_PATTERN = re.compile(r"#(\w+)", re.UNICODE)
+
+# Premier et dernier snapshot de chaque vidéo dans la fenêtre [since, now]; video_filter restreint
+# la fenêtre aux vidéos demandées (clé primaire (video_id, captured_at): coût indépendant de l'historique)
+_VIDEO_GROWTH_CTE = """
+    WITH snapshot_window AS (
+        SELECT video_id, captured_at, plays, likes, shares, comments,
+               ROW_NUMBER() OVER (PARTITION BY video_id ORDER BY captured_at ASC) AS first_rank,
+               ROW_NUMBER() OVER (PARTITION BY video_id ORDER BY captured_at DESC) AS last_rank
+        FROM video_snapshots
+        WHERE captured_at >= ? {video_filter}
+    ),
+    growth AS (
+        SELECT l.video_id,
+               f.captured_at AS first_seen, l.captured_at AS last_seen,
+               f.plays AS first_plays, l.plays AS last_plays,
+               (l.plays - f.plays) * 86400.0 / (l.captured_at - f.captured_at) AS plays_per_day,
+               (l.likes - f.likes) * 86400.0 / (l.captured_at - f.captured_at) AS likes_per_day,
+               (l.shares - f.shares) * 86400.0 / (l.captured_at - f.captured_at) AS shares_per_day
+        FROM snapshot_window f
+        JOIN snapshot_window l ON l.video_id = f.video_id AND l.last_rank = 1
+        WHERE f.first_rank = 1 AND l.captured_at > f.captured_at
+    )
+"""
+
+
+def extract_hashtags(text: str) -> List[str]:
+    return sorted({tag.lower() for tag in HASHTAG_PATTERN.findall(text or "")})
+
+
+class EngagementHistory:
+    """Séries temporelles SQLite des snapshots vidéo / hashtag, indexées pour les requêtes par plage de dates"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or settings.ENGAGEMENT_HISTORY_PATH
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                title TEXT,
+                url TEXT,
+                author TEXT,
+                create_time INTEGER,
+                first_seen REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS video_snapshots (
+                video_id TEXT NOT NULL,
+                captured_at REAL NOT NULL,
+                plays INTEGER NOT NULL,
+                likes INTEGER NOT NULL,
+                shares INTEGER NOT NULL,
+                comments INTEGER NOT NULL,
+                PRIMARY KEY (video_id, captured_at)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS video_hashtags (
+                hashtag TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                PRIMARY KEY (hashtag, video_id)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS hashtag_snapshots (
+                hashtag TEXT NOT NULL,
+                captured_at REAL NOT NULL,
+                video_count INTEGER NOT NULL,
+                total_plays INTEGER NOT NULL,
+                total_likes INTEGER NOT NULL,
+                total_shares INTEGER NOT NULL,
+                PRIMARY KEY (hashtag, captured_at)
+            )
+        """)
+        # Requêtes "sur les N derniers jours": plage sur captured_at d'abord
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_snapshots_time ON video_snapshots (captured_at, video_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_hashtag_snapshots_time ON hashtag_snapshots (captured_at, hashtag)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_video_hashtags_video ON video_hashtags (video_id)")
+        conn.commit()
+        conn.close()
+
+    def record(self, videos: Iterable[Dict[str, Any]], captured_at: Optional[float] = None) -> int:
+        """Enregistre un snapshot de chaque vidéo (format tools.tiktok_scraper) et de ses hashtags"""
+        captured_at = captured_at or time.time()
+        video_rows, snapshot_rows, tag_rows = [], [], []
+        hashtag_totals: Dict[str, List[int]] = {}
+
+        for video in videos:
+            video_id = str(video.get("video_id") or video.get("aweme_id") or "")
+            if not video_id:
+                continue
+            counters = [int(video.get(key, 0) or 0) for key in ("engagement", "likes", "shares", "comments")]
+            author = video.get("author")
+            video_rows.append((
+                video_id,
+                video.get("title", ""),
+                video.get("url", ""),
+                author.get("unique_id", "") if isinstance(author, dict) else (author or ""),
+                int(video.get("create_time", 0) or 0),
+                captured_at,
+            ))
+            snapshot_rows.append((video_id, captured_at, *counters))
+
+            for tag in extract_hashtags(video.get("title", "")):
+                tag_rows.append((tag, video_id))
+                totals = hashtag_totals.setdefault(tag, [0, 0, 0, 0])
+                totals[0] += 1
+                totals[1] += counters[0]
+                totals[2] += counters[1]
+                totals[3] += counters[2]
+
+        if not snapshot_rows:
+            return 0
+
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.executemany(
+                """
+                INSERT INTO videos (video_id, title, url, author, create_time, first_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(video_id) DO UPDATE SET title = excluded.title, url = excluded.url
+                """,
+                video_rows,
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO video_snapshots VALUES (?, ?, ?, ?, ?, ?)", snapshot_rows
+            )
+            conn.executemany("INSERT OR IGNORE INTO video_hashtags VALUES (?, ?)", tag_rows)
+            conn.executemany(
+                "INSERT OR REPLACE INTO hashtag_snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                [(tag, captured_at, *totals) for tag, totals in hashtag_totals.items()],
+            )
+        conn.close()
+        return len(snapshot_rows)
+
+    def growth_for(self, video_ids: Iterable[str], days: float = 7) -> Dict[str, Dict[str, float]]:
+        """Croissance (par jour) des vidéos demandées sur les N derniers jours, si au moins 2 snapshots"""
+        wanted = sorted(set(video_ids))
+        if not wanted:
+            return {}
+        return {row["video_id"]: row for row in self._video_growth(days, video_ids=wanted)}
+
+    def _video_growth(
+        self, days: float, limit: Optional[int] = None, video_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        video_filter = "AND video_id IN (SELECT value FROM json_each(?))" if video_ids is not None else ""
+        params = [time.time() - days * 86400]
+        if video_ids is not None:
+            params.append(json.dumps(video_ids))
+        if limit:
+            params.append(limit)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            _VIDEO_GROWTH_CTE.format(video_filter=video_filter) + f"""
+            SELECT g.*, v.title, v.url, v.author
+            FROM growth g JOIN videos v ON v.video_id = g.video_id
+            ORDER BY g.plays_per_day DESC
+            {"LIMIT ?" if limit else ""}
+            """,
+            params,
+        ).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def fastest_growing(self, days: float = 7, kind: str = "video", limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Vidéos ou hashtags dont les vues croissent le plus vite sur les N derniers jours.
+        Hashtag: somme des vues/jour de ses vidéos suivies + évolution du nombre de vidéos remontées.
+        """
+        if kind == "video":
+            return [_round_rates(row) for row in self._video_growth(days, limit)]
+        if kind != "hashtag":
+            raise ValueError(f"kind must be 'video' or 'hashtag', got {kind!r}")
+
+        since = time.time() - days * 86400
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(
+            _VIDEO_GROWTH_CTE.format(video_filter="") + """
+            , tag_window AS (
+                SELECT hashtag, video_count, captured_at,
+                       ROW_NUMBER() OVER (PARTITION BY hashtag ORDER BY captured_at ASC) AS first_rank,
+                       ROW_NUMBER() OVER (PARTITION BY hashtag ORDER BY captured_at DESC) AS last_rank
+                FROM hashtag_snapshots
+                WHERE captured_at >= ?
+            )
+            SELECT t.hashtag,
+                   COUNT(g.video_id) AS tracked_videos,
+                   SUM(g.plays_per_day) AS plays_per_day,
+                   SUM(g.likes_per_day) AS likes_per_day,
+                   SUM(g.shares_per_day) AS shares_per_day,
+                   (SELECT video_count FROM tag_window w WHERE w.hashtag = t.hashtag AND w.first_rank = 1) AS first_video_count,
+                   (SELECT video_count FROM tag_window w WHERE w.hashtag = t.hashtag AND w.last_rank = 1) AS last_video_count
+            FROM video_hashtags t
+            JOIN growth g ON g.video_id = t.video_id
+            GROUP BY t.hashtag
+            ORDER BY plays_per_day DESC
+            LIMIT ?
+            """,
+            (since, since, limit),
+        ).fetchall()
+        conn.close()
+        return [_round_rates(dict(row)) for row in rows]
+
+
+def _round_rates(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: round(value, 1) if isinstance(value, float) else value for key, value in row.items()}
@@ -0,0 +1,114 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.config import settings
+
+
+# Tranches de quantité: le fret CJ est quasi identique à l'intérieur d'une tranche
+QUANTITY_BRACKETS = (1, 2, 5, 10, 50, 100)
+
+
+def quantity_bracket(quantity: int) -> int:
+    """Plus grande borne de tranche <= quantity (1, 2-4 -> 2, 5-9 -> 5, ...)"""
+    bracket = QUANTITY_BRACKETS[0]
+    for bound in QUANTITY_BRACKETS:
+        if quantity >= bound:
+            bracket = bound
+    return bracket
+
+
+class FreightCache:
+    """Cache SQLite des devis de fret, clé (pid, pays, tranche de quantité), avec TTL"""
+
+    def __init__(self, db_path: str = None, ttl_hours: int = None):
+        self.db_path = db_path or settings.FREIGHT_CACHE_PATH
+        self.ttl_seconds = (ttl_hours if ttl_hours is not None else settings.FREIGHT_CACHE_TTL_HOURS) * 3600
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS freight_quotes (
+                pid TEXT NOT NULL,
+                country TEXT NOT NULL,
+                quantity_bracket INTEGER NOT NULL,
+                shipping_cost REAL NOT NULL,
+                delivery_days INTEGER,
+                shipping_method TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (pid, country, quantity_bracket)
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def get(self, pid: str, country: str, quantity: int = 1) -> Optional[Dict[str, Any]]:
+        """Devis en cache encore valide, sinon None"""
+        return self.get_many([(pid, country)], quantity).get((pid, country))
+
+    def get_many(self, keys: Iterable[Tuple[str, str]], quantity: int = 1) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Devis valides pour plusieurs (pid, pays) en une seule requête"""
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        bracket = quantity_bracket(quantity)
+        min_fetched_at = time.time() - self.ttl_seconds
+        pids = sorted({pid for pid, _ in keys})
+
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute(
+            f"""
+            SELECT pid, country, shipping_cost, delivery_days, shipping_method
+            FROM freight_quotes
+            WHERE quantity_bracket = ? AND fetched_at >= ? AND pid IN ({",".join("?" * len(pids))})
+            """,
+            (bracket, min_fetched_at, *pids),
+        )
+        wanted = set(keys)
+        quotes = {}
+        for pid, country, cost, days, method in cursor.fetchall():
+            if (pid, country) in wanted:
+                quotes[(pid, country)] = {
+                    "shipping_cost": cost,
+                    "delivery_days": days,
+                    "shipping_method": method,
+                    "cached": True,
+                }
+        conn.close()
+        return quotes
+
+    def put(self, pid: str, country: str, quantity: int, quote: Dict[str, Any]):
+        """Enregistre un devis réel (ne jamais y mettre d'estimation de secours)"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO freight_quotes
+            (pid, country, quantity_bracket, shipping_cost, delivery_days, shipping_method, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                pid,
+                country,
+                quantity_bracket(quantity),
+                float(quote["shipping_cost"]),
+                quote.get("delivery_days"),
+                quote.get("shipping_method"),
+                time.time(),
+            ),
+        )
+        conn.commit()
+        conn.close()
+
+    def purge_expired(self) -> int:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute(
+            "DELETE FROM freight_quotes WHERE fetched_at < ?", (time.time() - self.ttl_seconds,)
+        )
+        conn.commit()
+        deleted = cursor.rowcount
+        conn.close()
+        return deleted
@@ -0,0 +1,85 @@
+"""
+Pool de profils d'en-têtes (User-Agent + Accept-Language) construit une seule fois, au premier
+appel de headers_for (pas à l'import: fake_useragent peut lire ses données ou échouer).
+Remplace fake_useragent.UserAgent() instancié à chaque appel d'outil.
+"""
+
+import itertools
+import threading
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+
+POOL_SIZE = 24
+
+# Base statique: le pool fonctionne même si fake_useragent échoue ou n'a pas de données
+STATIC_USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36 Edg/123.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14.4; rv:125.0) Gecko/20100101 Firefox/125.0",
+]
+
+ACCEPT_LANGUAGES = [
+    "en-US,en;q=0.9",
+    "en-US,en;q=0.8",
+    "en-GB,en;q=0.9,en-US;q=0.8",
+    "en-US,en;q=0.9,fr;q=0.7",
+]
+
+
+def _load_user_agents() -> List[str]:
+    """Agents statiques + un échantillon fake_useragent (chargé une seule fois, au premier usage)"""
+    agents = list(STATIC_USER_AGENTS)
+    try:
+        from fake_useragent import UserAgent
+
+        ua = UserAgent()
+        for _ in range(POOL_SIZE):
+            agents.append(ua.random)
+    except Exception as e:
+        print(f"[HEADERS] fake_useragent indisponible, pool statique utilisé: {e}")
+    return list(dict.fromkeys(agents))
+
+
+def _build_profiles(user_agents: List[str]) -> List[Dict[str, str]]:
+    return [
+        {
+            "User-Agent": user_agent,
+            "Accept-Language": ACCEPT_LANGUAGES[i % len(ACCEPT_LANGUAGES)],
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        }
+        for i, user_agent in enumerate(user_agents)
+    ]
+
+
+_profiles: Optional[List[Dict[str, str]]] = None
+_cycles: Dict[str, Iterator[int]] = {}
+_lock = threading.Lock()
+
+
+def get_profiles() -> List[Dict[str, str]]:
+    """Pool de profils, construit au premier appel (pool statique si fake_useragent échoue)"""
+    global _profiles
+    if _profiles is None:
+        with _lock:
+            if _profiles is None:
+                _profiles = _build_profiles(_load_user_agents())
+    return _profiles
+
+
+def headers_for(host_or_url: str) -> Dict[str, str]:
+    """Profil suivant (round-robin) pour cet hôte. Aucune I/O après le premier appel."""
+    host = urlparse(host_or_url).netloc if "://" in host_or_url else host_or_url
+    profiles = get_profiles()
+    with _lock:
+        if host not in _cycles:
+            # Décalage par hôte pour ne pas envoyer le même profil à tous les sites en même temps
+            offset = sum(host.encode()) % len(profiles)
+            _cycles[host] = itertools.cycle(list(range(offset, len(profiles))) + list(range(offset)))
+        index = next(_cycles[host])
+    return dict(profiles[index])
@@ -0,0 +1,199 @@
+"""
+Point d'entrée HTTP commun aux outils de tools/.
+Chaque requête passe par le disjoncteur de son hôte (utils.circuit_breaker),
+son timeout est borné par l'échéance du run (utils.deadline) et, sur demande,
+une lecture (GET) est doublée (hedging) si la réponse tarde au-delà du p95 de l'hôte.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from utils.circuit_breaker import breaker_for
+from utils.config import settings
+from utils.deadline import bounded_timeout, remaining
+
+
+# Réponses qui indiquent un upstream en difficulté (blocage, quota, panne)
+FAILURE_STATUS_CODES = {403, 429, 500, 502, 503, 504}
+
+# Hedging: délai avant la requête de secours = p95 des latences récentes de l'hôte
+LATENCY_WINDOW = 50
+HEDGE_MIN_SAMPLES = 10  # En dessous, pas de p95 fiable: pas de requête de secours
+HEDGE_MIN_DELAY_SECONDS = 0.2
+HEDGE_METHODS = {"GET"}  # Requêtes idempotentes uniquement
+
+# APIs facturées à la requête: doubler un appel double son coût (HEDGE_METERED_REQUESTS pour l'autoriser)
+METERED_HOSTS = {"api.rainforestapi.com"}
+
+_latencies: Dict[str, Deque[float]] = {}
+_hedge_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc or url
+
+
+def _record_latency(host: str, seconds: float):
+    with _stats_lock:
+        _latencies.setdefault(host, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def _count_hedge(host: str, key: str):
+    with _stats_lock:
+        stats = _hedge_stats.setdefault(host, {"hedged": 0, "hedge_wins": 0})
+        stats[key] += 1
+
+
+def hedge_delay(host_or_url: str) -> Optional[float]:
+    """
+    Délai avant d'envoyer la requête de secours: p95 des dernières latences de l'hôte
+    (None tant qu'il y a moins de HEDGE_MIN_SAMPLES mesures)
+    """
+    with _stats_lock:
+        samples = sorted(_latencies.get(_host(host_or_url), ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return max(p95, HEDGE_MIN_DELAY_SECONDS)
+
+
+def _may_hedge(method: str, url: str) -> bool:
+    if method.upper() not in HEDGE_METHODS:
+        return False
+    return settings.HEDGE_METERED_REQUESTS or _host(url) not in METERED_HOSTS
+
+
+def latency_metrics() -> Dict[str, Dict[str, float]]:
+    """Latence p50/p95 et compteurs de hedging par hôte"""
+    with _stats_lock:
+        hosts = {host: sorted(samples) for host, samples in _latencies.items() if samples}
+        hedges = {host: dict(stats) for host, stats in _hedge_stats.items()}
+
+    metrics = {}
+    for host, samples in hosts.items():
+        metrics[host] = {
+            "p50_seconds": round(samples[len(samples) // 2], 3),
+            "p95_seconds": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+            "samples": len(samples),
+            **hedges.get(host, {"hedged": 0, "hedge_wins": 0}),
+        }
+    return metrics
+
+
+def _send(method: str, url: str, session: requests.Session, **kwargs) -> requests.Response:
+    started = time.monotonic()
+    response = session.request(method, url, **kwargs)
+    _record_latency(_host(url), time.monotonic() - started)
+    return response
+
+
+def _discard(future):
+    """Ferme la réponse et la session d'une tentative perdante dès qu'elle se termine"""
+    try:
+        response, session = future.result()
+    except BaseException:  # Échec ou tentative annulée avant d'avoir démarré
+        return
+    response.close()
+    session.close()
+
+
+def _hedged(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Envoie la requête; si elle n'a pas répondu après le p95 de l'hôte (et qu'il reste du temps),
+    envoie une seconde tentative identique. La première réponse arrivée gagne, l'autre est abandonnée.
+    Réservé aux requêtes idempotentes (lectures).
+    """
+    host = _host(url)
+
+    delay = hedge_delay(host)
+    if delay is None:  # Pas encore de p95 pour cet hôte: requête simple (qui alimente les mesures)
+        with requests.Session() as session:
+            return _send(method, url, session, **kwargs)
+
+    def attempt() -> Tuple[requests.Response, requests.Session]:
+        session = requests.Session()  # Une session par tentative: fermer la perdante n'affecte pas la gagnante
+        try:
+            return _send(method, url, session, **kwargs), session
+        except Exception:
+            session.close()
+            raise
+
+    executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hedge")
+    try:
+        primary = executor.submit(attempt)
+        attempts = [primary]
+
+        left = remaining()
+        if left is None or left > delay:
+            done, _ = wait(attempts, timeout=delay)
+            if not done:
+                attempts.append(executor.submit(attempt))
+                _count_hedge(host, "hedged")
+
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                response, session = future.result()
+                if future is not primary:
+                    _count_hedge(host, "hedge_wins")
+                for loser in pending:
+                    loser.cancel()
+                    loser.add_done_callback(_discard)
+                response.content  # Corps lu avant de fermer la session gagnante
+                session.close()
+                return response
+        raise error
+    finally:
+        executor.shutdown(wait=False)
+
+
+def request(method: str, url: str, hedge: bool = False, **kwargs) -> requests.Response:
+    """
+    requests.request protégé par le disjoncteur de l'hôte (lève CircuitOpenError si ouvert).
+    Le timeout est borné par l'échéance du run (lève DeadlineExceeded si elle est passée).
+    hedge=True: requête de secours après le p95 de latence de l'hôte; ignoré hors GET et, sauf
+    HEDGE_METERED_REQUESTS, pour les APIs facturées à la requête (METERED_HOSTS).
+    """
+    kwargs["timeout"] = bounded_timeout(kwargs.get("timeout"))
+
+    breaker = breaker_for(url)
+    breaker.before_call()
+
+    try:
+        if hedge and _may_hedge(method, url):
+            response = _hedged(method, url, **kwargs)
+        else:
+            with requests.Session() as session:
+                response = _send(method, url, session, **kwargs)
+
+        if response.status_code in FAILURE_STATUS_CODES:
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+        return response
+    except requests.exceptions.RequestException as e:
+        breaker.record_failure(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        # Sans effet après record_*; sinon (erreur hors réseau pendant un appel de test) libère le test
+        breaker.release_probe()
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
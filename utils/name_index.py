@@ -0,0 +1,111 @@
+"""
+Index de noms produits pour la détection de doublons: MinHash LSH sur les trigrammes de caractères.
+
+Chaque nom donne BANDS clés de bucket (ROWS_PER_BAND valeurs MinHash par bande): deux noms
+proches partagent au moins une bande avec une forte probabilité, deux noms sans rapport presque
+jamais. Une recherche = BANDS lectures indexées au lieu d'un parcours de tous les produits;
+seuls les quelques candidats retenus sont notés exactement (SequenceMatcher, comme avant).
+"""
+
+import hashlib
+import math
+import zlib
+from difflib import SequenceMatcher
+from typing import List, NamedTuple, Sequence, Set, Tuple
+
+import numpy as np
+
+
+NGRAM = 3
+# Bandes courtes (3 valeurs): une paire de ratio >= 0.8 partage presque toujours une bande, y compris
+# un mot ajouté à un nom court ("portable blender" / "portable mini blender"), au prix de plus de
+# candidats sans rapport (écartés par les bornes rapides de SequenceMatcher). Mesure: bench_duplicate_check.py
+BANDS = 32
+ROWS_PER_BAND = 3
+MAX_CANDIDATES = 200  # Candidats notés exactement, classés par nombre de bandes communes
+
+# Stocké avec l'index: tout changement de paramètres impose une reconstruction
+INDEX_VERSION = f"minhash-{NGRAM}g-{BANDS}x{ROWS_PER_BAND}-v1"
+
+_PRIME = 4294967311  # Premier > 2^32 (les trigrammes sont hachés sur 32 bits)
+
+
+def _coefficients(label: str) -> np.ndarray:
+    # Dérivés de hashes fixes (et non d'un RNG) : les buckets persistés ne doivent jamais changer
+    values = [
+        int.from_bytes(hashlib.blake2b(f"{label}-{i}".encode(), digest_size=4).digest(), "little") & 0x7FFFFFFF
+        for i in range(BANDS * ROWS_PER_BAND)
+    ]
+    return np.array(values, dtype=np.uint64)
+
+
+_A = _coefficients("minhash-a") | np.uint64(1)
+_B = _coefficients("minhash-b")
+_BAND_MIX = (_coefficients("minhash-band")[:ROWS_PER_BAND] << np.uint64(32)) | np.uint64(1)
+_BAND_IDS = np.arange(BANDS, dtype=np.int64) << 32
+
+
+class NameMatch(NamedTuple):
+    product_id: str
+    name: str
+    similarity: float
+
+
+def normalize_name(name: str) -> str:
+    return " ".join((name or "").lower().split())
+
+
+def name_ngrams(normalized: str) -> Set[str]:
+    padded = f"  {normalized} "
+    return {padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)}
+
+
+def minhash_signature(normalized: str) -> np.ndarray:
+    hashes = np.fromiter((zlib.crc32(gram.encode()) for gram in name_ngrams(normalized)), dtype=np.uint64)
+    # (a*x + b) mod p pour les BANDS*ROWS_PER_BAND permutations à la fois; a, b < 2^31 et x < 2^32: pas de débordement
+    return ((np.outer(hashes, _A) + _B) % np.uint64(_PRIME)).min(axis=0)
+
+
+def name_buckets(normalized: str) -> List[int]:
+    """Une clé entière par bande: numéro de bande (bits hauts) + hash des valeurs MinHash de la bande"""
+    if not normalized:
+        return []
+    bands = minhash_signature(normalized).reshape(BANDS, ROWS_PER_BAND)
+    # Hash des ROWS_PER_BAND valeurs de chaque bande, toutes bandes à la fois (débordement uint64 voulu)
+    mixed = np.bitwise_xor.reduce(bands * _BAND_MIX, axis=1) >> np.uint64(32)
+    return (_BAND_IDS | mixed.astype(np.int64)).tolist()
+
+
+def length_bounds(length: int, threshold: float) -> Tuple[int, int]:
+    """
+    Longueurs compatibles avec un ratio SequenceMatcher >= threshold:
+    ratio = 2M / (la + lb) <= 2 min(la, lb) / (la + lb).
+    """
+    if threshold <= 0:
+        return 0, 1 << 31
+    # Marge d'arrondi: 24 * 1.2 / 0.8 vaut 35.999... en flottant, or ratio(24, 36) = 0.8 exactement
+    return (
+        math.ceil(length * threshold / (2 - threshold) - 1e-9),
+        math.floor(length * (2 - threshold) / threshold + 1e-9),
+    )
+
+
+def name_similarity(normalized_a: str, normalized_b: str) -> float:
+    return SequenceMatcher(None, normalized_a, normalized_b).ratio()
+
+
+def similarities_above(normalized: str, candidates: Sequence[str], threshold: float) -> List[Tuple[int, float]]:
+    """
+    (position, ratio) des candidats de ratio >= threshold, même ratio que name_similarity;
+    les bornes supérieures rapides (real_quick_ratio, quick_ratio) écartent la plupart des
+    candidats avant le calcul complet
+    """
+    matcher = SequenceMatcher(None, normalized)
+    similar = []
+    for position, candidate in enumerate(candidates):
+        matcher.set_seq2(candidate)
+        if matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold:
+            ratio = matcher.ratio()
+            if ratio >= threshold:
+                similar.append((position, ratio))
+    return similar
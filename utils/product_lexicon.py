@@ -0,0 +1,254 @@
+"""
+Lexique produits / catégories compilé en UNE seule regex arborescente (préfixes communs
+factorisés, façon Aho-Corasick mais sans dépendance).
+
+Un seul passage finditer trouve toutes les mentions d'un texte (titre, description,
+hashtags collés comme #ledlights compris); la forme compacte du texte reconnu donne l'alias.
+Chaque produit retenu reçoit un score de confiance: au-delà du seuil, ProductExtractorTool
+n'a pas besoin d'appeler le LLM.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from models.product_models import ProductCategory
+
+
+# produit canonique -> (catégorie ProductCategory, alias). Alias en minuscules, mots séparés par des espaces:
+# ils matchent aussi collés / avec tirets ("led strip" -> "ledstrip", "led-strip") et au pluriel.
+# Pas d'alias générique qui désigne tout un type d'objet ("water bottle", "mini fan", "phone holder"):
+# il suffirait à dépasser MIN_CONFIDENCE et écarterait le LLM sur des titres ambigus.
+PRODUCT_LEXICON: Dict[str, Tuple[ProductCategory, List[str]]] = {
+    "LED Strip Lights": (ProductCategory.HOME_GARDEN, ["led strip lights", "led strip", "rgb lights", "rgb strip", "led light strip"]),
+    "Sunset Projection Lamp": (ProductCategory.HOME_GARDEN, ["sunset lamp", "sunset projection lamp", "projection lamp"]),
+    "Galaxy Projector": (ProductCategory.HOME_GARDEN, ["galaxy projector", "star projector", "galaxy light"]),
+    "Moon Lamp": (ProductCategory.HOME_GARDEN, ["moon lamp"]),
+    "Motion Sensor Lights": (ProductCategory.HOME_GARDEN, ["motion sensor light", "motion sensor lights", "closet light", "under cabinet light"]),
+    "Cable Organizer": (ProductCategory.HOME_GARDEN, ["cable organizer", "cable management box", "cord organizer"]),
+    "Drawer Organizer": (ProductCategory.HOME_GARDEN, ["drawer organizer", "drawer dividers"]),
+    "Electric Spin Scrubber": (ProductCategory.HOME_GARDEN, ["spin scrubber", "electric scrubber", "power scrubber"]),
+    "Lint Remover": (ProductCategory.HOME_GARDEN, ["lint remover", "fabric shaver", "lint roller"]),
+    "Automatic Soap Dispenser": (ProductCategory.HOME_GARDEN, ["soap dispenser", "automatic soap dispenser", "touchless soap dispenser"]),
+    "Humidifier": (ProductCategory.HOME_GARDEN, ["humidifier", "mini humidifier", "aroma diffuser", "essential oil diffuser"]),
+    "Portable Blender": (ProductCategory.HOME_GARDEN, ["portable blender", "mini blender", "personal blender"]),
+    "Mini Waffle Maker": (ProductCategory.HOME_GARDEN, ["mini waffle maker", "waffle maker"]),
+    "Air Fryer Liners": (ProductCategory.HOME_GARDEN, ["air fryer liners", "air fryer liner", "air fryer paper"]),
+    "Vegetable Chopper": (ProductCategory.HOME_GARDEN, ["vegetable chopper", "veggie chopper", "food chopper", "onion chopper"]),
+    "Digital Kitchen Scale": (ProductCategory.HOME_GARDEN, ["kitchen scale", "digital kitchen scale", "food scale"]),
+    "Silicone Food Bags": (ProductCategory.HOME_GARDEN, ["silicone food bags", "reusable silicone bags", "silicone bags", "reusable food bags"]),
+    "Electric Milk Frother": (ProductCategory.HOME_GARDEN, ["milk frother", "electric frother", "coffee frother"]),
+    "Ice Roller": (ProductCategory.BEAUTY, ["ice roller", "facial ice roller", "face roller"]),
+    "Jade Roller": (ProductCategory.BEAUTY, ["jade roller", "gua sha"]),
+    "Cordless Hair Straightener": (ProductCategory.BEAUTY, ["hair straightener", "cordless straightener", "flat iron", "straightening brush"]),
+    "Heatless Curling Rod": (ProductCategory.BEAUTY, ["heatless curls", "heatless curling rod", "heatless curler", "curling ribbon"]),
+    "Hair Dryer Brush": (ProductCategory.BEAUTY, ["hair dryer brush", "blow dryer brush", "hot air brush"]),
+    "Makeup Organizer": (ProductCategory.BEAUTY, ["makeup organizer", "cosmetic organizer", "makeup storage"]),
+    "Blackhead Remover": (ProductCategory.BEAUTY, ["blackhead remover", "pore vacuum", "pore cleaner"]),
+    "Heated Eye Massager": (ProductCategory.BEAUTY, ["eye massager", "heated eye mask", "heated eye massager"]),
+    "Posture Corrector": (ProductCategory.SPORTS, ["posture corrector", "posture brace"]),
+    "Massage Gun": (ProductCategory.SPORTS, ["massage gun", "percussion massager", "mini massage gun"]),
+    "Wireless Earbuds": (ProductCategory.ELECTRONICS, ["wireless earbuds", "bluetooth earbuds", "earbuds"]),
+    "Bluetooth Speaker": (ProductCategory.ELECTRONICS, ["bluetooth speaker", "wireless speaker", "portable speaker", "shower speaker"]),
+    "Sleep Headphones": (ProductCategory.ELECTRONICS, ["sleep headphones", "bluetooth sleep headband", "sleep headband", "headband headphones"]),
+    "Wireless Charger": (ProductCategory.ELECTRONICS, ["wireless charger", "wireless charging pad", "charging pad", "magsafe charger"]),
+    "Power Bank": (ProductCategory.ELECTRONICS, ["power bank", "portable charger", "magnetic power bank"]),
+    "Magnetic Phone Holder": (ProductCategory.ELECTRONICS, ["magnetic phone holder", "magnetic car mount", "magnetic holder"]),
+    "Phone Stand": (ProductCategory.ELECTRONICS, ["phone stand", "desk phone stand", "phone tripod"]),
+    "Ring Light": (ProductCategory.ELECTRONICS, ["ring light", "selfie light", "selfie ring light"]),
+    "Laptop Stand": (ProductCategory.ELECTRONICS, ["laptop stand", "foldable laptop stand", "laptop riser"]),
+    "Smart Watch": (ProductCategory.ELECTRONICS, ["smart watch", "smartwatch", "fitness tracker"]),
+    "Mini Projector": (ProductCategory.ELECTRONICS, ["mini projector", "portable projector", "pocket projector"]),
+    "Portable Neck Fan": (ProductCategory.ELECTRONICS, ["neck fan", "portable neck fan", "bladeless neck fan"]),
+    "Car Seat Gap Filler": (ProductCategory.ACCESSORIES, ["car seat gap filler", "seat gap filler", "car gap organizer"]),
+    "Car Vacuum": (ProductCategory.ACCESSORIES, ["car vacuum"]),
+    "Smart Water Bottle": (ProductCategory.ACCESSORIES, ["smart water bottle", "motivational water bottle"]),
+    "Crossbody Bag": (ProductCategory.FASHION, ["crossbody bag", "belt bag", "sling bag"]),
+    "Claw Clips": (ProductCategory.FASHION, ["claw clip", "hair claw"]),
+    "Pet Hair Remover": (ProductCategory.PETS, ["pet hair remover", "pet hair roller", "fur remover", "dog hair remover"]),
+    "Dog Paw Cleaner": (ProductCategory.PETS, ["paw cleaner", "dog paw cleaner", "paw washer"]),
+    "Cat Water Fountain": (ProductCategory.PETS, ["cat water fountain", "pet fountain", "water fountain for cats"]),
+    "Lick Mat": (ProductCategory.PETS, ["lick mat", "licking mat"]),
+    "Interactive Cat Toy": (ProductCategory.PETS, ["cat toy", "interactive cat toy", "cat laser"]),
+}
+
+# Modificateur + nom (ex: "portable juicer"): mention plausible mais hors lexique
+GENERIC_PRODUCT_PATTERN = r"(?:smart|mini|portable|wireless|magnetic|electric|rechargeable|foldable)\s+[a-z]{3,}"
+GENERIC_CATEGORY = ProductCategory.OTHER.value
+
+MIN_CONFIDENCE = 0.6  # En dessous, ProductExtractorTool passe la main au LLM
+
+
+@dataclass
+class ProductMention:
+    product_name: str
+    category: str
+    alias: str
+    start: int
+    in_hashtag: bool
+    generic: bool = False
+
+
+@dataclass
+class ProductMatch:
+    product_name: str
+    category: str
+    confidence: float
+    mentions: int
+    aliases: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "product_name": self.product_name,
+            "category": self.category,
+            "confidence": self.confidence,
+            "mentions": self.mentions,
+            "keywords": self.aliases,
+        }
+
+
+_SEPARATOR = "\0"  # Espace d'un alias: séparateur optionnel dans le texte
+_SEPARATOR_PATTERN = r"[\s\-_]*"
+_SEPARATORS = re.compile(r"[\s\-_]+")
+
+
+def _alias_variants(alias: str) -> List[str]:
+    """Formes reconnues d'un alias: telle quelle + singulier / pluriel du dernier mot ("lights" / "light")"""
+    base = _SEPARATOR.join(alias.split())
+    if base.endswith("ss"):
+        return [base, base + "es"]
+    if base.endswith("s"):
+        return [base, base[:-1]]
+    return [base, base + "s", base + "es"]
+
+
+def _compact(text: str) -> str:
+    """Clé de recherche d'une mention: minuscules, sans séparateurs ("LED-Strip" -> "ledstrip")"""
+    return _SEPARATORS.sub("", text.lower())
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Regex arborescente (préfixes communs factorisés): à chaque position, le moteur ne
+    teste que les branches qui commencent par le bon caractère au lieu des ~200 alias.
+    Quantificateurs gloutons: la forme la plus longue gagne, repli sur la plus courte.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # Fin de mot
+
+    def render(node: Dict[str, dict]) -> str:
+        terminal = "" in node
+        branches = [
+            (_SEPARATOR_PATTERN if char == _SEPARATOR else re.escape(char)) + render(child)
+            for char, child in sorted(node.items())
+            if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not terminal else "(?:" + "|".join(branches) + ")"
+        return body + "?" if terminal else body
+
+    return render(trie)
+
+
+class ProductLexicon:
+    """Lexique extensible; la regex combinée est (re)compilée à la demande après chaque ajout"""
+
+    def __init__(self, entries: Dict[str, Tuple[str, List[str]]] = None, include_generic: bool = True):
+        self._entries: Dict[str, Tuple[str, List[str]]] = {}
+        self._include_generic = include_generic
+        self._regex: Optional[re.Pattern] = None
+        self._aliases: Dict[str, Tuple[str, str, str]] = {}
+        for name, (category, aliases) in (entries if entries is not None else PRODUCT_LEXICON).items():
+            self.add(name, category, aliases)
+
+    def add(self, product_name: str, category: str, aliases: List[str]):
+        category = getattr(category, "value", category)  # ProductCategory -> "home_garden"
+        current_category, current_aliases = self._entries.get(product_name, (category, []))
+        merged = list(dict.fromkeys(current_aliases + [a.lower().strip() for a in aliases] + [product_name.lower()]))
+        self._entries[product_name] = (category or current_category, merged)
+        self._regex = None
+
+    def _compile(self) -> re.Pattern:
+        # Clé compacte (sans séparateurs) -> (produit, catégorie, alias); alias les plus longs prioritaires
+        alternatives = sorted(
+            ((alias, name, category) for name, (category, aliases) in self._entries.items() for alias in aliases),
+            key=lambda item: -len(item[0]),
+        )
+        self._aliases, variants = {}, []
+        for alias, name, category in alternatives:
+            for variant in _alias_variants(alias):
+                variants.append(variant)
+                self._aliases.setdefault(variant.replace(_SEPARATOR, ""), (name, category, alias))
+
+        parts = [f"(?P<lexicon>{_trie_pattern(variants)})"]
+        if self._include_generic:
+            parts.append(f"(?P<generic>{GENERIC_PRODUCT_PATTERN})")
+        return re.compile(r"(?<![a-z0-9])(?:" + "|".join(parts) + r")(?![a-z0-9])", re.IGNORECASE)
+
+    @property
+    def regex(self) -> re.Pattern:
+        if self._regex is None:
+            self._regex = self._compile()
+        return self._regex
+
+    def mentions(self, text: str) -> List[ProductMention]:
+        """Toutes les mentions du texte, en un seul passage"""
+        found = []
+        for match in self.regex.finditer(text or ""):
+            in_hashtag = match.start() > 0 and text[match.start() - 1] == "#"
+            if match.lastgroup == "generic":
+                phrase = " ".join(match.group(0).lower().split())
+                found.append(ProductMention(phrase.title(), GENERIC_CATEGORY, phrase, match.start(), in_hashtag, generic=True))
+                continue
+            name, category, alias = self._aliases[_compact(match.group(0))]
+            found.append(ProductMention(name, category, alias, match.start(), in_hashtag))
+        return found
+
+    def match(self, text: str) -> List[ProductMatch]:
+        """Produits mentionnés, du plus au moins probable, avec une confiance 0-1"""
+        grouped: Dict[str, List[ProductMention]] = {}
+        for mention in self.mentions(text):
+            grouped.setdefault(mention.product_name, []).append(mention)
+
+        matches = []
+        for name, group in grouped.items():
+            first = group[0]
+            if first.generic:
+                confidence = 0.45  # Plausible mais non confirmé par le lexique
+            else:
+                confidence = 0.55  # Un seul mot, en hashtag seulement (#earbuds): sous MIN_CONFIDENCE, le LLM tranche
+                confidence += 0.1 * min(len(group) - 1, 2)  # Répété (titre + hashtag...)
+                confidence += 0.1 if len(first.alias.split()) > 1 else 0.0  # Alias multi-mots = moins ambigu
+                confidence += 0.05 if not all(m.in_hashtag for m in group) else 0.0  # Cité dans le texte
+            matches.append(ProductMatch(
+                product_name=name,
+                category=first.category,
+                confidence=round(min(confidence, 1.0), 2),
+                mentions=len(group),
+                aliases=list(dict.fromkeys(m.alias for m in group)),
+            ))
+
+        # Confiance décroissante, puis première apparition
+        order = {name: group[0].start for name, group in grouped.items()}
+        matches.sort(key=lambda m: (-m.confidence, order[m.product_name]))
+        return matches
+
+    def best(self, text: str) -> Optional[ProductMatch]:
+        matches = self.match(text)
+        return matches[0] if matches else None
+
+
+_default_lexicon: Optional[ProductLexicon] = None
+
+
+def get_product_lexicon() -> ProductLexicon:
+    """Lexique par défaut du process (compilé une seule fois)"""
+    global _default_lexicon
+    if _default_lexicon is None:
+        _default_lexicon = ProductLexicon()
+    return _default_lexicon
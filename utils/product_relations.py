@@ -0,0 +1,271 @@
+"""
+Schéma relationnel des produits: fournisseurs, scores, avis, marché et prix en tables
+normalisées (clé étrangère vers products.id), à côté du document JSON products.data.
+
+- Écriture: les lignes sont extraites du JSON par SQLite (json_extract / json_each), sans
+  désérialisation Python; même chemin pour save_product et pour le rattrapage des produits
+  écrits hors de ProductDatabase (bases existantes, main.py).
+- Lecture: load_products reconstruit les WinningProduct, sections relationnelles comprises.
+"""
+
+import json
+import sqlite3
+from collections import defaultdict
+from typing import Any, Dict, List, Sequence
+
+from pydantic import ValidationError
+
+from models.product_models import WinningProduct
+
+
+# Stocké dans name_index_state: tout changement de schéma impose une reconstruction des tables
+RELATIONS_VERSION = "relations-v1"
+
+RELATION_TABLES = ("suppliers", "scores", "review_analysis", "market_analysis", "pricing")
+
+SUPPLIER_COLUMNS = (
+    "platform", "product_url", "supplier_name", "price", "shipping_cost", "shipping_time_days",
+    "rating", "total_orders", "stock_available", "weight_kg", "dimensions_cm",
+)
+SCORE_COLUMNS = (
+    "trend_score", "profit_score", "competition_score", "demand_score", "quality_score",
+    "shipping_score", "overall_score", "reasoning",
+)
+REVIEW_COLUMNS = (
+    "total_reviews", "average_rating", "positive_count", "negative_count", "neutral_count",
+    "sentiment_score", "main_pros", "main_cons", "red_flags",
+)
+MARKET_COLUMNS = (
+    "niche", "target_geography", "market_size_estimate", "competition_level", "trend_direction",
+    "seasonality", "google_trends_score", "tiktok_views", "pinterest_saves", "search_volume_monthly",
+)
+PRICING_COLUMNS = (
+    "cost_price", "shipping_cost", "total_cost", "suggested_retail_price", "profit_margin_percent",
+    "profit_amount", "competitive_price_range_min", "competitive_price_range_max",
+    "recommended_geography_pricing",
+)
+
+# Listes / dictionnaires: colonnes JSON (lues telles quelles, json_each pour les filtrer en SQL)
+JSON_COLUMNS = {"main_pros", "main_cons", "red_flags", "target_geography", "recommended_geography_pricing"}
+
+# Section du document WinningProduct -> (table, colonnes)
+SECTIONS = {
+    "score": ("scores", SCORE_COLUMNS),
+    "review_analysis": ("review_analysis", REVIEW_COLUMNS),
+    "market_analysis": ("market_analysis", MARKET_COLUMNS),
+    "pricing_strategy": ("pricing", PRICING_COLUMNS),
+}
+
+# Documents sans JSON valide (lignes écrites hors ProductDatabase) et fournisseurs qui ne sont pas
+# des objets: lus comme un objet vide (json_extract échoue sur du texte non JSON)
+_DOCUMENT = "CASE WHEN json_valid(p.data) THEN p.data ELSE '{}' END"
+_SUPPLIER = "CASE WHEN s.type = 'object' THEN s.value ELSE '{}' END"
+
+
+def create_relation_tables(cursor: sqlite3.Cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS suppliers (
+            product_id TEXT NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            platform TEXT,
+            product_url TEXT,
+            supplier_name TEXT,
+            price REAL NOT NULL,
+            shipping_cost REAL,
+            shipping_time_days INTEGER,
+            rating REAL,
+            total_orders INTEGER,
+            stock_available INTEGER,
+            weight_kg REAL,
+            dimensions_cm TEXT,
+            landed_cost REAL GENERATED ALWAYS AS (CAST(price + coalesce(shipping_cost, 0) AS REAL)) VIRTUAL,
+            is_listed INTEGER NOT NULL DEFAULT 1,
+            is_best INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (product_id, position)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_suppliers_price ON suppliers(price)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_suppliers_platform ON suppliers(platform, landed_cost)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scores (
+            product_id TEXT PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+            trend_score REAL,
+            profit_score REAL,
+            competition_score REAL,
+            demand_score REAL,
+            quality_score REAL,
+            shipping_score REAL,
+            overall_score REAL,
+            reasoning TEXT
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scores_trend ON scores(trend_score DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_scores_profit ON scores(profit_score DESC)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS review_analysis (
+            product_id TEXT PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+            total_reviews INTEGER,
+            average_rating REAL,
+            positive_count INTEGER,
+            negative_count INTEGER,
+            neutral_count INTEGER,
+            sentiment_score REAL,
+            main_pros JSON,
+            main_cons JSON,
+            red_flags JSON
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_review_rating ON review_analysis(average_rating DESC)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS market_analysis (
+            product_id TEXT PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+            niche TEXT,
+            target_geography JSON,
+            market_size_estimate TEXT,
+            competition_level TEXT,
+            trend_direction TEXT,
+            seasonality TEXT,
+            google_trends_score INTEGER,
+            tiktok_views INTEGER,
+            pinterest_saves INTEGER,
+            search_volume_monthly INTEGER
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_market_niche ON market_analysis(niche)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_market_trend ON market_analysis(trend_direction, competition_level)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pricing (
+            product_id TEXT PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+            cost_price REAL,
+            shipping_cost REAL,
+            total_cost REAL,
+            suggested_retail_price REAL,
+            profit_margin_percent REAL,
+            profit_amount REAL,
+            competitive_price_range_min REAL,
+            competitive_price_range_max REAL,
+            recommended_geography_pricing JSON
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pricing_margin ON pricing(profit_margin_percent DESC)")
+
+
+def drop_relation_tables(cursor: sqlite3.Cursor):
+    for table in RELATION_TABLES:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def write_relations(conn: sqlite3.Connection, product_ids: Sequence[str]):
+    """
+    (Ré)écrit les lignes relationnelles des produits donnés à partir de leur document JSON
+    (un identifiant absent de products n'a plus de lignes). À appeler dans une transaction.
+    """
+    ids = json.dumps(list(product_ids))
+    for table in RELATION_TABLES:
+        conn.execute(f"DELETE FROM {table} WHERE product_id IN (SELECT value FROM json_each(?))", (ids,))
+
+    # Sections découpées une fois par document (un seul parsing du JSON complet); les colonnes
+    # sont ensuite extraites de ces petits objets plutôt que du document entier
+    conn.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS relation_sections (
+            product_id TEXT NOT NULL,
+            section TEXT NOT NULL,
+            type TEXT,
+            value TEXT,
+            PRIMARY KEY (section, product_id)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("DELETE FROM temp.relation_sections")
+    conn.execute(f"""
+        INSERT INTO temp.relation_sections
+        SELECT p.id, d.key, d.type, d.value
+        FROM products p, json_each({_DOCUMENT}) d
+        WHERE p.id IN (SELECT value FROM json_each(?))
+          AND d.key IN ('suppliers', 'best_supplier', {", ".join(f"'{name}'" for name in SECTIONS)})
+    """, (ids,))
+
+    supplier_values = ", ".join(f"json_extract({_SUPPLIER}, '$.{column}')" for column in SUPPLIER_COLUMNS)
+    conn.execute(f"""
+        INSERT INTO suppliers (product_id, position, {", ".join(SUPPLIER_COLUMNS)}, is_listed, is_best)
+        SELECT l.product_id, s.key, {supplier_values}, 1, json({_SUPPLIER}) IS b.value
+        FROM temp.relation_sections l
+        JOIN json_each(CASE WHEN l.type = 'array' THEN l.value ELSE '[]' END) s
+        LEFT JOIN temp.relation_sections b ON b.section = 'best_supplier' AND b.product_id = l.product_id AND b.type = 'object'
+        WHERE l.section = 'suppliers' AND l.type = 'array' AND json_extract({_SUPPLIER}, '$.price') IS NOT NULL
+    """)
+    # Meilleur fournisseur absent de la liste: ligne à part (position -1)
+    best_values = ", ".join(f"json_extract(b.value, '$.{column}')" for column in SUPPLIER_COLUMNS)
+    conn.execute(f"""
+        INSERT INTO suppliers (product_id, position, {", ".join(SUPPLIER_COLUMNS)}, is_listed, is_best)
+        SELECT b.product_id, -1, {best_values}, 0, 1
+        FROM temp.relation_sections b
+        WHERE b.section = 'best_supplier' AND b.type = 'object'
+          AND json_extract(b.value, '$.price') IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM suppliers s WHERE s.product_id = b.product_id AND s.is_best = 1)
+    """)
+
+    for section, (table, columns) in SECTIONS.items():
+        values = ", ".join(f"json_extract(value, '$.{column}')" for column in columns)
+        conn.execute(f"""
+            INSERT INTO {table} (product_id, {", ".join(columns)})
+            SELECT product_id, {values}
+            FROM temp.relation_sections
+            WHERE section = ? AND type = 'object'
+        """, (section,))
+    conn.execute("DELETE FROM temp.relation_sections")
+
+
+def _section(columns: Sequence[str], row: Sequence[Any]) -> Dict[str, Any]:
+    return {
+        column: json.loads(value) if column in JSON_COLUMNS and value is not None else value
+        for column, value in zip(columns, row)
+    }
+
+
+def load_products(conn: sqlite3.Connection, product_ids: Sequence[str]) -> List[WinningProduct]:
+    """
+    WinningProduct des ids demandés (dans cet ordre), sections fournisseurs / score / avis /
+    marché / prix lues dans les tables relationnelles. Ids absents ou invalides ignorés.
+    """
+    if not product_ids:
+        return []
+    placeholders = ",".join("?" * len(product_ids))
+    documents = dict(conn.execute(f"SELECT id, data FROM products WHERE id IN ({placeholders})", product_ids).fetchall())
+
+    suppliers = defaultdict(list)
+    best = {}
+    for row in conn.execute(f"""
+        SELECT product_id, {", ".join(SUPPLIER_COLUMNS)}, is_listed, is_best FROM suppliers
+        WHERE product_id IN ({placeholders}) ORDER BY product_id, position
+    """, product_ids):
+        supplier = _section(SUPPLIER_COLUMNS, row[1:-2])
+        if row[-2]:
+            suppliers[row[0]].append(supplier)
+        if row[-1]:
+            best[row[0]] = supplier
+
+    sections = defaultdict(dict)
+    for section, (table, columns) in SECTIONS.items():
+        for row in conn.execute(
+            f"SELECT product_id, {', '.join(columns)} FROM {table} WHERE product_id IN ({placeholders})", product_ids
+        ):
+            sections[row[0]][section] = _section(columns, row[1:])
+
+    products = []
+    for product_id in product_ids:
+        if product_id not in documents:
+            continue
+        try:
+            data = json.loads(documents[product_id])
+            if product_id in suppliers:
+                data["suppliers"] = suppliers[product_id]
+                data["best_supplier"] = best.get(product_id)
+            data.update(sections.get(product_id, {}))
+            products.append(WinningProduct(**data))
+        except (ValidationError, TypeError, ValueError):
+            continue
+    return products
@@ -0,0 +1,245 @@
+"""
+Stockage des réponses brutes des upstreams (HTML / JSON) pour les re-parser sans les re-télécharger.
+
+- contenu compressé zstd, adressé par son sha256: output/snapshots/ab/abcdef....zst
+  (une même réponse téléchargée deux fois n'est stockée qu'une fois)
+- index SQLite des téléchargements: outil, requête, URL, paramètres, date
+- scripts/reprocess_snapshots.py relance les parsers sur les snapshots stockés
+- rétention: snapshots plus vieux que SNAPSHOT_RETENTION_DAYS, puis les plus anciens au-delà de
+  SNAPSHOT_MAX_MB, supprimés au premier enregistrement de chaque process (ou --purge-older-than)
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import zstandard
+
+from utils.config import settings
+
+
+ZSTD_LEVEL = 10  # HTML/JSON très redondants: bon ratio pour un coût CPU modeste
+SECRET_PARAM_MARKERS = ("key", "token", "secret")
+
+
+def _redact_url(url: str) -> str:
+    """Retire les clés d'API passées en query string (ex: Rainforest api_key) avant indexation"""
+    parts = urlsplit(url)
+    query = [
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not any(marker in name.lower() for marker in SECRET_PARAM_MARKERS)
+    ]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class SnapshotStore:
+    """Snapshots compressés adressés par contenu + index SQLite (tool, query, fetched_at)"""
+
+    def __init__(self, root: str = None):
+        self.root = Path(root or settings.SNAPSHOT_DIR)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.db"
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.index_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sha256 TEXT NOT NULL,
+                tool TEXT NOT NULL,
+                query TEXT,
+                url TEXT,
+                params TEXT,
+                content_type TEXT,
+                status_code INTEGER,
+                raw_size INTEGER,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_tool_time ON snapshots (tool, fetched_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_sha ON snapshots (sha256)")
+        conn.commit()
+        conn.close()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.zst"
+
+    def put(
+        self,
+        tool: str,
+        query: str,
+        body: bytes,
+        url: str = "",
+        content_type: str = "",
+        status_code: int = 200,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Stocke le corps (si nouveau) et indexe le téléchargement. Retourne le sha256"""
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_name(f"{digest}.{uuid.uuid4().hex}.tmp")  # Unique par écrivain (threads)
+            tmp_path.write_bytes(zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body))
+            tmp_path.replace(path)  # Écriture atomique: jamais de blob tronqué
+
+        conn = sqlite3.connect(self.index_path)
+        conn.execute(
+            """
+            INSERT INTO snapshots (sha256, tool, query, url, params, content_type, status_code, raw_size, fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                digest,
+                tool,
+                query,
+                url,
+                json.dumps(params or {}, sort_keys=True),
+                content_type,
+                status_code,
+                len(body),
+                time.time(),
+            ),
+        )
+        conn.commit()
+        conn.close()
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(self._blob_path(digest).read_bytes())
+
+    def iter_index(self, tool: str = None, since: float = None, latest_only: bool = False) -> Iterator[Dict[str, Any]]:
+        """Entrées de l'index (plus récentes d'abord). latest_only: un seul téléchargement par contenu"""
+        conditions, args = [], []
+        if tool:
+            conditions.append("tool = ?")
+            args.append(tool)
+        if since:
+            conditions.append("fetched_at >= ?")
+            args.append(since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        group = "GROUP BY sha256, tool" if latest_only else "GROUP BY id"
+
+        conn = sqlite3.connect(self.index_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute(
+                f"""
+                SELECT id, sha256, tool, query, url, params, content_type, status_code, raw_size,
+                       MAX(fetched_at) AS fetched_at
+                FROM snapshots {where} {group}
+                ORDER BY fetched_at DESC
+                """,
+                args,
+            )
+            for row in cursor:
+                entry = dict(row)
+                entry["params"] = json.loads(entry["params"] or "{}")
+                yield entry
+        finally:
+            conn.close()
+
+    def purge(self, older_than_days: float = None, max_bytes: int = None) -> Dict[str, int]:
+        """
+        Supprime les téléchargements de plus de older_than_days jours, puis les contenus les moins
+        récemment téléchargés tant que les blobs dépassent max_bytes (taille compressée sur disque).
+        Un blob n'est effacé que lorsque plus aucune entrée de l'index ne le référence.
+        """
+        conn = sqlite3.connect(self.index_path)
+        try:
+            with conn:
+                deleted = 0
+                if older_than_days:
+                    cutoff = time.time() - older_than_days * 86400
+                    dropped = [sha for (sha,) in conn.execute(
+                        "SELECT DISTINCT sha256 FROM snapshots WHERE fetched_at < ?", (cutoff,)
+                    )]
+                    deleted += conn.execute("DELETE FROM snapshots WHERE fetched_at < ?", (cutoff,)).rowcount
+                else:
+                    dropped = []
+
+                if max_bytes:
+                    # Contenus du plus au moins récent: on garde tant que le budget le permet
+                    total, over_budget = 0, []
+                    for (sha,) in conn.execute(
+                        "SELECT sha256 FROM snapshots GROUP BY sha256 ORDER BY MAX(fetched_at) DESC"
+                    ):
+                        path = self._blob_path(sha)
+                        total += path.stat().st_size if path.exists() else 0
+                        if total > max_bytes:
+                            over_budget.append(sha)
+                    deleted += conn.execute(
+                        "DELETE FROM snapshots WHERE sha256 IN (SELECT value FROM json_each(?))",
+                        (json.dumps(over_budget),),
+                    ).rowcount
+                    dropped.extend(over_budget)
+
+                orphans = [sha for sha in dict.fromkeys(dropped) if not conn.execute(
+                    "SELECT 1 FROM snapshots WHERE sha256 = ? LIMIT 1", (sha,)
+                ).fetchone()]
+        finally:
+            conn.close()
+
+        freed = self._delete_blobs(orphans)
+        return {"fetches": deleted, "blobs": len(orphans), "bytes": freed}
+
+    def _delete_blobs(self, digests: Iterable[str]) -> int:
+        freed = 0
+        for digest in digests:
+            path = self._blob_path(digest)
+            try:
+                freed += path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                continue
+        return freed
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Nombre de téléchargements / contenus distincts / octets bruts par outil"""
+        conn = sqlite3.connect(self.index_path)
+        rows = conn.execute(
+            "SELECT tool, COUNT(*), COUNT(DISTINCT sha256), SUM(raw_size) FROM snapshots GROUP BY tool"
+        ).fetchall()
+        conn.close()
+        return {tool: {"fetches": n, "unique": unique, "raw_bytes": size or 0} for tool, n, unique, size in rows}
+
+
+_store: Optional[SnapshotStore] = None
+
+
+def record_snapshot(tool: str, query: str, response, **params) -> Optional[str]:
+    """
+    Archive une réponse requests (ou du HTML rendu: str) d'un outil.
+    Ne lève jamais: un problème de stockage ne doit pas faire échouer le scraping.
+    """
+    global _store
+    if not settings.SNAPSHOTS_ENABLED:
+        return None
+
+    try:
+        if _store is None:
+            _store = SnapshotStore()
+            _store.purge(settings.SNAPSHOT_RETENTION_DAYS, int(settings.SNAPSHOT_MAX_MB * 1024 * 1024))
+
+        if isinstance(response, str):
+            return _store.put(tool, query, response.encode("utf-8"), content_type="text/html", params=params)
+
+        return _store.put(
+            tool,
+            query,
+            response.content,
+            url=_redact_url(response.url),
+            content_type=response.headers.get("Content-Type", ""),
+            status_code=response.status_code,
+            params=params,
+        )
+    except Exception as e:
+        print(f"[SNAPSHOT] Could not store {tool} response for '{query}': {e}")
+        return None
@@ -0,0 +1,115 @@
+import json
+import sqlite3
+import time
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.config import settings
+
+
+class TrendsStore:
+    """
+    Séries Google Trends (intérêt quotidien) stockées par (keyword, geo).
+
+    Google renormalise chaque requête sur 0-100: la queue récupérée est remise
+    à l'échelle de la série stockée grâce aux jours qui se chevauchent.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or settings.TRENDS_STORE_PATH
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _init_db(self):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS trend_points (
+                keyword TEXT NOT NULL,
+                geo TEXT NOT NULL,
+                day TEXT NOT NULL,
+                interest REAL NOT NULL,
+                PRIMARY KEY (keyword, geo, day)
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS trend_related (
+                keyword TEXT NOT NULL,
+                geo TEXT NOT NULL,
+                rising_queries JSON NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (keyword, geo)
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def last_day(self, keyword: str, geo: str) -> Optional[date]:
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT MAX(day) FROM trend_points WHERE keyword = ? AND geo = ?", (keyword, geo)
+        ).fetchone()
+        conn.close()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def series(self, keyword: str, geo: str, start: date) -> List[Tuple[date, float]]:
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            """
+            SELECT day, interest FROM trend_points
+            WHERE keyword = ? AND geo = ? AND day >= ?
+            ORDER BY day
+            """,
+            (keyword, geo, start.isoformat()),
+        ).fetchall()
+        conn.close()
+        return [(date.fromisoformat(day), interest) for day, interest in rows]
+
+    def merge_series(self, keyword: str, geo: str, points: Dict[date, float]):
+        """Ajoute/écrase des points après remise à l'échelle sur le chevauchement avec l'existant"""
+        if not points:
+            return
+
+        conn = sqlite3.connect(self.db_path)
+        days = sorted(points)
+        stored = dict(conn.execute(
+            """
+            SELECT day, interest FROM trend_points
+            WHERE keyword = ? AND geo = ? AND day >= ? AND day <= ?
+            """,
+            (keyword, geo, days[0].isoformat(), days[-1].isoformat()),
+        ).fetchall())
+
+        overlap = [day for day in days if day.isoformat() in stored]
+        new_mean = sum(points[day] for day in overlap) / len(overlap) if overlap else 0
+        old_mean = sum(stored[day.isoformat()] for day in overlap) / len(overlap) if overlap else 0
+        # Recalage borné à 100 (maximum de l'échelle Google): un chevauchement très creux ne gonfle pas la queue
+        scale = old_mean / new_mean if new_mean > 0 and old_mean > 0 else 1.0
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO trend_points (keyword, geo, day, interest) VALUES (?, ?, ?, ?)",
+            [
+                (keyword, geo, day.isoformat(), stored[day.isoformat()] if day in overlap else min(points[day] * scale, 100.0))
+                for day in days
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+    def rising_queries(self, keyword: str, geo: str) -> List[str]:
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT rising_queries FROM trend_related WHERE keyword = ? AND geo = ?", (keyword, geo)
+        ).fetchone()
+        conn.close()
+        return json.loads(row[0]) if row else []
+
+    def save_rising_queries(self, keyword: str, geo: str, queries: List[str]):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            "INSERT OR REPLACE INTO trend_related (keyword, geo, rising_queries, fetched_at) VALUES (?, ?, ?, ?)",
+            (keyword, geo, json.dumps(queries), time.time()),
+        )
+        conn.commit()
+        conn.close()
@@ -0,0 +1,199 @@
+"""
+Index vectoriel persistant des noms produits (doublons sémantiques).
+
+- <prefix>.f16   : embeddings normalisés, float16, ajoutés en fin de fichier (jamais réécrits)
+- <prefix>.faiss : index ANN HNSW (produit scalaire) si faiss est installé, sinon recherche
+                   exacte numpy par blocs sur le fichier mappé en mémoire
+
+Le fichier .f16 fait foi: l'ANN identifie chaque vecteur par sa ligne dans le fichier
+(IndexIDMap2), et avant chaque recherche ou ajout il reprend les lignes qu'il n'a pas encore
+(écrites par un autre process, ou après une sauvegarde .faiss en retard), sans reconstruction.
+"""
+
+import atexit
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import faiss
+except ImportError:  # Optionnel (requirements_rag.txt): repli numpy
+    faiss = None
+
+
+HNSW_NEIGHBORS = 32
+HNSW_EF_SEARCH = 64
+FAISS_SAVE_EVERY = 1000  # Vecteurs ajoutés entre deux écritures du fichier .faiss
+SCAN_BLOCK_ROWS = 100_000  # Repli numpy: lignes converties en float32 à la fois
+
+_model_lock = threading.Lock()
+_models = {}
+
+
+def semantic_available() -> bool:
+    try:
+        import sentence_transformers  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def embed_texts(texts: Sequence[str], model_name: str) -> np.ndarray:
+    """Embeddings normalisés (norme 1: produit scalaire = cosinus), modèle chargé une fois par process"""
+    with _model_lock:
+        if model_name not in _models:
+            from sentence_transformers import SentenceTransformer
+            _models[model_name] = SentenceTransformer(model_name)
+        model = _models[model_name]
+    vectors = model.encode(list(texts), batch_size=64, normalize_embeddings=True, show_progress_bar=False)
+    return np.asarray(vectors, dtype=np.float32)
+
+
+class VectorIndex:
+    """Vecteurs float16 en ajout seul + ANN optionnel; une ligne = position dans le fichier"""
+
+    def __init__(self, prefix: str, dim: int, persist_ann: bool = True):
+        """persist_ann=False: ANN gardé en mémoire seulement (vecteurs temporaires, pas de .faiss)"""
+        self.dim = dim
+        self.persist_ann = persist_ann
+        self.vectors_path = Path(f"{prefix}.f16")
+        self.ann_path = Path(f"{prefix}.faiss")
+        self.vectors_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._ann = None
+        self._ann_rows = 0  # Lignes 0.._ann_rows - 1 du fichier présentes dans l'ANN
+        self._file_id = None  # (device, inode) du fichier indexé: un reset par un autre process le change
+        self._unsaved = 0
+        if faiss is not None:
+            with self._lock:
+                self._load_ann()
+            if persist_ann:
+                atexit.register(self.save)
+
+    def __len__(self) -> int:
+        if not self.vectors_path.exists():
+            return 0
+        return self.vectors_path.stat().st_size // (2 * self.dim)
+
+    def _matrix(self, rows: Optional[int] = None) -> Optional[np.ndarray]:
+        rows = len(self) if rows is None else rows
+        if rows == 0:
+            return None
+        return np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(rows, self.dim))
+
+    def _new_ann(self):
+        hnsw = faiss.IndexHNSWFlat(self.dim, HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        hnsw.hnsw.efSearch = HNSW_EF_SEARCH
+        return faiss.IndexIDMap2(hnsw)
+
+    def _load_ann(self):
+        ann = None
+        if self.ann_path.exists():
+            ann = faiss.read_index(str(self.ann_path))
+            # Ancien format (positions HNSW sans identifiants) ou incohérent avec le fichier: on repart du fichier
+            if not isinstance(ann, faiss.IndexIDMap2) or ann.d != self.dim or ann.ntotal > len(self):
+                ann = None
+            else:
+                faiss.downcast_index(ann.index).hnsw.efSearch = HNSW_EF_SEARCH
+        self._ann = ann or self._new_ann()
+        self._ann_rows = self._ann.ntotal  # Lignes toujours ajoutées dans l'ordre du fichier
+        self._file_id = self._current_file_id()
+        self._catch_up_locked()
+
+    def _current_file_id(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.vectors_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_dev, stat.st_ino
+
+    def _catch_up_locked(self):
+        """Ajoute à l'ANN les lignes du fichier qu'il n'a pas encore, identifiées par leur numéro de ligne"""
+        file_id = self._current_file_id()
+        rows = len(self)
+        if (file_id != self._file_id and self._ann_rows) or rows < self._ann_rows:
+            # Fichier supprimé / recréé par un autre process (changement de modèle): index repris de zéro
+            self._ann = self._new_ann()
+            self._ann_rows = 0
+        self._file_id = file_id
+        if rows == self._ann_rows:
+            return
+
+        matrix = self._matrix(rows)
+        for start in range(self._ann_rows, rows, SCAN_BLOCK_ROWS):
+            # Relu en float16 depuis le fichier: mêmes valeurs dans l'ANN quel que soit le process
+            block = np.asarray(matrix[start:start + SCAN_BLOCK_ROWS], dtype=np.float32)
+            self._ann.add_with_ids(block, np.arange(start, start + len(block), dtype=np.int64))
+            self._unsaved += len(block)
+        self._ann_rows = rows
+        if self._unsaved >= FAISS_SAVE_EVERY:
+            self._save_locked()
+
+    def append(self, vectors: np.ndarray) -> List[int]:
+        """
+        Ajoute des vecteurs normalisés; retourne leurs numéros de ligne. Les appels concurrents
+        de plusieurs process doivent être sérialisés par l'appelant (verrou d'écriture SQLite).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        with self._lock:
+            first = len(self)
+            with open(self.vectors_path, "ab") as f:
+                vectors.astype(np.float16).tofile(f)
+            if self._ann is not None:
+                self._catch_up_locked()
+        return list(range(first, first + len(vectors)))
+
+    def get(self, rows: Sequence[int]) -> np.ndarray:
+        matrix = self._matrix()
+        if matrix is None or not rows:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.asarray(matrix[np.asarray(rows)], dtype=np.float32)
+
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Les k lignes les plus proches (produit scalaire décroissant)"""
+        query = np.asarray(query, dtype=np.float32).reshape(1, self.dim)
+        if self._ann is not None:
+            with self._lock:
+                self._catch_up_locked()
+                if self._ann.ntotal == 0:
+                    return []
+                scores, rows = self._ann.search(query, k)
+            return [(int(row), float(score)) for row, score in zip(rows[0], scores[0]) if row >= 0]
+
+        matrix = self._matrix()
+        if matrix is None:
+            return []
+        best_rows, best_scores = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        for start in range(0, len(matrix), SCAN_BLOCK_ROWS):
+            scores = np.asarray(matrix[start:start + SCAN_BLOCK_ROWS], dtype=np.float32) @ query[0]
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+        order = np.argsort(-best_scores)[:k]
+        return [(int(best_rows[i]), float(best_scores[i])) for i in order]
+
+    def _save_locked(self):
+        if self.persist_ann and self._ann is not None and self._unsaved:
+            # Fichier temporaire propre au process: plusieurs workers peuvent sauvegarder en même temps
+            tmp = self.ann_path.with_suffix(f".faiss.{os.getpid()}.tmp")
+            faiss.write_index(self._ann, str(tmp))
+            tmp.replace(self.ann_path)
+            self._unsaved = 0
+
+    def save(self):
+        with self._lock:
+            self._save_locked()
+
+    def reset(self):
+        """Supprime vecteurs et index (changement de modèle d'embedding)"""
+        with self._lock:
+            self.vectors_path.unlink(missing_ok=True)
+            self.ann_path.unlink(missing_ok=True)
+            if self._ann is not None:
+                self._ann = self._new_ann()
+                self._ann_rows = 0
+                self._file_id = None
+            self._unsaved = 0
@@ -1,49 +1,51 @@
-import sqlite3
 import json
+import sys
 from pathlib import Path
 
+from utils.database import ProductDatabase
+
 db_path = "output/products.db"
 
 if not Path(db_path).exists():
     print(f"[ERREUR] Base de donnees non trouvee: {db_path}")
     exit(1)
 
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+# Recherche: python view_db.py "led strip" (index FTS5, sans charger toute la table)
+if len(sys.argv) > 1:
+    query = " ".join(sys.argv[1:])
+    results = ProductDatabase(db_path).search_products(query, limit=20)
+    print(f"\n[INFO] {len(results)} produit(s) pour '{query}'\n")
+    for result in results:
+        score = f"{result['overall_score']:.1f}/100" if result["overall_score"] else "N/A"
+        print(f"{result['relevance']:.2f}  {result['name']}  [{result['category']}]  score {score}"
+              f"{'  (approuve)' if result['is_approved'] else ''}")
+    exit(0)
+
+db = ProductDatabase(db_path)
 
 # Compter les produits
-cursor.execute("SELECT COUNT(*) FROM products")
-count = cursor.fetchone()[0]
+count = db.count_products()
 print(f"\n[INFO] Nombre de produits dans la base: {count}\n")
 
 if count == 0:
     print("La base de donnees est vide.")
-    conn.close()
     exit(0)
 
-# Afficher tous les produits
-cursor.execute("""
-    SELECT name, category, overall_score, is_approved, created_at, data 
-    FROM products 
-    ORDER BY overall_score DESC
-""")
-
+# Afficher tous les produits (lus page par page: mémoire constante quelle que soit la taille de la base)
 print("=" * 80)
 print("PRODUITS TROUVES")
 print("=" * 80)
 
-for row in cursor.fetchall():
-    name, category, score, approved, created, data_json = row
-    
-    print(f"\nNom: {name}")
-    print(f"Categorie: {category}")
-    print(f"Score: {score:.1f}/100" if score else "Score: N/A")
-    print(f"Approuve: {'Oui' if approved else 'Non'}")
-    print(f"Cree le: {created}")
+for record in db.iter_products(lazy=True):
+    print(f"\nNom: {record.name}")
+    print(f"Categorie: {record.category}")
+    print(f"Score: {record.overall_score:.1f}/100" if record.overall_score else "Score: N/A")
+    print(f"Approuve: {'Oui' if record.is_approved else 'Non'}")
+    print(f"Cree le: {record.created_at}")
     
     # Afficher quelques détails du JSON
     try:
-        data = json.loads(data_json)
+        data = json.loads(record.data)
         if 'description' in data:
             desc = data['description'][:100] + "..." if len(data.get('description', '')) > 100 else data.get('description', '')
             print(f"Description: {desc}")
@@ -54,5 +56,4 @@ for row in cursor.fetchall():
     
     print("-" * 80)
 
-conn.close()
 print("\n[OK] Affichage termine!")